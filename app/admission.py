@@ -0,0 +1,226 @@
+import os
+import json
+import math
+import time
+import asyncio
+from pathlib import Path
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Deque, Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+from app.utils.logging import setup_logging
+
+
+load_dotenv()
+
+# Setup logging
+logger = setup_logging(__name__)
+
+INTERACTIVE = "interactive"
+BATCH = "batch"
+PRIORITY_HEADER = "X-Priority"
+
+# Queue times kept per class for the percentiles in the report
+QUEUE_TIME_WINDOW = 500
+
+
+@dataclass
+class PriorityClass:
+    """Admission settings for one class of requests.
+
+    Lower ``priority`` is served first when a slot frees up. ``max_concurrency``
+    caps the slots the class may hold at once, which keeps some capacity free
+    for the classes above it; ``max_queue`` bounds how many requests may wait.
+    A slot is one provider call in flight.
+    """
+
+    name: str
+    priority: int
+    max_concurrency: Optional[int] = None
+    max_queue: int = 32
+
+    @classmethod
+    def from_config(cls, name: str, config: dict) -> "PriorityClass":
+        return cls(name=name, **{k: v for k, v in config.items() if k in cls.__dataclass_fields__})
+
+
+class AdmissionRejected(Exception):
+    """Raised instead of queueing once a class's queue is full"""
+
+    def __init__(self, priority_class: str, retry_after_s: int):
+        super().__init__(f"{priority_class} queue is full, retry in {retry_after_s}s")
+        self.priority_class = priority_class
+        self.retry_after_s = retry_after_s
+
+
+class _ClassState:
+    def __init__(self, spec: PriorityClass):
+        self.spec = spec
+        self.waiters: Deque[Tuple[asyncio.Future, int]] = deque()
+        self.inflight = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.queue_times: Deque[float] = deque(maxlen=QUEUE_TIME_WINDOW)
+        self.service_s: Optional[float] = None
+
+    def record_service(self, elapsed_s: float):
+        self.service_s = elapsed_s if self.service_s is None else 0.8 * self.service_s + 0.2 * elapsed_s
+
+
+def _percentile_ms(samples: List[float], q: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return round(ordered[math.ceil(q * len(ordered)) - 1] * 1000, 1)
+
+
+class AdmissionController:
+    """Admits orchestrator work into a fixed number of slots by priority class.
+
+    A slot is one provider call in flight: a debate holds one, while a
+    tournament or judge batch holds one per worker it fans out to. Requests
+    take their slots straight away when enough are free and their class stays
+    under its own cap; otherwise they wait in their class's bounded queue.
+    Freed slots go to the highest-priority class with waiters, so
+    interactive requests overtake queued batch work, and batch work fills
+    whatever capacity interactive traffic leaves over. A request arriving at
+    a full queue is rejected at once with a Retry-After estimate instead of
+    waiting behind it.
+
+    Runs on the event loop; all state changes happen there, so no lock is needed.
+    """
+
+    def __init__(self, capacity: int, classes: List[PriorityClass]):
+        if capacity < 1:
+            raise ValueError("Admission capacity must be at least 1")
+        self.capacity = capacity
+        self._classes = {
+            spec.name: _ClassState(spec) for spec in sorted(classes, key=lambda spec: spec.priority)
+        }
+        self._inflight = 0
+
+    @classmethod
+    def from_config(cls, config: dict) -> "AdmissionController":
+        """Build the controller from the ``admission`` section of model_config.json"""
+        classes = config.get("classes") or {INTERACTIVE: {"priority": 0}, BATCH: {"priority": 1}}
+        return cls(
+            capacity=config.get("capacity", 8),
+            classes=[PriorityClass.from_config(name, spec) for name, spec in classes.items()],
+        )
+
+    def classify(self, requested: Optional[str], default: str = INTERACTIVE) -> str:
+        """The class named by the request, falling back to ``default`` for unknown names"""
+        requested = (requested or "").strip().lower()
+        return requested if requested in self._classes else default
+
+    def max_slots(self, priority_class: str) -> int:
+        """The most slots one request of the class can hold"""
+        limit = self._classes[priority_class].spec.max_concurrency
+        return min(self.capacity, limit or self.capacity)
+
+    def _can_start(self, state: _ClassState, slots: int) -> bool:
+        limit = state.spec.max_concurrency
+        return self._inflight + slots <= self.capacity and (limit is None or state.inflight + slots <= limit)
+
+    def _start(self, state: _ClassState, slots: int):
+        self._inflight += slots
+        state.inflight += slots
+        state.admitted += 1
+
+    def _release(self, state: _ClassState, slots: int):
+        self._inflight -= slots
+        state.inflight -= slots
+        self._dispatch()
+
+    def _dispatch(self):
+        for state in self._classes.values():
+            # First come, first served within a class, even if a smaller request behind would fit
+            while state.waiters and self._can_start(state, state.waiters[0][1]):
+                waiter, slots = state.waiters.popleft()
+                if waiter.done():
+                    continue
+                self._start(state, slots)
+                waiter.set_result(None)
+
+    def _retry_after(self, state: _ClassState) -> int:
+        # Time for the queue ahead to drain through the slots the class can use
+        queued_slots = sum(slots for _, slots in state.waiters) + 1
+        service_s = state.service_s or 1.0
+        return max(1, math.ceil(service_s * queued_slots / self.max_slots(state.spec.name)))
+
+    @asynccontextmanager
+    async def admit(self, priority_class: str, slots: int = 1):
+        """Hold ``slots`` slots for the duration of the block, queueing for them if needed
+
+        Requests for more slots than the class may hold are reduced to that
+        cap; the block receives the number granted, which fan-out callers
+        use as their worker count.
+
+        Raises:
+            AdmissionRejected: The class's queue is already full
+        """
+        state = self._classes[priority_class]
+        slots = max(1, min(slots, self.max_slots(priority_class)))
+        queued_at = time.monotonic()
+
+        # Nobody of this class may be waiting, or a newcomer would jump the queue
+        if not state.waiters and self._can_start(state, slots):
+            self._start(state, slots)
+        elif len(state.waiters) >= state.spec.max_queue:
+            state.rejected += 1
+            retry_after = self._retry_after(state)
+            logger.warning("Shedding %s request, %d queued; retry after %ds",
+                           priority_class, len(state.waiters), retry_after)
+            raise AdmissionRejected(priority_class, retry_after)
+        else:
+            waiter = asyncio.get_running_loop().create_future()
+            state.waiters.append((waiter, slots))
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    # The slots were granted just as the request went away
+                    self._release(state, slots)
+                elif (waiter, slots) in state.waiters:
+                    state.waiters.remove((waiter, slots))
+                    # A large request leaving the head of the queue may let smaller ones start
+                    self._dispatch()
+                raise
+
+        started_at = time.monotonic()
+        state.queue_times.append(started_at - queued_at)
+        try:
+            yield slots
+        finally:
+            state.record_service(time.monotonic() - started_at)
+            self._release(state, slots)
+
+    def report(self) -> Dict:
+        return {
+            "capacity": self.capacity,
+            "inflight": self._inflight,
+            "classes": {
+                name: {
+                    "priority": state.spec.priority,
+                    "max_concurrency": state.spec.max_concurrency,
+                    "max_queue": state.spec.max_queue,
+                    "inflight": state.inflight,
+                    "queued": len(state.waiters),
+                    "admitted": state.admitted,
+                    "rejected": state.rejected,
+                    "queue_p50_ms": _percentile_ms(list(state.queue_times), 0.5),
+                    "queue_p95_ms": _percentile_ms(list(state.queue_times), 0.95),
+                    "queue_max_ms": _percentile_ms(list(state.queue_times), 1.0),
+                }
+                for name, state in self._classes.items()
+            },
+        }
+
+
+def _load_admission_config() -> dict:
+    model_config = json.loads(Path(os.getenv("MODEL_CONFIG_PATH")).read_text())
+    return model_config.get("admission", {})
+
+
+ADMISSION = AdmissionController.from_config(_load_admission_config())
@@ -0,0 +1,142 @@
+import os
+import time
+import threading
+from contextvars import ContextVar
+from typing import Callable, List, Optional, TypeVar
+from app.model_interface.generation_profiles import GENERATION_PROFILES, generation_limits
+from app.model_interface.token_accounting import estimate_tokens
+from app.utils.logging import setup_logging
+
+
+# Setup logging
+logger = setup_logging(__name__)
+
+# Below this many tokens per remaining call a debate goes straight to closing statements
+MIN_TURN_TOKENS = int(os.getenv("MIN_TURN_TOKENS", "32"))
+# One more rebuttal round plus both closing statements
+ROUND_AND_CLOSING_CALLS = 4
+# Shrunk max_tokens are rounded down to this step, so backends see few distinct caps
+TOKEN_STEP = 16
+
+T = TypeVar("T")
+
+# The control whose LLM call is running in this context, for code dispatching the call (see RouterDebator)
+_CURRENT: ContextVar[Optional["DebateControl"]] = ContextVar("debate_control", default=None)
+
+
+class DebateCancelled(Exception):
+    """Raised before an LLM call once a debate is cancelled or out of time"""
+
+    def __init__(self, reason: str, history: Optional[List[str]] = None):
+        super().__init__(reason)
+        self.reason = reason
+        self.history = history or []
+
+
+class DebateControl:
+    """Cancellation flag and optional deadline for one debate.
+
+    Orchestrators run every LLM call through ``run``, which refuses to start
+    a call once the debate is cancelled or past its deadline. With a deadline,
+    the remaining time is split evenly across the remaining calls: observed
+    seconds per generated token decide how many tokens each call can afford,
+    and max_tokens and the provider timeout are capped to match. Rebuttal
+    rounds are skipped once even one more round would squeeze the closings.
+    """
+
+    def __init__(self, deadline_s: Optional[float] = None):
+        self.started = time.monotonic()
+        self.deadline = self.started + deadline_s if deadline_s else None
+        self._cancelled = threading.Event()
+        self._reason: Optional[str] = None
+        self._s_per_token: Optional[float] = None
+
+    def cancel(self, reason: str = "cancelled"):
+        if not self._cancelled.is_set():
+            self._reason = reason
+            self._cancelled.set()
+            logger.info("Debate cancelled: %s", reason)
+
+    @property
+    def remaining(self) -> Optional[float]:
+        if self.deadline is None:
+            return None
+        return self.deadline - time.monotonic()
+
+    def stop_reason(self) -> Optional[str]:
+        if self._cancelled.is_set():
+            return self._reason
+        if self.deadline is not None and self.remaining <= 0:
+            return "deadline exceeded"
+        return None
+
+    def check(self):
+        reason = self.stop_reason()
+        if reason:
+            raise DebateCancelled(reason)
+
+    def _affordable_tokens(self, calls_left: int) -> Optional[float]:
+        if self.deadline is None or self._s_per_token is None:
+            return None
+        return max(0.0, self.remaining) / max(1, calls_left) / self._s_per_token
+
+    def should_skip_to_closing(self) -> bool:
+        """Whether another rebuttal round would leave the closings less than MIN_TURN_TOKENS each"""
+        affordable = self._affordable_tokens(ROUND_AND_CLOSING_CALLS)
+        return affordable is not None and affordable < MIN_TURN_TOKENS
+
+    def max_tokens_for(self, phase: str, calls_left: int) -> Optional[int]:
+        base = GENERATION_PROFILES[phase].max_tokens
+        affordable = self._affordable_tokens(calls_left)
+        if base is None or affordable is None or affordable >= base:
+            return base
+        return max(MIN_TURN_TOKENS, int(affordable) // TOKEN_STEP * TOKEN_STEP)
+
+    def run(self, phase: str, calls_left: int, generate: Callable[[], T]) -> T:
+        """Make one LLM call within the debate's remaining budget
+
+        Args:
+            phase: Generation phase of the call
+            calls_left: LLM calls still to come in this debate, this one included
+            generate: Makes the call; its profile is capped while it runs
+        """
+        self.check()
+        max_tokens = self.max_tokens_for(phase, calls_left)
+
+        start = time.monotonic()
+        current = _CURRENT.set(self)
+        try:
+            with generation_limits(max_tokens=max_tokens, deadline=self.deadline):
+                result = generate()
+        except Exception as e:
+            # A provider timeout cut short by the deadline ends the debate rather than failing it
+            reason = self.stop_reason()
+            if reason:
+                raise DebateCancelled(reason) from e
+            raise
+        finally:
+            _CURRENT.reset(current)
+        elapsed = time.monotonic() - start
+
+        # Per generated token, not per requested one: turns ended early by a stop sequence would
+        # otherwise make tokens look cheaper than they are. The estimate is capped at max_tokens,
+        # and prefill time is included; both err towards fewer affordable tokens.
+        if self.deadline is not None and isinstance(result, str) and not result.startswith("[Error"):
+            generated = max(1, estimate_tokens(result))
+            observed = elapsed / (min(generated, max_tokens) if max_tokens else generated)
+            self._s_per_token = observed if self._s_per_token is None else 0.5 * (self._s_per_token + observed)
+        return result
+
+
+def current_control() -> Optional[DebateControl]:
+    """The control of the debate whose LLM call is running in this context, if any"""
+    return _CURRENT.get()
+
+
+def controlled(
+    control: Optional[DebateControl], phase: str, calls_left: int, generate: Callable[[], T]
+) -> T:
+    """Run ``generate`` under ``control`` when there is one"""
+    if control is None:
+        return generate()
+    return control.run(phase, calls_left, generate)
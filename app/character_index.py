@@ -0,0 +1,164 @@
+import re
+import base64
+import bisect
+import hashlib
+import threading
+from typing import Dict, List, Optional, Set, Tuple
+
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+# Record fields that are searchable in addition to the character key
+SEARCHABLE_FIELDS = ("name", "system_prompt", "personality_description")
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded"""
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def encode_cursor(last_key: str) -> str:
+    return base64.urlsafe_b64encode(last_key.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> str:
+    try:
+        padding = "=" * (-len(cursor) % 4)
+        return base64.urlsafe_b64decode(cursor + padding).decode()
+    except Exception as e:
+        raise InvalidCursorError(f"Invalid cursor: {cursor}") from e
+
+
+class CharacterIndex:
+    """In-memory inverted index over character keys and prompt text.
+
+    The index is maintained incrementally: ``add`` only touches the postings
+    of the character being written, and ``sync_from_store`` only reads rows
+    written to the character store since the last sync. Every change bumps
+    ``revision``, which callers use to build ETags for listings.
+
+    Prefix search is served from a sorted token vocabulary, so a query token
+    like ``"phin"`` matches every indexed token starting with it.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._keys: List[str] = []
+        self._tokens_by_key: Dict[str, Set[str]] = {}
+        self._postings: Dict[str, Set[str]] = {}
+        self._vocabulary: List[str] = []
+        self._last_rowid = 0
+        self._revision = 0
+
+    @property
+    def revision(self) -> int:
+        return self._revision
+
+    def add(self, key: str, record: dict) -> None:
+        """Index (or re-index) a single character"""
+        fields = record if isinstance(record, dict) else {}
+        text = [key] + [str(fields.get(field, "")) for field in SEARCHABLE_FIELDS]
+        tokens = set(tokenize(" ".join(text)))
+
+        with self._lock:
+            previous = self._tokens_by_key.get(key)
+            if previous is None:
+                bisect.insort(self._keys, key)
+            else:
+                for token in previous - tokens:
+                    self._remove_posting(token, key)
+
+            for token in tokens - (previous or set()):
+                postings = self._postings.get(token)
+                if postings is None:
+                    postings = self._postings[token] = set()
+                    bisect.insort(self._vocabulary, token)
+                postings.add(key)
+
+            self._tokens_by_key[key] = tokens
+            self._revision += 1
+
+    def _remove_posting(self, token: str, key: str) -> None:
+        postings = self._postings.get(token)
+        if postings is None:
+            return
+        postings.discard(key)
+        if not postings:
+            del self._postings[token]
+            position = bisect.bisect_left(self._vocabulary, token)
+            if position < len(self._vocabulary) and self._vocabulary[position] == token:
+                del self._vocabulary[position]
+
+    def sync_from_store(self, store) -> None:
+        """Index rows written to the character store since the last sync"""
+        with self._lock:
+            for rowid, character_id, record in store.iter_since(self._last_rowid):
+                self.add(character_id, record)
+                self._last_rowid = rowid
+
+    def _match_prefix(self, prefix: str) -> Set[str]:
+        matches: Set[str] = set()
+        position = bisect.bisect_left(self._vocabulary, prefix)
+        while position < len(self._vocabulary) and self._vocabulary[position].startswith(prefix):
+            matches |= self._postings[self._vocabulary[position]]
+            position += 1
+        return matches
+
+    def search(self, query: Optional[str] = None) -> List[str]:
+        """Return the sorted keys matching every token of ``query`` as a prefix"""
+        with self._lock:
+            query_tokens = tokenize(query or "")
+            if not query_tokens:
+                return list(self._keys)
+
+            result: Optional[Set[str]] = None
+            for token in query_tokens:
+                matches = self._match_prefix(token)
+                result = matches if result is None else result & matches
+                if not result:
+                    return []
+
+            return sorted(result)
+
+    def page(
+        self, query: Optional[str] = None, cursor: Optional[str] = None, limit: int = 100
+    ) -> Tuple[List[str], Optional[str]]:
+        """Return one page of matching keys and the cursor for the next page
+
+        The cursor encodes the last key returned, so pages stay stable while
+        new characters are being added.
+        """
+        keys = self.search(query)
+        start = 0
+        if cursor:
+            start = bisect.bisect_right(keys, decode_cursor(cursor))
+
+        items = keys[start:start + limit]
+        next_cursor = None
+        if start + limit < len(keys):
+            next_cursor = encode_cursor(items[-1])
+
+        return items, next_cursor
+
+    def listing(
+        self, store, query: Optional[str] = None, cursor: Optional[str] = None, limit: int = 100
+    ) -> Tuple[List[str], Optional[str], str]:
+        """Sync from ``store`` and return one page with the ETag of the revision that served it
+
+        Syncing, paging and building the ETag happen under one lock, so a
+        character written concurrently can't ship under an older ETag.
+        """
+        with self._lock:
+            self.sync_from_store(store)
+            items, next_cursor = self.page(query=query, cursor=cursor, limit=limit)
+            return items, next_cursor, self.etag(query, cursor, limit)
+
+    def etag(self, *parts) -> str:
+        """Build a weak ETag for a listing from the index revision and request params"""
+        digest = hashlib.sha1(
+            "|".join([str(self._revision)] + [str(part) for part in parts]).encode()
+        ).hexdigest()[:16]
+        return f'W/"{digest}"'
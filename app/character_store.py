@@ -0,0 +1,181 @@
+import os
+import json
+import sqlite3
+import argparse
+import threading
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+from dotenv import load_dotenv
+from app.utils.logging import setup_logging
+
+
+load_dotenv()
+
+# Setup logging
+logger = setup_logging(__name__)
+
+CHARACTER_DUMP_PATH = Path(os.getenv("CHARACTER_DUMP_PATH"))
+CHARACTER_STORE_PATH = Path(
+    os.getenv("CHARACTER_STORE_PATH", str(CHARACTER_DUMP_PATH / "characters.db"))
+)
+
+
+class CharacterStore:
+    """Packed character storage backed by a single SQLite file.
+
+    Every character record lives in one row keyed by its ``character_id``, so
+    lookups are a primary-key probe instead of a directory scan, and writes are
+    committed atomically (readers never see a half-written record). Records are
+    stored verbatim, which keeps both existing shapes working:
+
+        - ``{"character_id": ..., "system_prompt": ...}`` (LangChainDebator)
+        - ``{"name": ..., "debate_style": ..., ...}`` (LlamaDebator)
+
+    Each write gets a fresh ``rowid`` (``INSERT OR REPLACE`` deletes then
+    inserts), which lets callers follow the store incrementally with
+    ``iter_since``.
+    """
+
+    def __init__(self, db_path: Path):
+        self._db_path = Path(db_path)
+        self._db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(self._db_path), check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS characters ("
+            " character_id TEXT PRIMARY KEY,"
+            " record TEXT NOT NULL"
+            ")"
+        )
+
+    @property
+    def path(self) -> Path:
+        return self._db_path
+
+    def put(self, character_id: str, record: dict) -> None:
+        """Atomically insert or replace a character record"""
+        payload = json.dumps(record, separators=(",", ":"))
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO characters (character_id, record) VALUES (?, ?)",
+                    (character_id, payload),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def put_many(self, records: Dict[str, dict]) -> int:
+        """Insert or replace many records in a single transaction"""
+        rows = [
+            (character_id, json.dumps(record, separators=(",", ":")))
+            for character_id, record in records.items()
+        ]
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO characters (character_id, record) VALUES (?, ?)",
+                    rows,
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return len(rows)
+
+    def get(self, character_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT record FROM characters WHERE character_id = ?",
+                (character_id,),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def __contains__(self, character_id: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM characters WHERE character_id = ?", (character_id,)
+            ).fetchone()
+        return row is not None
+
+    def ids(self) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT character_id FROM characters ORDER BY rowid"
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def all(self) -> Dict[str, dict]:
+        return {character_id: record for _, character_id, record in self.iter_since(0)}
+
+    def iter_since(self, rowid: int) -> Iterator[Tuple[int, str, dict]]:
+        """Yield ``(rowid, character_id, record)`` for rows written after ``rowid``"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT rowid, character_id, record FROM characters"
+                " WHERE rowid > ? ORDER BY rowid",
+                (rowid,),
+            ).fetchall()
+        for row_id, character_id, record in rows:
+            yield row_id, character_id, json.loads(record)
+
+    def migrate_from_directory(self, directory: Path) -> int:
+        """Import every ``*.json`` character file from a legacy dump directory
+
+        Files written by LangChainDebator carry their own ``character_id``;
+        files written by LlamaDebator do not, so the file stem (the hashed id
+        it was saved under) is used instead.
+
+        Returns:
+            Number of records imported
+        """
+        records = {}
+        for file in sorted(Path(directory).glob("*.json")):
+            try:
+                with open(file, "r") as f:
+                    character = json.load(f)
+            except Exception as e:
+                logger.error("Failed to load %s: %s", file.name, e)
+                continue
+
+            character_id = character.get("character_id", file.stem)
+            records[character_id] = character
+
+        imported = self.put_many(records)
+        logger.info("Migrated %d characters from %s into %s", imported, directory, self._db_path)
+        return imported
+
+
+CHARACTER_STORE = CharacterStore(CHARACTER_STORE_PATH)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the packed character store")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    migrate = subparsers.add_parser(
+        "migrate", help="Import legacy per-character JSON files into the store"
+    )
+    migrate.add_argument(
+        "--source",
+        type=Path,
+        default=CHARACTER_DUMP_PATH,
+        help="Directory containing legacy character JSON files",
+    )
+
+    args = parser.parse_args()
+
+    if args.command == "migrate":
+        imported = CHARACTER_STORE.migrate_from_directory(args.source)
+        print(f"Imported {imported} characters into {CHARACTER_STORE.path}")
+
+
+if __name__ == "__main__":
+    main()
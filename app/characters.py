@@ -1,16 +1,18 @@
 import os
-from pathlib import Path
-import json
-from app.model_interface.llama_debator import LlamaDebator
+from typing import Optional
+from app.model_interface.factory import create_debator
+from app.character_store import CHARACTER_STORE
+from app.character_index import CharacterIndex
+from app.profiling import traced
+from app.prompt_templates import PromptSet, current_prompts
 from dotenv import load_dotenv
 
 load_dotenv()
 
-HF_API_KEY = os.getenv("HF_API_KEY")
-HF_MODEL = os.getenv("MODEL_ID")
-LLAMA_DEBATOR = LlamaDebator(model_name=HF_MODEL, api_key=HF_API_KEY)
+LLAMA_DEBATOR = create_debator()
 
-CHARACTER_DUMP_PATH = Path(os.getenv("CHARACTER_DUMP_PATH"))
+# Rebuttal rounds use a character's distilled persona when it has one
+COMPACT_PERSONAS = os.getenv("COMPACT_PERSONAS", "true").lower() in ("1", "true", "yes")
 
 CHARACTERS_BASE = {
     "Dr. Doofenshmirtz": {
@@ -34,19 +36,49 @@ CHARACTERS_BASE = {
 }
 
 
+CHARACTER_INDEX = CharacterIndex()
+for _name, _character in CHARACTERS_BASE.items():
+    CHARACTER_INDEX.add(_name, _character)
+
+
 def get_character_names():
     base_characters = list(CHARACTERS_BASE.keys())
-    custom_charaters = list(load_characters_from_dump().keys())
+    custom_charaters = CHARACTER_STORE.ids()
 
     return base_characters + custom_charaters
 
 
+def search_characters(query: str = None, cursor: str = None, limit: int = 100):
+    """Return one page of character keys matching ``query``, the next cursor and the page's ETag"""
+    return CHARACTER_INDEX.listing(CHARACTER_STORE, query=query, cursor=cursor, limit=limit)
+
+
+@traced()
 def get_character_description(name):
-    characters = load_characters_from_dump()
-    all_characters = characters | CHARACTERS_BASE
-    return all_characters.get(
-        name, {"style": "unknown", "description": "No info found."}
-    )
+    if name in CHARACTERS_BASE:
+        return CHARACTERS_BASE[name]
+
+    character = CHARACTER_STORE.get(name)
+    if character is None:
+        return {"style": "unknown", "description": "No info found."}
+    return character
+
+
+def rebuttal_context(
+    character: dict,
+    full_context: str,
+    prompts: Optional[PromptSet] = None,
+    compact: Optional[bool] = None,
+) -> str:
+    """Context for rebuttal rounds: the distilled persona if the character has one, else ``full_context``
+
+    Openings and closings keep the full prompt, which sets the character's
+    voice; the many rebuttal turns in between only need to stay in it.
+    """
+    compact = COMPACT_PERSONAS if compact is None else compact
+    if not compact or not isinstance(character, dict) or not character.get("compact_prompt"):
+        return full_context
+    return current_prompts(prompts).render("compact_character_context", compact_prompt=character["compact_prompt"])
 
 
 def create_character(user_input: str):
@@ -56,15 +88,6 @@ def create_character(user_input: str):
     return character_json
 
 
+@traced()
 def load_characters_from_dump():
-    characters = {}
-
-    for file in CHARACTER_DUMP_PATH.glob("*.json"):
-        try:
-            with open(file, "r") as f:
-                character = json.load(f)
-                characters[character["character_id"]] = character
-        except Exception as e:
-            print(f"Failed to load {file.name}: {e}")
-
-    return characters
+    return CHARACTER_STORE.all()
@@ -0,0 +1,65 @@
+import re
+from functools import lru_cache
+from typing import FrozenSet, List
+
+
+WORD_PATTERN = re.compile(r"\w+")
+
+
+@lru_cache(maxsize=4096)
+def ngrams(text: str, n: int = 3) -> FrozenSet[tuple]:
+    words = WORD_PATTERN.findall(text.lower())
+    if len(words) < n:
+        return frozenset([tuple(words)]) if words else frozenset()
+    return frozenset(tuple(words[i:i + n]) for i in range(len(words) - n + 1))
+
+
+def similarity(a: str, b: str, n: int = 3) -> float:
+    """Jaccard similarity of the word n-grams of two turns"""
+    a_grams, b_grams = ngrams(a, n), ngrams(b, n)
+    if not a_grams or not b_grams:
+        return 0.0
+    return len(a_grams & b_grams) / len(a_grams | b_grams)
+
+
+class ConvergenceDetector:
+    """Detects debates that have stopped producing new arguments.
+
+    After each round, every speaker's latest turn is compared with their
+    previous one. When the average similarity stays at or above
+    ``threshold`` for ``patience`` consecutive rounds, the debate is
+    considered stalled and can skip straight to closing statements.
+    """
+
+    def __init__(self, threshold: float = 0.5, patience: int = 1, n: int = 3):
+        self.threshold = threshold
+        self.patience = patience
+        self.n = n
+
+    @classmethod
+    def from_config(cls, config: dict) -> "ConvergenceDetector":
+        return cls(
+            threshold=config.get("threshold", 0.5),
+            patience=config.get("patience", 1),
+            n=config.get("ngram", 3),
+        )
+
+    def round_similarity(self, history: List[str], speakers: int, round_end: int) -> float:
+        """Average similarity of each speaker's turn in the round ending at ``round_end``
+        to their turn in the round before it"""
+        scores = [
+            similarity(history[i], history[i - speakers], self.n)
+            for i in range(round_end - speakers, round_end)
+        ]
+        return sum(scores) / len(scores)
+
+    def is_stalled(self, history: List[str], speakers: int = 2) -> bool:
+        # Each compared round needs a full previous round before it
+        if len(history) < speakers * (self.patience + 1):
+            return False
+
+        for k in range(self.patience):
+            round_end = len(history) - k * speakers
+            if self.round_similarity(history, speakers, round_end) < self.threshold:
+                return False
+        return True
@@ -1,22 +1,20 @@
-import os
-from pathlib import Path
-import json
 from dotenv import load_dotenv
-from app.characters import get_character_description
-from app.model_interface.llama_debator import LlamaDebator
-from typing import List
+from app.characters import get_character_description, rebuttal_context
+from app.model_interface.factory import create_debator
+from typing import Dict, List, Optional, Tuple
 from app.utils.logging import setup_logging
+from app.semantic_cache import cached_opening
+from app.convergence import ConvergenceDetector
+from app.prompt_templates import PROMPTS, PromptSet, current_prompts
+from app.cancellation import DebateCancelled, DebateControl, controlled
+from app.transcript import TurnClock, build_turns, timed
+from app.transcript_export import export_debate, model_labels
 
 
 load_dotenv()
-HF_API_KEY = os.getenv("HF_API_KEY")
-HF_MODEL = os.getenv("MODEL_ID")
-LLAMA_DEBATOR = LlamaDebator(model_name=HF_MODEL, api_key=HF_API_KEY)
-
-
-DEBATE_CONFIG_PATH = Path(os.getenv("DEBATE_CONFIG_PATH"))
-DEBATE_CONFIG = json.loads(DEBATE_CONFIG_PATH.read_text())
+LLAMA_DEBATOR = create_debator()
 
+CONVERGENCE_DETECTOR = ConvergenceDetector.from_config(PROMPTS.current().get("early_stop", {}))
 
 # Setup logging
 logger = setup_logging(__name__)
@@ -25,56 +23,198 @@ logger = setup_logging(__name__)
 def start_turn_based_debate(
     prompt: str, char_a: str, char_b: str, debate_rounds_count: int = None
 ) -> str:
+    return run_debate(prompt, char_a, char_b, debate_rounds_count)["debate"]
+
+
+def run_debate(
+    prompt: str,
+    char_a: str,
+    char_b: str,
+    debate_rounds_count: int = None,
+    early_stop: bool = False,
+    control: Optional[DebateControl] = None,
+    compact_personas: Optional[bool] = None,
+) -> Dict:
+    """Run a debate and report how many rounds early termination saved
+
+    With ``early_stop`` the debate skips to closing statements once
+    consecutive rounds stop producing new arguments. With a ``control`` the
+    debate stops before the next LLM call once it is cancelled or past its
+    deadline, and shortens or skips turns to fit the deadline; ``stopped``
+    then holds the reason and ``debate`` the turns completed so far.
+
+    ``debate`` holds the turn texts; ``turns`` the same turns structured
+    with speaker, round, phase, token count and timings.
+
+    Rebuttal rounds use the characters' distilled personas unless
+    ``compact_personas`` is False (default: COMPACT_PERSONAS).
+    """
+    # One prompt snapshot for the whole debate, even if the config is reloaded meanwhile
+    prompts = PROMPTS.current()
+
     a = get_character_description(char_a)
     b = get_character_description(char_b)
 
-    a_context = LlamaDebator.format_character_for_prompt(a)
-    b_context = LlamaDebator.format_character_for_prompt(b)
+    a_context = LLAMA_DEBATOR.format_character_for_prompt(a)
+    b_context = LLAMA_DEBATOR.format_character_for_prompt(b)
+    rebuttal_contexts = (
+        rebuttal_context(a, a_context, prompts, compact_personas),
+        rebuttal_context(b, b_context, prompts, compact_personas),
+    )
 
     if not debate_rounds_count:
-        debate_rounds_count = DEBATE_CONFIG.get("debate_rounds_count", 5)
+        debate_rounds_count = prompts.get("debate_rounds_count", 5)
 
-    history = _make_opening_statements(a_context, b_context, prompt)
-    debate_output = _run_turn_based_debate(
-        a_context, b_context, history, debate_rounds_count - 1
+    clock = TurnClock()
+    try:
+        history = _make_opening_statements(
+            a_context, b_context, prompt, prompts, control, 2 * debate_rounds_count, clock
+        )
+        history, rounds_saved = _run_turn_based_debate(
+            a_context, b_context, history, debate_rounds_count - 1, early_stop, prompts, control, clock,
+            rebuttal_contexts,
+        )
+        stopped = None
+    except DebateCancelled as e:
+        logger.info(f"Debate stopped after {len(e.history)} turns: {e.reason}")
+        history, rounds_saved, stopped = e.history, 0, e.reason
+
+    turns = build_turns(history, (char_a, char_b), finished=stopped is None, clock=clock)
+    export_debate("debate", prompt, turns, model_labels(LLAMA_DEBATOR), stopped)
+    return {
+        "debate": history,
+        "turns": turns,
+        "rounds_saved": rounds_saved,
+        "stopped": stopped,
+        "elapsed_ms": clock.elapsed_ms,
+    }
+
+
+def continue_debate_from_openings(
+    a_context: str,
+    b_context: str,
+    openings: List[str],
+    debate_rounds_count: int,
+    early_stop: bool = False,
+    prompts: Optional[PromptSet] = None,
+    rebuttal_contexts: Optional[Tuple[str, str]] = None,
+) -> List[str]:
+    """Run the rebuttal and closing rounds of a debate whose openings already exist"""
+    history, _ = _run_turn_based_debate(
+        a_context, b_context, list(openings), debate_rounds_count - 1, early_stop,
+        current_prompts(prompts), rebuttal_contexts=rebuttal_contexts,
     )
+    return history
 
-    return debate_output
-
-
-def _make_opening_statements(a_context, b_context, prompt):
 
-    opening_statement_prompt = DEBATE_CONFIG.get("opening_statement_prompt") + prompt
-    a_response = LLAMA_DEBATOR.debate(a_context, opening_statement_prompt)
-    b_response = LLAMA_DEBATOR.debate(b_context, opening_statement_prompt)
-    return [a_response, b_response]
+def make_opening_statement(
+    context: str,
+    prompt: str,
+    prompts: Optional[PromptSet] = None,
+    control: Optional[DebateControl] = None,
+    calls_left: int = 1,
+    clock: Optional[TurnClock] = None,
+) -> str:
+    """Opening statements depend only on the character and the topic, not the opponent"""
+    prompts = current_prompts(prompts)
+    opening_statement_prompt = prompts.render("opening_statement_prompt", topic=prompt)
+    response, _ = timed(clock, "opening", lambda: cached_opening(
+        context, prompt,
+        lambda: controlled(
+            control, "opening", calls_left,
+            lambda: LLAMA_DEBATOR.debate(context, opening_statement_prompt, phase="opening"),
+        ),
+        version=prompts.template_version("opening_statement_prompt"),
+    ))
+    return response
+
+
+def _make_opening_statements(
+    a_context,
+    b_context,
+    prompt,
+    prompts: PromptSet,
+    control: Optional[DebateControl],
+    calls_left: int,
+    clock: Optional[TurnClock] = None,
+):
+    a_opening = make_opening_statement(a_context, prompt, prompts, control, calls_left, clock)
+    try:
+        b_opening = make_opening_statement(b_context, prompt, prompts, control, calls_left - 1, clock)
+    except DebateCancelled as e:
+        e.history = [a_opening]
+        raise
+    return [a_opening, b_opening]
 
 
 def _run_turn_based_debate(
-    a_context, b_context, history: List[str], remaining_turns: int
+    a_context,
+    b_context,
+    history: List[str],
+    remaining_turns: int,
+    early_stop: bool,
+    prompts: PromptSet,
+    control: Optional[DebateControl] = None,
+    clock: Optional[TurnClock] = None,
+    rebuttal_contexts: Optional[Tuple[str, str]] = None,
+) -> Tuple[List[str], int]:
+    a_rebuttal, b_rebuttal = rebuttal_contexts or (a_context, b_context)
+    rounds_saved = 0
+    try:
+        while remaining_turns > 1:
+            if early_stop and CONVERGENCE_DETECTOR.is_stalled(history):
+                rounds_saved = remaining_turns - 1
+                logger.info(f"Debate stalled, skipping to closing statements ({rounds_saved} rounds saved)")
+                break
+            if control and control.should_skip_to_closing():
+                rounds_saved = remaining_turns - 1
+                logger.info(f"Deadline near, skipping to closing statements ({rounds_saved} rounds saved)")
+                break
+
+            history = _run_debate(a_rebuttal, b_rebuttal, history, control, 2 * remaining_turns, clock)
+            remaining_turns -= 1
+
+        return _end_debate(a_context, b_context, history, prompts, control, clock), rounds_saved
+    except DebateCancelled as e:
+        e.history = history + e.history
+        raise
+
+
+def _end_debate(
+    a_context, b_context, history: List[str], prompts: PromptSet, control=None, clock=None
 ):
-    if remaining_turns == 1:
-        debate_output = _end_debate(a_context, b_context, history)
-        return debate_output
-
-    else:
-        history = _run_debate(a_context, b_context, history)
-        return _run_turn_based_debate(
-            a_context, b_context, history, remaining_turns - 1
-        )
-
-
-def _end_debate(a_context, b_context, history: List[str]):
-    closing_statement_prompt = DEBATE_CONFIG.get("closing_statement_prompt")
-    a_response = LLAMA_DEBATOR.debate(a_context, history + [closing_statement_prompt])
-    b_response = LLAMA_DEBATOR.debate(b_context, history + [closing_statement_prompt])
+    closing_statement_prompt = prompts.render("closing_statement_prompt")
+    a_response = timed(clock, "closing", lambda: controlled(
+        control, "closing", 2,
+        lambda: LLAMA_DEBATOR.debate(a_context, history + [closing_statement_prompt], phase="closing"),
+    ))
+    try:
+        b_response = timed(clock, "closing", lambda: controlled(
+            control, "closing", 1,
+            lambda: LLAMA_DEBATOR.debate(b_context, history + [closing_statement_prompt], phase="closing"),
+        ))
+    except DebateCancelled as e:
+        e.history = [a_response]
+        raise
 
     return history + [a_response, b_response]
 
 
-def _run_debate(a_context, b_context, history: List[str]) -> str:
-    a_response = LLAMA_DEBATOR.debate(a_context, history)
-    b_response = LLAMA_DEBATOR.debate(b_context, history + [a_response])
+def _run_debate(
+    a_context, b_context, history: List[str], control=None, calls_left: int = 2, clock=None
+) -> str:
+    a_response = timed(clock, "rebuttal", lambda: controlled(
+        control, "rebuttal", calls_left,
+        lambda: LLAMA_DEBATOR.debate(a_context, history, phase="rebuttal"),
+    ))
+    try:
+        b_response = timed(clock, "rebuttal", lambda: controlled(
+            control, "rebuttal", calls_left - 1,
+            lambda: LLAMA_DEBATOR.debate(b_context, history + [a_response], phase="rebuttal"),
+        ))
+    except DebateCancelled as e:
+        e.history = [a_response]
+        raise
 
     history = history + [a_response, b_response]
     return history
@@ -1,12 +1,18 @@
 import os
-from pathlib import Path
-import json
-from typing import List, TypedDict, Annotated, Literal, Optional, Dict
+from functools import wraps
+from typing import Callable, List, TypedDict, Annotated, Literal, Optional, Dict
 from dotenv import load_dotenv
 from langgraph.graph import StateGraph, END
 from langgraph.graph.message import add_messages
-from app.characters import get_character_description
+from app.characters import get_character_description, rebuttal_context
 from app.utils.logging import setup_logging
+from app.semantic_cache import cached_opening
+from app.convergence import ConvergenceDetector
+from app.prompt_templates import PROMPTS, PromptSet
+from app.cancellation import DebateCancelled, DebateControl, controlled
+from app.profiling import traced
+from app.transcript import build_turns, format_transcript
+from app.transcript_export import export_debate, model_labels
 
 # Import the LangChain debator instead of Llama debator
 from app.model_interface.langchain_debator import LangChainDebator
@@ -19,8 +25,7 @@ MODEL_NAME = os.getenv("MODEL_NAME", "gpt-4")  # Changed from MODEL_ID
 # Initialize the LangChain debator
 DEBATOR = LangChainDebator(model_name=MODEL_NAME, api_key=OPENAI_API_KEY)
 
-DEBATE_CONFIG_PATH = Path(os.getenv("DEBATE_CONFIG_PATH"))
-DEBATE_CONFIG = json.loads(DEBATE_CONFIG_PATH.read_text())
+CONVERGENCE_DETECTOR = ConvergenceDetector.from_config(PROMPTS.current().get("early_stop", {}))
 
 # Setup logging
 logger = setup_logging(__name__)
@@ -34,13 +39,58 @@ class DebateState(TypedDict):
     character_b: str
     a_context: str
     b_context: str
+    a_rebuttal_context: str  # Distilled persona for rebuttal rounds, or the full context
+    b_rebuttal_context: str
     a_agent: Optional[Dict]  # Store the actual agent for character A
     b_agent: Optional[Dict]  # Store the actual agent for character B
+    a_rebuttal_agent: Optional[Dict]  # Character A's agent speaking from its rebuttal context
+    b_rebuttal_agent: Optional[Dict]
     history: Annotated[List[str], add_messages]
     current_round: int
     max_rounds: int
     debate_phase: Literal["opening", "debate", "closing", "complete"]
     use_memory: bool  # Whether to maintain memory across turns
+    early_stop: bool  # Skip to closing statements once the debate stalls
+    rounds_saved: int  # Debate rounds skipped by early termination
+    prompts: PromptSet  # Prompt snapshot used for the whole debate
+    control: Optional[DebateControl]  # Cancellation and deadline, if any
+    stopped: Optional[str]  # Why the debate ended early, if it was cancelled or ran out of time
+
+
+def _history_texts(history: List) -> List[str]:
+    """History entries may be strings or messages, depending on the reducer"""
+    return [getattr(turn, "content", turn) for turn in history]
+
+
+def _remember_exchange(agent: Dict, prompt: str, response: str):
+    """Add an exchange served from cache to the agent's memory, as if it had generated it"""
+    agent["memory"].chat_memory.add_user_message(prompt)
+    agent["memory"].chat_memory.add_ai_message(response)
+
+
+def _calls_left(state: DebateState) -> int:
+    """LLM calls still to come in the debate, the next one included"""
+    return max(1, 2 * state['max_rounds'] - len(state['history']))
+
+
+def _speak(state: DebateState, phase: str, calls_left: int, generate: Callable[[], str]) -> str:
+    return controlled(state.get('control'), phase, calls_left, generate)
+
+
+def _stoppable(node: Callable[[DebateState], DebateState]) -> Callable[[DebateState], DebateState]:
+    """End the debate instead of running the node once it is cancelled or out of time"""
+    @wraps(node)
+    def wrapper(state: DebateState) -> DebateState:
+        control = state.get('control')
+        reason = control.stop_reason() if control else None
+        if reason is None:
+            try:
+                return node(state)
+            except DebateCancelled as e:
+                reason = e.reason
+        logger.info(f"Debate stopped: {reason}")
+        return {**state, 'debate_phase': 'complete', 'stopped': reason}
+    return wrapper
 
 
 # Node functions for the debate graph
@@ -61,7 +111,15 @@ def initialize_debate(state: DebateState) -> DebateState:
     b_agent = DEBATOR.initialize_agent(b_context, character_id=state['character_b'])
     
     # Set max rounds if not specified
-    max_rounds = state.get('max_rounds') or DEBATE_CONFIG.get("debate_rounds_count", 5)
+    # Pin the prompt snapshot so a config reload cannot change prompts mid-debate
+    prompts = state.get('prompts') or PROMPTS.current()
+    
+    # Rebuttals speak from the distilled personas, keeping each agent's memory
+    a_rebuttal_context = rebuttal_context(a_desc, a_context, prompts)
+    b_rebuttal_context = rebuttal_context(b_desc, b_context, prompts)
+    a_rebuttal_agent = DEBATOR.agent_with_context(a_agent, a_rebuttal_context) if a_agent else None
+    b_rebuttal_agent = DEBATOR.agent_with_context(b_agent, b_rebuttal_context) if b_agent else None
+    max_rounds = state.get('max_rounds') or prompts.get("debate_rounds_count", 5)
     
     # Use memory by default
     use_memory = state.get('use_memory', True)
@@ -72,25 +130,40 @@ def initialize_debate(state: DebateState) -> DebateState:
         'b_context': b_context,
         'a_agent': a_agent,
         'b_agent': b_agent,
+        'a_rebuttal_context': a_rebuttal_context,
+        'b_rebuttal_context': b_rebuttal_context,
+        'a_rebuttal_agent': a_rebuttal_agent,
+        'b_rebuttal_agent': b_rebuttal_agent,
         'current_round': 0,
         'max_rounds': max_rounds,
         'history': [],
         'debate_phase': 'opening',
-        'use_memory': use_memory
+        'use_memory': use_memory,
+        'prompts': prompts
     }
 
 
+@_stoppable
 def character_a_opening(state: DebateState) -> DebateState:
     """Character A makes their opening statement"""
     logger.info(f"Character A ({state['character_a']}) making opening statement")
     
-    opening_prompt = DEBATE_CONFIG.get("opening_statement_prompt") + state['prompt']
+    opening_prompt = state['prompts'].render("opening_statement_prompt", topic=state['prompt'])
     
     # Use the agent or context depending on configuration
-    if state['use_memory'] and state['a_agent']:
-        a_response = DEBATOR.debate(state['a_agent'], opening_prompt)
-    else:
-        a_response = DEBATOR.debate(state['a_context'], opening_prompt)
+    def generate():
+        if state['use_memory'] and state['a_agent']:
+            return _speak(state, 'opening', _calls_left(state),
+                          lambda: DEBATOR.debate(state['a_agent'], opening_prompt, phase='opening'))
+        return _speak(state, 'opening', _calls_left(state),
+                      lambda: DEBATOR.debate(state['a_context'], opening_prompt, phase='opening'))
+
+    a_response, cache_hit = cached_opening(
+        state['a_context'], state['prompt'], generate,
+        version=state['prompts'].template_version("opening_statement_prompt"),
+    )
+    if cache_hit and state['use_memory'] and state['a_agent']:
+        _remember_exchange(state['a_agent'], opening_prompt, a_response)
     
     return {
         **state,
@@ -98,17 +171,27 @@ def character_a_opening(state: DebateState) -> DebateState:
     }
 
 
+@_stoppable
 def character_b_opening(state: DebateState) -> DebateState:
     """Character B makes their opening statement"""
     logger.info(f"Character B ({state['character_b']}) making opening statement")
     
-    opening_prompt = DEBATE_CONFIG.get("opening_statement_prompt") + state['prompt']
+    opening_prompt = state['prompts'].render("opening_statement_prompt", topic=state['prompt'])
     
     # Use the agent or context depending on configuration
-    if state['use_memory'] and state['b_agent']:
-        b_response = DEBATOR.debate(state['b_agent'], opening_prompt)
-    else:
-        b_response = DEBATOR.debate(state['b_context'], opening_prompt)
+    def generate():
+        if state['use_memory'] and state['b_agent']:
+            return _speak(state, 'opening', _calls_left(state),
+                          lambda: DEBATOR.debate(state['b_agent'], opening_prompt, phase='opening'))
+        return _speak(state, 'opening', _calls_left(state),
+                      lambda: DEBATOR.debate(state['b_context'], opening_prompt, phase='opening'))
+
+    b_response, cache_hit = cached_opening(
+        state['b_context'], state['prompt'], generate,
+        version=state['prompts'].template_version("opening_statement_prompt"),
+    )
+    if cache_hit and state['use_memory'] and state['b_agent']:
+        _remember_exchange(state['b_agent'], opening_prompt, b_response)
     
     return {
         **state,
@@ -118,17 +201,20 @@ def character_b_opening(state: DebateState) -> DebateState:
     }
 
 
+@_stoppable
 def character_a_debate(state: DebateState) -> DebateState:
     """Character A responds in the debate"""
     logger.info(f"Character A ({state['character_a']}) responding - Round {state['current_round']}")
     
     # Prepare the conversation history for the debate
-    if state['use_memory'] and state['a_agent']:
+    if state['use_memory'] and state['a_rebuttal_agent']:
         # If using memory, just pass the latest opponent response
-        a_response = DEBATOR.debate(state['a_agent'], state['history'][-1])
+        a_response = _speak(state, 'rebuttal', _calls_left(state),
+                            lambda: DEBATOR.debate(state['a_rebuttal_agent'], _history_texts(state['history'])[-1], phase='rebuttal'))
     else:
         # Pass full history if not using memory
-        a_response = DEBATOR.debate(state['a_context'], state['history'])
+        a_response = _speak(state, 'rebuttal', _calls_left(state),
+                            lambda: DEBATOR.debate(state['a_rebuttal_context'], _history_texts(state['history']), phase='rebuttal'))
     
     return {
         **state,
@@ -136,47 +222,75 @@ def character_a_debate(state: DebateState) -> DebateState:
     }
 
 
+@_stoppable
 def character_b_debate(state: DebateState) -> DebateState:
     """Character B responds in the debate"""
     logger.info(f"Character B ({state['character_b']}) responding - Round {state['current_round']}")
     
     # Prepare the conversation history for the debate
-    if state['use_memory'] and state['b_agent']:
+    if state['use_memory'] and state['b_rebuttal_agent']:
         # If using memory, just pass the latest opponent response
-        b_response = DEBATOR.debate(state['b_agent'], state['history'][-1])
+        b_response = _speak(state, 'rebuttal', _calls_left(state),
+                            lambda: DEBATOR.debate(state['b_rebuttal_agent'], _history_texts(state['history'])[-1], phase='rebuttal'))
     else:
         # Pass full history if not using memory
-        b_response = DEBATOR.debate(state['b_context'], state['history'])
+        b_response = _speak(state, 'rebuttal', _calls_left(state),
+                            lambda: DEBATOR.debate(state['b_rebuttal_context'], _history_texts(state['history']), phase='rebuttal'))
     
     # Increment round counter after both have spoken
     new_round = state['current_round'] + 1
     
     # Check if we should transition to closing statements
     debate_phase = 'closing' if new_round >= state['max_rounds'] - 1 else 'debate'
+    history = state['history'] + [b_response]
+    rounds_saved = state.get('rounds_saved', 0)
+    
+    # Skip the remaining rounds if the characters have started repeating themselves
+    if (
+        debate_phase == 'debate'
+        and state.get('early_stop')
+        and CONVERGENCE_DETECTOR.is_stalled(_history_texts(history))
+    ):
+        rounds_saved = state['max_rounds'] - 1 - new_round
+        debate_phase = 'closing'
+        logger.info(f"Debate stalled, skipping to closing statements ({rounds_saved} rounds saved)")
+    # Or if the rounds left cannot fit in the debate's deadline
+    elif (
+        debate_phase == 'debate'
+        and state.get('control')
+        and state['control'].should_skip_to_closing()
+    ):
+        rounds_saved = state['max_rounds'] - 1 - new_round
+        debate_phase = 'closing'
+        logger.info(f"Deadline near, skipping to closing statements ({rounds_saved} rounds saved)")
     
     return {
         **state,
-        'history': state['history'] + [b_response],
+        'history': history,
         'current_round': new_round,
-        'debate_phase': debate_phase
+        'debate_phase': debate_phase,
+        'rounds_saved': rounds_saved
     }
 
 
+@_stoppable
 def character_a_closing(state: DebateState) -> DebateState:
     """Character A makes their closing statement"""
     logger.info(f"Character A ({state['character_a']}) making closing statement")
     
-    closing_prompt = DEBATE_CONFIG.get("closing_statement_prompt")
+    closing_prompt = state['prompts'].render("closing_statement_prompt")
     
     if state['use_memory'] and state['a_agent']:
         # With memory, agent already has context
-        a_response = DEBATOR.debate(state['a_agent'], closing_prompt)
+        a_response = _speak(state, 'closing', 2,
+                            lambda: DEBATOR.debate(state['a_agent'], closing_prompt, phase='closing'))
     else:
         # Without memory, provide full history
-        a_response = DEBATOR.debate(
+        a_response = _speak(state, 'closing', 2, lambda: DEBATOR.debate(
             state['a_context'], 
-            state['history'] + [closing_prompt]
-        )
+            _history_texts(state['history']) + [closing_prompt],
+            phase='closing'
+        ))
     
     return {
         **state,
@@ -184,26 +298,24 @@ def character_a_closing(state: DebateState) -> DebateState:
     }
 
 
+@_stoppable
 def character_b_closing(state: DebateState) -> DebateState:
     """Character B makes their closing statement"""
     logger.info(f"Character B ({state['character_b']}) making closing statement")
     
-    closing_prompt = DEBATE_CONFIG.get("closing_statement_prompt")
+    closing_prompt = state['prompts'].render("closing_statement_prompt")
     
     if state['use_memory'] and state['b_agent']:
         # With memory, agent already has context
-        b_response = DEBATOR.debate(state['b_agent'], closing_prompt)
+        b_response = _speak(state, 'closing', 1,
+                            lambda: DEBATOR.debate(state['b_agent'], closing_prompt, phase='closing'))
     else:
         # Without memory, provide full history
-        b_response = DEBATOR.debate(
+        b_response = _speak(state, 'closing', 1, lambda: DEBATOR.debate(
             state['b_context'], 
-            state['history'] + [closing_prompt]
-        )
-    
-    # Clean up agents if they were using memory
-    if state['use_memory']:
-        DEBATOR.reset_agent_memory(state['character_a'])
-        DEBATOR.reset_agent_memory(state['character_b'])
+            _history_texts(state['history']) + [closing_prompt],
+            phase='closing'
+        ))
     
     return {
         **state,
@@ -229,14 +341,18 @@ def create_debate_graph():
     # Initialize the graph with our state structure
     graph = StateGraph(DebateState)
     
-    # Add nodes for each agent/action
-    graph.add_node("initialize", initialize_debate)
-    graph.add_node("character_a_opening", character_a_opening)
-    graph.add_node("character_b_opening", character_b_opening)
-    graph.add_node("character_a_debate", character_a_debate)
-    graph.add_node("character_b_debate", character_b_debate)
-    graph.add_node("character_a_closing", character_a_closing)
-    graph.add_node("character_b_closing", character_b_closing)
+    # Add nodes for each agent/action, each traced as its own span
+    nodes = {
+        "initialize": initialize_debate,
+        "character_a_opening": character_a_opening,
+        "character_b_opening": character_b_opening,
+        "character_a_debate": character_a_debate,
+        "character_b_debate": character_b_debate,
+        "character_a_closing": character_a_closing,
+        "character_b_closing": character_b_closing,
+    }
+    for name, node in nodes.items():
+        graph.add_node(name, traced(f"graph.{name}")(node))
     
     # Define the flow edges
     graph.set_entry_point("initialize")
@@ -276,13 +392,22 @@ def create_debate_graph():
     return graph.compile()
 
 
+def _reset_memories(char_a: str, char_b: str, use_memory: bool):
+    """Clear both agents' memory, which is cached per character and would otherwise leak into their next debate"""
+    if use_memory:
+        DEBATOR.reset_agent_memory(char_a)
+        DEBATOR.reset_agent_memory(char_b)
+
+
 # Main function to start the debate
 def start_turn_based_debate(
     prompt: str, 
     char_a: str, 
     char_b: str, 
     debate_rounds_count: int = None,
-    use_memory: bool = True
+    use_memory: bool = True,
+    early_stop: bool = False,
+    control: Optional[DebateControl] = None
 ) -> str:
     """
     Start a turn-based debate using LangGraph orchestration with LangChain agents
@@ -293,6 +418,8 @@ def start_turn_based_debate(
         char_b: Name/ID of character B
         debate_rounds_count: Number of debate rounds (optional)
         use_memory: Whether to maintain conversation memory across turns
+        early_stop: Skip to closing statements once the debate stops producing new arguments
+        control: Optional cancellation/deadline; once it fires no further LLM calls are made
     
     Returns:
         The complete debate history as a formatted string
@@ -313,13 +440,23 @@ def start_turn_based_debate(
         'current_round': 0,
         'debate_phase': 'opening',
         'use_memory': use_memory,
+        'early_stop': early_stop,
+        'rounds_saved': 0,
+        'control': control,
+        'stopped': None,
         'a_agent': None,
         'b_agent': None
     }
     
     # Run the debate
-    final_state = debate_graph.invoke(initial_state)
+    # Memory is reset here rather than in the closing node, which a stopped debate never reaches
+    try:
+        final_state = debate_graph.invoke(initial_state)
+    finally:
+        _reset_memories(char_a, char_b, use_memory)
     
+    export_debate("langgraph", prompt, _final_turns(final_state), model_labels(DEBATOR), final_state.get('stopped'))
+
     # Format and return the debate output
     debate_output = format_debate_output(final_state)
     
@@ -337,48 +474,26 @@ def format_debate_output(state: DebateState) -> str:
     Returns:
         Formatted debate transcript
     """
-    output_lines = [
+    header = [
         f"DEBATE: {state['prompt']}",
         f"Participants: {state['character_a']} vs {state['character_b']}",
         f"Memory Mode: {'Enabled' if state['use_memory'] else 'Disabled'}",
-        "=" * 80,
-        ""
     ]
-    
-    history = state['history']
-    round_num = 0
-    
-    # Format opening statements
-    if len(history) >= 2:
-        output_lines.append("OPENING STATEMENTS:")
-        output_lines.append(f"\n{state['character_a']}: {history[0]}")
-        output_lines.append(f"\n{state['character_b']}: {history[1]}")
-        output_lines.append("\n" + "=" * 80 + "\n")
-        
-        # Format debate rounds
-        if len(history) > 2:
-            debate_start = 2
-            closing_start = len(history) - 2 if state['debate_phase'] == 'complete' else len(history)
-            
-            if closing_start > debate_start:
-                output_lines.append("DEBATE ROUNDS:")
-                for i in range(debate_start, closing_start, 2):
-                    round_num += 1
-                    output_lines.append(f"\nRound {round_num}:")
-                    if i < len(history):
-                        output_lines.append(f"{state['character_a']}: {history[i]}")
-                    if i + 1 < len(history):
-                        output_lines.append(f"{state['character_b']}: {history[i + 1]}")
-                
-                output_lines.append("\n" + "=" * 80 + "\n")
-            
-            # Format closing statements
-            if state['debate_phase'] == 'complete' and len(history) >= 2:
-                output_lines.append("CLOSING STATEMENTS:")
-                output_lines.append(f"\n{state['character_a']}: {history[-2]}")
-                output_lines.append(f"\n{state['character_b']}: {history[-1]}")
-    
-    return "\n".join(output_lines)
+    if state.get('early_stop'):
+        header.append(f"Rounds Saved By Early Stop: {state.get('rounds_saved', 0)}")
+    if state.get('stopped'):
+        header.append(f"Stopped Early: {state['stopped']}")
+
+    return format_transcript(_final_turns(state), header)
+
+
+def _final_turns(state: DebateState) -> List[Dict]:
+    finished = state['debate_phase'] == 'complete' and not state.get('stopped')
+    return build_turns(
+        _history_texts(state['history']),
+        (state['character_a'], state['character_b']),
+        finished=finished,
+    )
 
 
 # Function to create a character and start a debate
@@ -425,7 +540,9 @@ async def start_turn_based_debate_async(
     char_a: str, 
     char_b: str, 
     debate_rounds_count: int = None,
-    use_memory: bool = True
+    use_memory: bool = True,
+    early_stop: bool = False,
+    control: Optional[DebateControl] = None
 ) -> str:
     """
     Async version of the debate orchestration for better performance
@@ -445,13 +562,23 @@ async def start_turn_based_debate_async(
         'current_round': 0,
         'debate_phase': 'opening',
         'use_memory': use_memory,
+        'early_stop': early_stop,
+        'rounds_saved': 0,
+        'control': control,
+        'stopped': None,
         'a_agent': None,
         'b_agent': None
     }
     
     # Run the debate asynchronously
-    final_state = await debate_graph.ainvoke(initial_state)
+    # Memory is reset here rather than in the closing node, which a stopped debate never reaches
+    try:
+        final_state = await debate_graph.ainvoke(initial_state)
+    finally:
+        _reset_memories(char_a, char_b, use_memory)
     
+    export_debate("langgraph", prompt, _final_turns(final_state), model_labels(DEBATOR), final_state.get('stopped'))
+
     # Format and return the debate output
     debate_output = format_debate_output(final_state)
     
@@ -0,0 +1,199 @@
+import os
+import re
+import json
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+from typing import Dict, List, Optional, Union
+from dotenv import load_dotenv
+from app.model_interface.debator_interface import DebatorInterface
+from app.model_interface.factory import create_debator
+from app.model_interface.generation_profiles import GENERATION_PROFILES
+from app.model_interface.token_accounting import TokenCounter, budget_from_config
+from app.prompt_templates import PROMPTS
+from app.utils.logging import setup_logging
+
+
+load_dotenv()
+
+# Setup logging
+logger = setup_logging(__name__)
+
+MODEL_CONFIG_PATH = Path(os.getenv("MODEL_CONFIG_PATH"))
+MODEL_CONFIG = json.loads(MODEL_CONFIG_PATH.read_text())
+
+VERDICT_CACHE_PATH = os.getenv("VERDICT_CACHE_PATH", ":memory:")
+
+# Completion tokens reserved per packed debate for its verdict object
+VERDICT_TOKENS = 40
+MAX_DEBATES_PER_REQUEST = 8
+
+Transcript = Union[str, List[str], List[Dict]]
+
+
+def transcript_text(transcript: Transcript) -> str:
+    """Accept format_debate_output text, a history list, or turns with ``speaker`` and ``text``
+
+    Turns from /debate/ or a two-person /panelDebate/ render exactly like the
+    equivalent history list, so both forms share cached verdicts.
+
+    Raises:
+        ValueError: The turns have more than two speakers, which the judge cannot score
+    """
+    if isinstance(transcript, str):
+        return transcript
+    if transcript and isinstance(transcript[0], dict):
+        speakers = list(dict.fromkeys(turn["speaker"] for turn in transcript))
+        if len(speakers) > 2:
+            raise ValueError(f"Only two-speaker debates can be judged, got {len(speakers)} speakers")
+        return "\n".join(
+            f"Debater {'AB'[speakers.index(turn['speaker'])]}: {turn['text']}" for turn in transcript
+        )
+    return "\n".join(
+        f"Debater {'A' if i % 2 == 0 else 'B'}: {turn}" for i, turn in enumerate(transcript)
+    )
+
+
+class VerdictCache:
+    """Verdicts keyed by transcript hash, in SQLite (in-memory unless a path is set)"""
+
+    def __init__(self, path: str = ":memory:"):
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS verdicts (key TEXT PRIMARY KEY, verdict TEXT NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get_many(self, keys: List[str]) -> Dict[str, dict]:
+        if not keys:
+            return {}
+        placeholders = ",".join("?" for _ in keys)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT key, verdict FROM verdicts WHERE key IN ({placeholders})", keys
+            ).fetchall()
+        return {key: json.loads(verdict) for key, verdict in rows}
+
+    def put_many(self, verdicts: Dict[str, dict]) -> None:
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO verdicts (key, verdict) VALUES (?, ?)",
+                [(key, json.dumps(verdict)) for key, verdict in verdicts.items()],
+            )
+            self._conn.commit()
+
+
+class Judge:
+    """Scores completed debates in bulk.
+
+    Debates are packed several per judge request as long as they fit the
+    model's context window, requests run concurrently with bounded
+    parallelism, and verdicts are cached by transcript hash so re-scoring
+    the same debate costs nothing.
+    """
+
+    def __init__(self, debator: DebatorInterface, model_name: Optional[str] = None, cache: VerdictCache = None):
+        self._debator = debator
+        self._counter = TokenCounter(model_name)
+        # Sized for the judge profile's completion, not the agent default
+        budget = budget_from_config(MODEL_CONFIG, model_name)
+        self._budget = replace(budget, max_tokens=GENERATION_PROFILES["judge"].max_tokens or budget.max_tokens)
+        self._cache = cache or VerdictCache(VERDICT_CACHE_PATH)
+
+    @staticmethod
+    def _key(prompt: str, text: str) -> str:
+        return hashlib.sha256((prompt + "\0" + text).encode()).hexdigest()
+
+    def judge_many(self, transcripts: List[Transcript], max_concurrency: int = 4) -> List[dict]:
+        """
+        Score many debates.
+
+        Args:
+            transcripts: format_debate_output strings or structured history lists
+            max_concurrency: Maximum number of judge requests in flight
+
+        Returns:
+            One ``{"winner": "A" | "B" | None, "score_a", "score_b"}`` verdict per transcript
+        """
+        # Verdicts are keyed by the judge prompt too, so editing it invalidates them
+        prompt = PROMPTS.current().render("batch_judge_prompt")
+        texts = [transcript_text(t) for t in transcripts]
+        keys = [self._key(prompt, text) for text in texts]
+        verdicts = self._cache.get_many(list(set(keys)))
+
+        pending = {key: text for key, text in zip(keys, texts) if key not in verdicts}
+        logger.info(f"Judging {len(texts)} debates: {len(texts) - len(pending)} cached")
+
+        batches = self._pack(prompt, list(pending.items()))
+        with ThreadPoolExecutor(max_workers=max_concurrency) as pool:
+            for batch_verdicts in pool.map(lambda batch: self._judge_batch(prompt, batch), batches):
+                verdicts.update(batch_verdicts)
+                self._cache.put_many(batch_verdicts)
+
+        return [verdicts.get(key, {"winner": None, "error": "No verdict"}) for key in keys]
+
+    def _pack(self, prompt: str, items: List[tuple]) -> List[List[tuple]]:
+        """Greedily pack debates into requests that fit the prompt budget"""
+        prompt_limit = self._budget.prompt_limit - self._counter.count(prompt)
+        # Every verdict in a packed answer has to fit the judge's max_tokens
+        per_request = max(1, min(MAX_DEBATES_PER_REQUEST, self._budget.max_tokens // VERDICT_TOKENS))
+        batches, current, current_tokens = [], [], 0
+        for key, text in items:
+            tokens = self._counter.count(text) + VERDICT_TOKENS
+            if current and (current_tokens + tokens > prompt_limit or len(current) >= per_request):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append((key, text))
+            current_tokens += tokens
+        if current:
+            batches.append(current)
+        return batches
+
+    def _judge_batch(self, prompt: str, batch: List[tuple]) -> Dict[str, dict]:
+        # One turn: as a list, backends would label the debates as conversation turns or trim some off
+        debates = "\n".join(f"### DEBATE {i}\n{text}" for i, (_, text) in enumerate(batch))
+        try:
+            response = self._debator.debate(prompt, debates, phase="judge")
+            parsed = self._parse(response)
+        except Exception as e:
+            logger.error("Judge request failed: %s", e)
+            parsed = {}
+
+        verdicts = {}
+        for i, (key, text) in enumerate(batch):
+            if i in parsed:
+                verdicts[key] = parsed[i]
+            elif len(batch) > 1:
+                # The model dropped this debate from a packed answer; judge it alone
+                verdicts.update(self._judge_batch(prompt, [(key, text)]))
+        return verdicts
+
+    @staticmethod
+    def _parse(response: str) -> Dict[int, dict]:
+        match = re.search(r"\[.*\]", response, re.DOTALL)
+        if not match:
+            logger.error("Judge response is not a JSON array: %s", response[:200])
+            return {}
+
+        parsed = {}
+        for item in json.loads(match.group(0)):
+            winner = str(item.get("winner", "")).upper()
+            parsed[int(item["id"])] = {
+                "winner": winner if winner in ("A", "B") else None,
+                "score_a": item.get("score_a"),
+                "score_b": item.get("score_b"),
+            }
+        return parsed
+
+
+JUDGE = Judge(create_debator(), model_name=os.getenv("MODEL_ID"))
+
+
+def judge_transcripts(transcripts: List[Transcript], max_concurrency: int = 4) -> List[dict]:
+    return JUDGE.judge_many(transcripts, max_concurrency=max_concurrency)
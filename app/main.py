@@ -1,9 +1,111 @@
-from fastapi import FastAPI, Form
-from app.debate import start_turn_based_debate
-from app.characters import get_character_names, create_character
+import asyncio
+from typing import List, Literal, Optional, Union
+from fastapi import Depends, FastAPI, Form, Request, Query, HTTPException
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
+from pydantic import BaseModel, Field
+from app.debate import run_debate
+from app.panel_debate import start_panel_debate
+from app.tournament import run_tournament
+from app.judging import judge_transcripts, transcript_text
+from app.characters import (
+    create_character,
+    search_characters,
+)
+from app.character_index import InvalidCursorError
+from app.semantic_cache import OPENING_CACHE
+from app.model_interface.router import routing_report
+from app.cancellation import DebateControl
+from app.transcript import format_transcript
+from app.responses import json_response, text_response
+from app.admission import ADMISSION, AdmissionRejected, BATCH, INTERACTIVE, PRIORITY_HEADER
+from app.profiling import (
+    ADMIN_TOKEN,
+    ADMIN_TOKEN_HEADER,
+    PROFILE_HEADER,
+    TRACER,
+    SamplingProfiler,
+    is_admin,
+    output_path,
+    profile_window,
+)
 
 app = FastAPI()
 
+# How often a running debate checks whether its client is still connected
+DISCONNECT_POLL_S = 0.5
+
+
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected_handler(request: Request, exc: AdmissionRejected):
+    return JSONResponse(
+        status_code=429,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after_s)},
+    )
+
+
+@app.middleware("http")
+async def profile_request(request: Request, call_next):
+    """Sample the process while an admin request carrying X-Profile runs"""
+    if not request.headers.get(PROFILE_HEADER) or not is_admin(request.headers.get(ADMIN_TOKEN_HEADER)):
+        return await call_next(request)
+
+    profiler = SamplingProfiler().start()
+    try:
+        response = await call_next(request)
+    finally:
+        profiler.stop()
+    path = output_path("request" + request.url.path.replace("/", "-").rstrip("-"), ".folded")
+    path.write_text(profiler.collapsed())
+    response.headers["X-Profile-File"] = str(path)
+    return response
+
+
+def require_admin(request: Request):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not is_admin(request.headers.get(ADMIN_TOKEN_HEADER)):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+
+def _priority(request: Request, default: str = INTERACTIVE) -> str:
+    """Priority class requested via the X-Priority header"""
+    return ADMISSION.classify(request.headers.get(PRIORITY_HEADER), default)
+
+
+# Fan-out requests hold one admission slot per worker, so no more workers than there are slots
+MAX_FANOUT = ADMISSION.capacity
+
+
+class DebateTurn(BaseModel):
+    speaker: str
+    round: int
+    phase: Literal["opening", "rebuttal", "closing"]
+    text: str
+    tokens: int
+    started_ms: Optional[float] = None
+    latency_ms: Optional[float] = None
+
+
+class DebateResponse(BaseModel):
+    prompt: str
+    participants: List[str]
+    debate: List[DebateTurn]
+    rounds_saved: int
+    stopped: Optional[str] = None
+    elapsed_ms: float
+
+
+class JudgeTurn(BaseModel):
+    """A turn as returned by /debate/ or /panelDebate/; other fields are ignored"""
+    speaker: str
+    text: str
+
+
+class JudgeRequest(BaseModel):
+    transcripts: List[Union[str, List[str], List[JudgeTurn]]]
+    max_concurrency: int = Field(4, ge=1, le=MAX_FANOUT)
+
 
 @app.get("/")
 def health_check():
@@ -11,22 +113,168 @@ def health_check():
 
 
 @app.get("/characters/")
-def list_characters():
-    return {"characters": get_character_names()}
+def list_characters(
+    request: Request,
+    q: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+):
+    try:
+        characters, next_cursor, etag = search_characters(query=q, cursor=cursor, limit=limit)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    return JSONResponse(
+        {"characters": characters, "next_cursor": next_cursor},
+        headers={"ETag": etag},
+    )
 
 
-@app.post("/debate/")
-def debate_endpoint(
+async def _run_until_disconnected(request: Request, control: DebateControl, fn, *args, **kwargs):
+    """Run a blocking orchestrator in a worker thread, cancelling it if the client goes away"""
+    task = asyncio.ensure_future(asyncio.to_thread(fn, *args, control=control, **kwargs))
+    while not task.done():
+        await asyncio.wait({task}, timeout=DISCONNECT_POLL_S)
+        if not task.done() and await request.is_disconnected():
+            control.cancel("client disconnected")
+    return task.result()
+
+
+# Responses are built directly rather than validated against the model, which only documents them
+@app.post("/debate/", responses={200: {"model": DebateResponse}})
+async def debate_endpoint(
+    request: Request,
     prompt: str = Form(...),
     char_a: str = Form(...),
     char_b: str = Form(...),
     debate_rounds_count: int = Form(...),
+    early_stop: bool = Form(False),
+    deadline_s: Optional[float] = Form(None, gt=0),
+    view: Literal["json", "text"] = Query("json"),
+):
+    # Time spent queued counts against the deadline
+    control = DebateControl(deadline_s)
+    async with ADMISSION.admit(_priority(request)):
+        response = await _run_until_disconnected(
+            request, control, run_debate, prompt, char_a, char_b, debate_rounds_count, early_stop
+        )
+
+    if view == "text":
+        header = [f"DEBATE: {prompt}", f"Participants: {char_a} vs {char_b}"]
+        if early_stop:
+            header.append(f"Rounds Saved By Early Stop: {response['rounds_saved']}")
+        if response["stopped"]:
+            header.append(f"Stopped Early: {response['stopped']}")
+        return text_response(request, format_transcript(response["turns"], header))
+
+    return json_response(request, {
+        "prompt": prompt,
+        "participants": [char_a, char_b],
+        "debate": response["turns"],
+        "rounds_saved": response["rounds_saved"],
+        "stopped": response["stopped"],
+        "elapsed_ms": response["elapsed_ms"],
+    })
+
+
+@app.post("/panelDebate/")
+async def panel_debate_endpoint(
+    request: Request,
+    prompt: str = Form(...),
+    characters: List[str] = Form(...),
+    debate_rounds_count: int = Form(...),
 ):
-    response = start_turn_based_debate(prompt, char_a, char_b, debate_rounds_count)
-    return {"prompt": prompt, "debate": response}
+    try:
+        async with ADMISSION.admit(_priority(request), slots=len(characters)) as workers:
+            response = await asyncio.to_thread(
+                start_panel_debate, prompt, characters, debate_rounds_count, workers
+            )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return json_response(request, {"prompt": prompt, "participants": characters, "debate": response})
+
+
+@app.post("/tournament/")
+async def tournament_endpoint(
+    request: Request,
+    characters: List[str] = Form(...),
+    topics: List[str] = Form(...),
+    debate_rounds_count: int = Form(...),
+    max_concurrency: int = Form(4, ge=1, le=MAX_FANOUT),
+):
+    try:
+        async with ADMISSION.admit(_priority(request, default=BATCH), slots=max_concurrency) as workers:
+            response = await asyncio.to_thread(
+                run_tournament, characters, topics, debate_rounds_count, workers
+            )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return json_response(request, response)
+
+
+@app.post("/judge/")
+async def judge_endpoint(request: Request, body: JudgeRequest):
+    transcripts = [
+        [turn.model_dump() for turn in transcript]
+        if transcript and isinstance(transcript[0], JudgeTurn) else transcript
+        for transcript in body.transcripts
+    ]
+    try:
+        for transcript in transcripts:
+            transcript_text(transcript)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    async with ADMISSION.admit(_priority(request, default=BATCH), slots=body.max_concurrency) as workers:
+        verdicts = await asyncio.to_thread(judge_transcripts, transcripts, workers)
+    return json_response(request, {"verdicts": verdicts})
 
 
 @app.post("/characterCreate/")
-def character_create_endpoint(user_input: str = Form(...)):
-    response = create_character(user_input)
+async def character_create_endpoint(request: Request, user_input: str = Form(...)):
+    async with ADMISSION.admit(_priority(request)):
+        response = await asyncio.to_thread(create_character, user_input)
     return {"character": response}
+
+
+@app.get("/cache/openings/")
+def opening_cache_report():
+    return OPENING_CACHE.report()
+
+
+@app.get("/routing/")
+def routing_stats():
+    return routing_report()
+
+
+@app.get("/admission/")
+def admission_stats():
+    return ADMISSION.report()
+
+
+@app.post("/admin/profile/", dependencies=[Depends(require_admin)])
+async def profile_endpoint(
+    seconds: float = Form(10, gt=0, le=300),
+    interval_ms: float = Form(5, ge=1),
+):
+    profiler = await asyncio.to_thread(profile_window, seconds, interval_ms / 1000)
+    path = output_path("window", ".folded")
+    collapsed = profiler.collapsed()
+    path.write_text(collapsed)
+    return PlainTextResponse(collapsed, headers={"X-Profile-File": str(path)})
+
+
+@app.post("/admin/tracing/", dependencies=[Depends(require_admin)])
+def tracing_endpoint(enabled: bool = Form(...)):
+    TRACER.enabled = enabled
+    return {"enabled": TRACER.enabled, "events": len(TRACER)}
+
+
+@app.post("/admin/tracing/export", dependencies=[Depends(require_admin)])
+def tracing_export_endpoint(clear: bool = Form(False)):
+    path = output_path("trace", ".json")
+    events = TRACER.export(path, clear=clear)
+    return {"path": str(path), "events": events}
@@ -0,0 +1,223 @@
+from app.model_interface.debator_interface import DebatorInterface
+from app.character_store import CHARACTER_STORE
+from app.model_interface.mock_debator import MockDebator
+from app.model_interface.persona import accept_distilled
+from app.utils.logging import setup_logging
+from app.profiling import traced
+from app.prompt_templates import PROMPTS
+
+import os
+import re
+import gzip
+import json
+import time
+import hashlib
+import threading
+from pathlib import Path
+from collections import defaultdict, deque
+from typing import Dict, List, Optional, Union
+from dotenv import load_dotenv
+
+
+load_dotenv()
+
+# Setup logging
+logger = setup_logging(__name__)
+
+SECRET_PATTERNS = [
+    re.compile(r"hf_[A-Za-z0-9]{8,}"),
+    re.compile(r"sk-[A-Za-z0-9_\-]{8,}"),
+    re.compile(r"(?i)bearer\s+[A-Za-z0-9._\-]+"),
+]
+
+
+def redact(value):
+    """Scrub anything that looks like an API key from strings, lists and dicts"""
+    if isinstance(value, str):
+        for pattern in SECRET_PATTERNS:
+            value = pattern.sub("[REDACTED]", value)
+        return value
+    if isinstance(value, list):
+        return [redact(v) for v in value]
+    if isinstance(value, dict):
+        return {k: redact(v) for k, v in value.items()}
+    return value
+
+
+def request_key(messages: List[Dict[str, str]]) -> str:
+    """Stable key used to match a replayed request to its recording"""
+    payload = json.dumps(redact(messages), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def canonical_request(system: str, prompt: Union[str, List[str]]) -> List[Dict[str, str]]:
+    """The request as the caller made it: a system prompt and the user turns
+
+    Backends shape provider messages differently (Llama joins the turns into
+    one user message, LangChain labels speakers and adds its memory), so
+    recordings are also keyed on this form, which the replayer can rebuild
+    from its own arguments.
+    """
+    turns = [prompt] if isinstance(prompt, str) else list(prompt)
+    return [{"role": "system", "content": system}] + [{"role": "user", "content": turn} for turn in turns]
+
+
+class CassetteRecorder:
+    """Appends provider interactions to a gzip-compressed JSON-lines cassette.
+
+    Every interaction is written as its own gzip member, so a cassette stays
+    readable even if the process dies mid-run, and concurrent debates can
+    record into the same file.
+    """
+
+    def __init__(self, path: Path):
+        self._path = Path(path)
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        backend: str,
+        kind: str,
+        model: Optional[str],
+        messages: List[Dict[str, str]],
+        response: str,
+        elapsed_s: float,
+        prompt_tokens: Optional[int] = None,
+        completion_tokens: Optional[int] = None,
+        request: Optional[List[Dict[str, str]]] = None,
+    ) -> None:
+        """Append one interaction; ``request`` is its ``canonical_request`` form"""
+        entry = redact({
+            "key": request_key(messages),
+            "request_key": request_key(request) if request else None,
+            "backend": backend,
+            "kind": kind,
+            "model": model,
+            "messages": messages,
+            "response": response,
+            "elapsed_s": round(elapsed_s, 4),
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "recorded_at": time.time(),
+        })
+        line = (json.dumps(entry, separators=(",", ":")) + "\n").encode()
+
+        try:
+            with self._lock, gzip.open(self._path, "ab") as f:
+                f.write(line)
+        except Exception as e:
+            logger.error("Failed to record interaction to %s: %s", self._path, e)
+
+
+def load_cassette(path: Path) -> List[dict]:
+    entries = []
+    with gzip.open(path, "rt") as f:
+        for line in f:
+            if line.strip():
+                entries.append(json.loads(line))
+    return entries
+
+
+def _create_recorder() -> Optional[CassetteRecorder]:
+    path = os.getenv("CASSETTE_RECORD_PATH")
+    if not path:
+        return None
+    logger.info("Recording provider traffic to %s", path)
+    return CassetteRecorder(Path(path))
+
+
+# Opt-in: only set when CASSETTE_RECORD_PATH is configured
+RECORDER = _create_recorder()
+
+
+class CassettePlayer:
+    """Serves recorded responses, matching on the exact request first
+
+    A recording matches either the provider messages it was sent with, for
+    the stand-in provider, or its ``canonical_request``, for ``ReplayDebator``.
+    Requests that were never recorded fall back to the recordings of the same
+    kind in round-robin order, so a cassette captured on one set of topics can
+    still drive a load test on another.
+    """
+
+    def __init__(self, entries: List[dict], time_scale: float = 1.0):
+        self.time_scale = time_scale
+        self._by_key: Dict[str, deque] = defaultdict(deque)
+        self._by_kind: Dict[str, deque] = defaultdict(deque)
+        self._lock = threading.Lock()
+        for entry in entries:
+            self._by_key[entry["key"]].append(entry)
+            if entry.get("request_key"):
+                self._by_key[entry["request_key"]].append(entry)
+            self._by_kind[entry["kind"]].append(entry)
+
+        if not entries:
+            raise ValueError("Cassette contains no recordings")
+
+    @classmethod
+    def from_path(cls, path: Path, time_scale: float = 1.0) -> "CassettePlayer":
+        return cls(load_cassette(path), time_scale=time_scale)
+
+    def lookup(self, kind: str, messages: List[Dict[str, str]]) -> dict:
+        with self._lock:
+            candidates = self._by_key.get(request_key(messages))
+            if not candidates:
+                candidates = self._by_kind.get(kind) or next(iter(self._by_kind.values()))
+            entry = candidates[0]
+            candidates.rotate(-1)
+        return entry
+
+    def has_kind(self, kind: str) -> bool:
+        return bool(self._by_kind.get(kind))
+
+    def delay(self, entry: dict) -> float:
+        return entry.get("elapsed_s", 0.0) * self.time_scale
+
+
+class ReplayDebator(DebatorInterface):
+    """Debator that replays a cassette with the original response timing"""
+
+    def __init__(self, player: CassettePlayer):
+        self.player = player
+
+    def _replay(self, kind: str, messages: List[Dict[str, str]]) -> str:
+        entry = self.player.lookup(kind, messages)
+        time.sleep(self.player.delay(entry))
+        return entry["response"]
+
+    @traced(args=("phase",))
+    def debate(self, char_description: str, prompt: Union[str, List[str]], phase: str = "rebuttal") -> str:
+        if isinstance(prompt, str):
+            prompt = [prompt]
+
+        return self._replay("debate", canonical_request(char_description, prompt))
+
+    @staticmethod
+    @traced()
+    def format_character_for_prompt(character: dict) -> str:
+        return MockDebator.format_character_for_prompt(character)
+
+    def distill_persona(self, persona: str) -> Optional[str]:
+        # Cassettes recorded before distillation existed have nothing to replay
+        if not self.player.has_kind("persona"):
+            return None
+        distillation_prompt = PROMPTS.current().render("persona_distillation_prompt")
+        return accept_distilled(persona, self._replay("persona", canonical_request(distillation_prompt, persona)))
+
+    def create_character_from_description(self, user_input: str) -> dict:
+        character_creation_prompt = PROMPTS.current().render("interpreted_character_creation_prompt")
+        response = self._replay("character", canonical_request(character_creation_prompt, user_input))
+        try:
+            character = json.loads(response.strip().lstrip("`json").strip("`"))
+        except json.JSONDecodeError:
+            character = {"system_prompt": response}
+
+        # Hashed and stored like a live backend's character, so a replayed load test can debate it
+        hashed_id = hashlib.sha256(json.dumps(character, sort_keys=True).encode()).hexdigest()[:12]
+        compact_prompt = self.distill_persona(self.format_character_for_prompt(character))
+        if compact_prompt:
+            character["compact_prompt"] = compact_prompt
+        character["character_id"] = hashed_id
+        CHARACTER_STORE.put(hashed_id, character)
+        return character
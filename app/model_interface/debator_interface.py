@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import List
+from typing import List, Optional
 
 
 class DebatorInterface(ABC):
@@ -9,9 +9,22 @@ class DebatorInterface(ABC):
         pass
 
     @abstractmethod
-    def debate(self, char_description: str, prompt: List[str]) -> str:
+    def debate(self, char_description: str, prompt: List[str], phase: str = "rebuttal") -> str:
+        """Generate a turn; ``phase`` selects the generation profile (see generation_profiles)"""
         pass
 
     @abstractmethod
     def create_character_from_description(user_input) -> str:
         pass
+
+    def distill_persona(self, persona: str) -> Optional[str]:
+        """Return a token-minimal rewrite of a character prompt, or None if the backend cannot"""
+        return None
+
+    def initialize_agent(self, character_context: str, character_id: Optional[str] = None):
+        """Return a stateful agent for the character, or None if the backend is stateless"""
+        return None
+
+    def reset_agent_memory(self, character_id: str):
+        """Clear any per-character memory kept by the backend"""
+        return
@@ -0,0 +1,68 @@
+import os
+import json
+from pathlib import Path
+from dotenv import load_dotenv
+from app.model_interface.debator_interface import DebatorInterface
+
+
+load_dotenv()
+
+
+def create_debator(backend: str = None, model_name: str = None) -> DebatorInterface:
+    """Build the debator selected by ``backend`` (or the DEBATOR_BACKEND env var)
+
+    Supported backends:
+        - ``llama`` (default): LlamaDebator via the Hugging Face InferenceClient
+        - ``langchain``: LangChainDebator via ChatOpenAI
+        - ``router``: RouterDebator over the ``routing`` section of model_config.json
+        - ``mock``: MockDebator, deterministic offline responses
+        - ``replay``: ReplayDebator serving the cassette at CASSETTE_REPLAY_PATH
+
+    ``model_name`` overrides the backend's model (MODEL_ID / MODEL_NAME).
+    """
+    backend = (backend or os.getenv("DEBATOR_BACKEND", "llama")).lower()
+
+    if backend == "llama":
+        from app.model_interface.llama_debator import LlamaDebator
+
+        return LlamaDebator(
+            model_name=model_name or os.getenv("MODEL_ID"),
+            api_key=os.getenv("HF_API_KEY"),
+            base_url=os.getenv("HF_BASE_URL"),
+        )
+
+    if backend == "langchain":
+        from app.model_interface.langchain_debator import LangChainDebator
+
+        return LangChainDebator(
+            model_name=model_name or os.getenv("MODEL_NAME", "gpt-4"),
+            api_key=os.getenv("OPENAI_API_KEY"),
+        )
+
+    if backend == "router":
+        from app.model_interface.router import RouterDebator
+
+        model_config = json.loads(Path(os.getenv("MODEL_CONFIG_PATH")).read_text())
+
+        def build(route_backend: str, route_model: str = None) -> DebatorInterface:
+            if route_backend.lower() == "router":
+                raise ValueError("A route cannot use the router backend")
+            return create_debator(route_backend, route_model)
+
+        return RouterDebator.from_config(model_config.get("routing", {}), build)
+
+    if backend == "mock":
+        from app.model_interface.mock_debator import MockDebator
+
+        return MockDebator()
+
+    if backend == "replay":
+        from app.model_interface.cassette import CassettePlayer, ReplayDebator
+
+        player = CassettePlayer.from_path(
+            Path(os.getenv("CASSETTE_REPLAY_PATH")),
+            time_scale=float(os.getenv("CASSETTE_TIME_SCALE", "1.0")),
+        )
+        return ReplayDebator(player)
+
+    raise ValueError(f"Unknown debator backend: {backend}")
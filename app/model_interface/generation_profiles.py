@@ -0,0 +1,110 @@
+import os
+import json
+import time
+from pathlib import Path
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, fields, replace
+from typing import Dict, Optional, Tuple
+from dotenv import load_dotenv
+
+
+load_dotenv()
+
+MODEL_CONFIG_PATH = Path(os.getenv("MODEL_CONFIG_PATH"))
+MODEL_CONFIG = json.loads(MODEL_CONFIG_PATH.read_text())
+
+PHASES = ("opening", "rebuttal", "closing", "character_creation", "judge")
+DEFAULT_PHASE = "rebuttal"
+
+
+@dataclass(frozen=True)
+class GenerationProfile:
+    """Decoding settings for one debate phase; unset fields use the backend's defaults"""
+
+    max_tokens: Optional[int] = None
+    temperature: Optional[float] = None
+    stop: Optional[Tuple[str, ...]] = None
+    model: Optional[str] = None
+    timeout: Optional[float] = None
+
+    def to_kwargs(self) -> dict:
+        kwargs = {f.name: getattr(self, f.name) for f in fields(self)}
+        if kwargs["stop"] is not None:
+            kwargs["stop"] = list(kwargs["stop"])
+        return {k: v for k, v in kwargs.items() if v is not None}
+
+
+def load_generation_profiles(model_config: dict) -> Dict[str, GenerationProfile]:
+    """Build one profile per phase: ``agent_configs`` defaults overlaid with
+    the phase's entry under ``generation_profiles``"""
+    agent_configs = model_config.get("agent_configs", {})
+    defaults = {
+        "max_tokens": agent_configs.get("max_tokens"),
+        "temperature": agent_configs.get("temperature"),
+        "timeout": agent_configs.get("timeout"),
+    }
+
+    profiles = {}
+    for phase in PHASES:
+        settings = {**defaults, **model_config.get("generation_profiles", {}).get(phase, {})}
+        if settings.get("stop") is not None:
+            settings["stop"] = tuple(settings["stop"])
+        profiles[phase] = GenerationProfile(
+            **{f.name: settings.get(f.name) for f in fields(GenerationProfile)}
+        )
+    return profiles
+
+
+GENERATION_PROFILES = load_generation_profiles(MODEL_CONFIG)
+
+# Caps set by a debate's deadline (see app.cancellation) for calls made in this context:
+# max_tokens, and the deadline (a time.monotonic() value) the provider timeout must end by
+_LIMITS: ContextVar[Optional[Tuple[Optional[int], Optional[float]]]] = ContextVar(
+    "generation_limits", default=None
+)
+# Some clients read a timeout of 0 as no timeout at all
+MIN_TIMEOUT_S = 0.001
+
+
+@contextmanager
+def generation_limits(max_tokens: Optional[int] = None, deadline: Optional[float] = None):
+    """Cap max_tokens and the provider timeout of every profile used inside the block
+
+    The timeout is the time left until ``deadline`` when the profile is read,
+    so a call retried later in the block (e.g. on another route) gets only
+    what remains rather than the whole budget again.
+    """
+    token = _LIMITS.set((max_tokens, deadline))
+    try:
+        yield
+    finally:
+        _LIMITS.reset(token)
+
+
+def _capped(value, cap):
+    if cap is None:
+        return value
+    return cap if value is None else min(value, cap)
+
+
+def get_profile(phase: str = DEFAULT_PHASE) -> GenerationProfile:
+    if phase not in GENERATION_PROFILES:
+        raise ValueError(f"Unknown generation phase: {phase}")
+    profile = GENERATION_PROFILES[phase]
+
+    limits = _LIMITS.get()
+    if limits is None:
+        return profile
+    max_tokens, deadline = limits
+    timeout = None if deadline is None else max(MIN_TIMEOUT_S, deadline - time.monotonic())
+    return replace(
+        profile,
+        max_tokens=_capped(profile.max_tokens, max_tokens),
+        timeout=_capped(profile.timeout, timeout),
+    )
+
+
+def has_deadline_timeout(phase: str, profile: GenerationProfile) -> bool:
+    """Whether a debate deadline capped ``profile``'s timeout, which then differs on every call"""
+    return profile.timeout != GENERATION_PROFILES[phase].timeout
@@ -1,11 +1,27 @@
 from app.model_interface.debator_interface import DebatorInterface
 from app.utils.logging import setup_logging
+from app.profiling import traced
+from app.character_store import CHARACTER_STORE
+from app.model_interface.cassette import RECORDER, canonical_request
+from app.model_interface.token_accounting import TokenCounter, TOKEN_USAGE, budget_from_config
+from app.model_interface.generation_profiles import (
+    GENERATION_PROFILES,
+    GenerationProfile,
+    get_profile,
+    has_deadline_timeout,
+)
+from app.model_interface.persona import accept_distilled
+from app.prompt_templates import PROMPTS
 
 import os
-from typing import List, Dict, Optional, Union
+from typing import List, Dict, Optional, Tuple, Union
 import json
 from pathlib import Path
 import hashlib
+import time
+import threading
+from collections import OrderedDict
+from dataclasses import replace
 
 from langchain_openai import ChatOpenAI
 from langchain_core.messages import AIMessage, SystemMessage, HumanMessage, BaseMessage
@@ -14,34 +30,85 @@ from langchain_core.output_parsers import StrOutputParser
 
 logger = setup_logging(__name__)
 
-CHARACTER_DUMP_PATH = Path(os.getenv("CHARACTER_DUMP_PATH"))
-DEBATE_CONFIG_PATH = Path(os.getenv("DEBATE_CONFIG_PATH"))
-DEBATE_CONFIG = json.loads(DEBATE_CONFIG_PATH.read_text())
+MODEL_CONFIG_PATH = Path(os.getenv("MODEL_CONFIG_PATH"))
+MODEL_CONFIG = json.loads(MODEL_CONFIG_PATH.read_text())
 
 
-class SimpleMemory:
-    """Simple memory implementation to replace ConversationBufferMemory"""
+# String contexts whose prompt template and phase chains are kept for reuse
+TEMPLATE_CACHE_SIZE = 128
+
+
+def format_conversation(history: List[str], offset: int = 0) -> str:
+    """Label alternating turns; ``offset`` counts earlier turns trimmed off"""
+    return "\n\n".join(
+        f"{'Opponent' if (i + offset) % 2 == 0 else 'You'}: {turn}"
+        for i, turn in enumerate(history)
+    )
+
+
+class CompactMemory:
+    """Conversation memory that stores each distinct turn once.
+
+    Callers without memory pass the whole history every turn, and an agent's
+    own responses come back in its opponent's history, so the same text shows
+    up again and again. Turns are interned into a per-memory pool and entries
+    keep only turn indices. Message objects are built on demand and not kept.
+    """
+
     def __init__(self):
-        self.messages = []
-    
+        self._turns: List[str] = []
+        self._turn_ids: Dict[str, int] = {}
+        # (role, turn ids, speaker offset); offset None marks a verbatim message
+        self._entries: List[Tuple[str, Tuple[int, ...], Optional[int]]] = []
+
     @property
     def chat_memory(self):
         return self
 
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _intern(self, text: str) -> int:
+        turn_id = self._turn_ids.get(text)
+        if turn_id is None:
+            turn_id = self._turn_ids[text] = len(self._turns)
+            self._turns.append(text)
+        return turn_id
+
     def add_user_message(self, message):
+        if isinstance(message, HumanMessage):
+            message = message.content
         if isinstance(message, str):
-            self.messages.append(HumanMessage(content=message))
-        elif isinstance(message, HumanMessage):
-            self.messages.append(message)
+            self._entries.append(("human", (self._intern(message),), None))
+
+    def add_user_turns(self, turns: List[str], offset: int = 0):
+        """Remember a conversation excerpt, formatted with speaker labels when read"""
+        self._entries.append(("human", tuple(self._intern(t) for t in turns), offset))
+
+    def add_ai_message(self, message):
+        if isinstance(message, AIMessage):
+            message = message.content
+        self._entries.append(("ai", (self._intern(message),), None))
+
+    def _content(self, turn_ids: Tuple[int, ...], offset: Optional[int]) -> str:
+        if offset is None:
+            return self._turns[turn_ids[0]]
+        return format_conversation([self._turns[i] for i in turn_ids], offset)
+
+    @property
+    def messages(self) -> List[BaseMessage]:
+        return [
+            (AIMessage if role == "ai" else HumanMessage)(content=self._content(turn_ids, offset))
+            for role, turn_ids, offset in self._entries
+        ]
+
+    def stored_chars(self) -> int:
+        return sum(len(turn) for turn in self._turns)
 
-    def add_ai_message(self, message: str):
-        if isinstance(message, str):
-            self.messages.append(AIMessage(content=message))
-        else:
-            self.messages.append(message)
-    
     def clear(self):
-        self.messages = []
+        self._turns.clear()
+        self._turn_ids.clear()
+        self._entries.clear()
 
 
 class LangChainDebator(DebatorInterface):
@@ -58,31 +125,113 @@ class LangChainDebator(DebatorInterface):
         )
         # Store active agents for reuse
         self._active_agents: Dict[str, Dict] = {}
+        # Token accounting for context budgets
+        self._token_counter = TokenCounter(model_name)
+        self._token_budget = budget_from_config(MODEL_CONFIG, model_name)
+        # LLMs bound to each generation profile in use
+        self._phase_llms: Dict[GenerationProfile, object] = {}
+        # Prompt templates and chains by context hash
+        self._templates: "OrderedDict[str, Dict]" = OrderedDict()
+        self._templates_lock = threading.Lock()
+
+    def _llm_for_phase(self, phase: str):
+        """Return the LLM bound to the phase's max_tokens, stop sequences, temperature, model and timeout
+
+        Bound LLMs are cached by profile, except for a timeout capped by a
+        debate deadline: that changes on every call, so it is bound on top of
+        the cached LLM for this call only.
+        """
+        profile = get_profile(phase)
+        deadline_timeout = has_deadline_timeout(phase, profile)
+        key = replace(profile, timeout=GENERATION_PROFILES[phase].timeout) if deadline_timeout else profile
+        if key not in self._phase_llms:
+            self._phase_llms[key] = self.llm.bind(**key.to_kwargs())
+        llm = self._phase_llms[key]
+        return llm.bind(timeout=profile.timeout) if deadline_timeout else llm
+
+    def _template_for_context(self, character_context: str) -> Dict:
+        """Return the prompt template, base chain and phase chains for a context, built once"""
+        key = hashlib.sha256(character_context.encode()).hexdigest()
+        with self._templates_lock:
+            template = self._templates.get(key)
+            if template is not None:
+                self._templates.move_to_end(key)
+                return template
+
+        # Create a chat prompt template with system message and history
+        prompt = ChatPromptTemplate.from_messages([
+            ("system", character_context),
+            MessagesPlaceholder(variable_name="history"),
+            ("human", "{input}")
+        ])
+        template = {
+            "chain": prompt | self.llm | StrOutputParser(),
+            "prompt": prompt,
+            "phase_chains": {},
+            "context": character_context,
+        }
+
+        with self._templates_lock:
+            template = self._templates.setdefault(key, template)
+            if len(self._templates) > TEMPLATE_CACHE_SIZE:
+                self._templates.popitem(last=False)
+        return template
+
+    def _chain_for_phase(self, agent: Dict, phase: str):
+        # Keyed by profile, since a debate deadline can cap max_tokens per call (in TOKEN_STEP steps)
+        profile = get_profile(phase)
+        if has_deadline_timeout(phase, profile):
+            # A one-off chain: caching per deadline-capped timeout would never hit and never evict
+            return agent["prompt"] | self._llm_for_phase(phase) | StrOutputParser()
+        chains = agent.setdefault("phase_chains", {})
+        if profile not in chains:
+            chains[profile] = agent["prompt"] | self._llm_for_phase(phase) | StrOutputParser()
+        return chains[profile]
 
     def create_character_from_description(self, user_input: str, save_response: bool = True) -> dict:
         """Create a character from user description and save to file"""
-        character_creation_prompt = DEBATE_CONFIG.get("interpreted_character_creation_prompt")
-        character_creation_prompt = "\n".join(character_creation_prompt)
+        character_creation_prompt = PROMPTS.current().render("interpreted_character_creation_prompt")
 
         try:
             # Call the LLM with the system prompt and user input
-            response = self.llm.invoke([
+            start = time.perf_counter()
+            response = self._llm_for_phase("character_creation").invoke([
                 SystemMessage(content=character_creation_prompt),
                 HumanMessage(content=user_input)
             ])
+            elapsed = time.perf_counter() - start
 
             # Parse the response
             response_content = response.content
+
+            if RECORDER:
+                usage = getattr(response, "usage_metadata", None) or {}
+                RECORDER.record(
+                    backend="langchain",
+                    kind="character",
+                    model=self._model_name,
+                    messages=[
+                        {"role": "system", "content": character_creation_prompt},
+                        {"role": "user", "content": user_input},
+                    ],
+                    response=response_content,
+                    elapsed_s=elapsed,
+                    prompt_tokens=usage.get("input_tokens"),
+                    completion_tokens=usage.get("output_tokens"),
+                    request=canonical_request(character_creation_prompt, user_input),
+                )
             logger.info("LLM response: %s", response_content)
             hashed_id = hashlib.sha256(response_content.encode()).hexdigest()[:12]
             character_data = {"character_id": hashed_id, "system_prompt":  response_content}
 
+            # A compact persona for rebuttal rounds, distilled once here rather than per debate
+            compact_prompt = self.distill_persona(response_content)
+            if compact_prompt:
+                character_data["compact_prompt"] = compact_prompt
+
             if save_response:
-                # Save character to file
-                output_path = CHARACTER_DUMP_PATH / f"{hashed_id}.json"
-                CHARACTER_DUMP_PATH.mkdir(parents=True, exist_ok=True)
-                with output_path.open("w") as f:
-                    json.dump(character_data, f, indent=2)
+                # Save character to the character store
+                CHARACTER_STORE.put(hashed_id, character_data)
 
             return character_data
         except json.JSONDecodeError as e:
@@ -93,6 +242,37 @@ class LangChainDebator(DebatorInterface):
             logger.error("Unexpected error: %s", e)
             return {"error": "An unexpected error occurred while creating the character"}
     
+    def distill_persona(self, persona: str) -> Optional[str]:
+        distillation_prompt = PROMPTS.current().render("persona_distillation_prompt")
+        try:
+            start = time.perf_counter()
+            response = self._llm_for_phase("character_creation").invoke([
+                SystemMessage(content=distillation_prompt),
+                HumanMessage(content=persona)
+            ])
+            elapsed = time.perf_counter() - start
+
+            if RECORDER:
+                usage = getattr(response, "usage_metadata", None) or {}
+                RECORDER.record(
+                    backend="langchain",
+                    kind="persona",
+                    model=self._model_name,
+                    messages=[
+                        {"role": "system", "content": distillation_prompt},
+                        {"role": "user", "content": persona},
+                    ],
+                    response=response.content,
+                    elapsed_s=elapsed,
+                    prompt_tokens=usage.get("input_tokens"),
+                    completion_tokens=usage.get("output_tokens"),
+                    request=canonical_request(distillation_prompt, persona),
+                )
+            return accept_distilled(persona, response.content)
+        except Exception as e:
+            logger.warning("Persona distillation failed: %s", e)
+            return None
+
     def initialize_agent(self, character_context: str, character_id: Optional[str] = None) -> Dict:
         """Initialize an agent with the given character context
         
@@ -111,23 +291,10 @@ class LangChainDebator(DebatorInterface):
             return self._active_agents[character_id]
         
         try:
-            # Create a chat prompt template with system message and history
-            prompt = ChatPromptTemplate.from_messages([
-                ("system", character_context),
-                MessagesPlaceholder(variable_name="history"),
-                ("human", "{input}")
-            ])
-            
-            # Create the chain
-            chain = prompt | self.llm | StrOutputParser()
-            
-            # Create simple memory
-            memory = SimpleMemory()
-            
+            # Prompt and chains are shared by every agent with this context; memory is not
             agent_dict = {
-                "chain": chain,
-                "memory": memory,
-                "context": character_context,
+                **self._template_for_context(character_context),
+                "memory": CompactMemory(),
                 "character_id": character_id
             }
             
@@ -142,8 +309,26 @@ class LangChainDebator(DebatorInterface):
             logger.exception(f"Unexpected error initializing agent: {e}")
             return None
         
+    def agent_with_context(self, agent: Dict, character_context: str) -> Dict:
+        """The same agent, memory included, speaking from a different system prompt
+        
+        Args:
+            agent: An initialized agent
+            character_context: The system prompt to use instead, e.g. a compact persona
+            
+        Returns:
+            An agent dictionary sharing ``agent``'s memory
+        """
+        if agent["context"] == character_context:
+            return agent
+        return {
+            **self._template_for_context(character_context),
+            "memory": agent["memory"],
+            "character_id": agent.get("character_id")
+        }
+        
     def initialize_agent_from_file(self, character_id: str) -> Optional[Dict]:
-        """Initialize an agent from a saved character file
+        """Initialize an agent from a saved character record
         
         Args:
             character_id: The character ID to load
@@ -151,19 +336,15 @@ class LangChainDebator(DebatorInterface):
         Returns:
             Dictionary containing agent components or None on failure
         """
-        logger.info("Initializing agent from file for character ID: %s", character_id)
+        logger.info("Initializing agent from store for character ID: %s", character_id)
 
         try:
-            file_path = CHARACTER_DUMP_PATH / f"{character_id}.json"
+            data = CHARACTER_STORE.get(character_id)
 
-            if not file_path.exists():
-                logger.error("Character file not found: %s", file_path)
+            if data is None:
+                logger.error("Character not found in store: %s", character_id)
                 return None
 
-            # Read and parse JSON
-            with file_path.open("r") as f:
-                data = json.load(f)
-
             # Extract character context
             if isinstance(data, dict) and character_id in data:
                 character_context = data[character_id]
@@ -174,18 +355,25 @@ class LangChainDebator(DebatorInterface):
             return self.initialize_agent(character_context, character_id)
 
         except json.JSONDecodeError as e:
-            logger.error("Failed to parse JSON from %s: %s", file_path, e)
+            logger.error("Failed to parse stored record for %s: %s", character_id, e)
             return None
         except Exception:
-            logger.exception("Unexpected error initializing agent from file for %s", character_id)
+            logger.exception("Unexpected error initializing agent from store for %s", character_id)
             return None
     
-    def debate(self, character_context: Union[str, Dict], conversation_history: Union[str, List[str]]) -> str:
+    @traced(args=("phase",))
+    def debate(
+        self,
+        character_context: Union[str, Dict],
+        conversation_history: Union[str, List[str]],
+        phase: str = "rebuttal",
+    ) -> str:
         """Generate a debate response for the character
         
         Args:
             character_context: Either a string context or an agent dictionary
             conversation_history: The conversation history (string or list of strings)
+            phase: Debate phase, selecting the generation profile
             
         Returns:
             The character's response
@@ -196,58 +384,127 @@ class LangChainDebator(DebatorInterface):
                 # Already an initialized agent
                 agent = character_context
             elif isinstance(character_context, str):
-                # Need to initialize an agent
-                agent = self.initialize_agent(character_context)
-                if not agent:
-                    raise ValueError("Failed to initialize agent")
+                # Stateless call: reuse the context's cached chains with empty memory
+                agent = {**self._template_for_context(character_context), "memory": CompactMemory()}
             else:
                 raise ValueError(f"Invalid character_context type: {type(character_context)}")
             
+            # Turns may arrive as chat messages (e.g. LangGraph state); budget and format their text
+            if isinstance(conversation_history, list):
+                conversation_history = [getattr(turn, "content", turn) for turn in conversation_history]
+            else:
+                conversation_history = getattr(conversation_history, "content", conversation_history)
+            turns = conversation_history if isinstance(conversation_history, list) else [conversation_history]
+            history_messages = agent["memory"].chat_memory.messages
+
+            # Drop the oldest memory messages, then the oldest turns, if over budget
+            budget = replace(
+                self._token_budget,
+                max_tokens=get_profile(phase).max_tokens or self._token_budget.max_tokens,
+            )
+            fitted, prompt_tokens = budget.fit(
+                self._token_counter,
+                agent["context"],
+                [m.content for m in history_messages] + turns,
+            )
+            dropped = len(history_messages) + len(turns) - len(fitted)
+            dropped_turns = max(0, dropped - len(history_messages))
+            history_messages = history_messages[dropped:]
+
             # Convert conversation history to string if it's a list
             if isinstance(conversation_history, list):
                 # Format the conversation history
-                formatted_history = self._format_conversation_history(conversation_history)
+                formatted_history = self._format_conversation_history(
+                    conversation_history[dropped_turns:], offset=dropped_turns
+                )
             else:
                 formatted_history = conversation_history
             
             # Generate response using the chain
-            response = agent["chain"].invoke({
+            start = time.perf_counter()
+            response = self._chain_for_phase(agent, phase).invoke({
                 "input": formatted_history,
-                "history": agent["memory"].chat_memory.messages
+                "history": history_messages
             })
+
+            elapsed = time.perf_counter() - start
+
+            completion_tokens = self._token_counter.count(response)
+            if RECORDER:
+                self._record_debate(
+                    agent, history_messages, formatted_history, turns, response, elapsed,
+                    prompt_tokens, completion_tokens,
+                )
+            TOKEN_USAGE.add("langchain", prompt_tokens, completion_tokens, dropped)
+            logger.info(
+                "Token usage: prompt=%d completion=%d trimmed=%d",
+                prompt_tokens, completion_tokens, dropped,
+            )
             
-            # Update memory with the exchange
-            agent["memory"].chat_memory.add_user_message(formatted_history)
+            # Update memory with the exchange, storing each turn only once
+            if isinstance(conversation_history, list):
+                agent["memory"].chat_memory.add_user_turns(
+                    conversation_history[dropped_turns:], offset=dropped_turns
+                )
+            else:
+                agent["memory"].chat_memory.add_user_message(formatted_history)
             agent["memory"].chat_memory.add_ai_message(response)
             
             logger.info(f"Generated debate response: {response[:100]}...")
             return response
             
         except Exception as e:
+            # A timeout capped by a debate deadline must reach DebateControl, which ends the debate
+            if phase in GENERATION_PROFILES and has_deadline_timeout(phase, get_profile(phase)):
+                raise
             logger.error(f"Error generating debate response: {e}")
             return f"[Error generating response: {str(e)}]"
     
-    def _format_conversation_history(self, history: List[str]) -> str:
+    def _record_debate(
+        self,
+        agent: Dict,
+        history_messages: List[BaseMessage],
+        formatted_history: str,
+        turns: List[str],
+        response: str,
+        elapsed: float,
+        prompt_tokens: int,
+        completion_tokens: int,
+    ):
+        """Write a debate exchange to the cassette in chat-message form"""
+        messages = [{"role": "system", "content": agent["context"]}]
+        messages += [
+            {"role": "assistant" if isinstance(m, AIMessage) else "user", "content": m.content}
+            for m in history_messages
+        ]
+        messages.append({"role": "user", "content": formatted_history})
+
+        RECORDER.record(
+            backend="langchain",
+            kind="debate",
+            model=self._model_name,
+            messages=messages,
+            response=response,
+            elapsed_s=elapsed,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            request=canonical_request(agent["context"], turns),
+        )
+
+    def _format_conversation_history(self, history: List[str], offset: int = 0) -> str:
         """Format conversation history list into a readable string
         
         Args:
             history: List of conversation turns
+            offset: Number of earlier turns trimmed off, to keep speaker labels aligned
             
         Returns:
             Formatted conversation string
         """
-        if not history:
-            return ""
-        
-        formatted_parts = []
-        for i, turn in enumerate(history):
-            # Alternate between speakers for context
-            speaker = "Opponent" if i % 2 == 0 else "You"
-            formatted_parts.append(f"{speaker}: {turn}")
-        
-        return "\n\n".join(formatted_parts)
+        return format_conversation(history, offset)
     
     @staticmethod
+    @traced()
     def format_character_for_prompt(character_description: dict) -> str:
         """Format a character description for use as a prompt
         
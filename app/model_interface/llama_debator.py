@@ -5,8 +5,17 @@ import os
 from dotenv import load_dotenv
 from pathlib import Path
 import hashlib
-from typing import List
+import time
+from typing import List, Optional
 from app.utils.logging import setup_logging
+from app.profiling import traced
+from app.character_store import CHARACTER_STORE
+from app.model_interface.cassette import RECORDER, canonical_request
+from app.model_interface.token_accounting import TokenCounter, TOKEN_USAGE, budget_from_config
+from app.model_interface.generation_profiles import get_profile
+from app.model_interface.persona import accept_distilled
+from app.prompt_templates import PROMPTS
+from dataclasses import replace
 
 
 # Setup logging
@@ -17,42 +26,96 @@ load_dotenv()
 MODEL_CONFIG_PATH = Path(os.getenv("MODEL_CONFIG_PATH"))
 MODEL_CONFIG = json.loads(MODEL_CONFIG_PATH.read_text())
 
-CHARACTER_DUMP_PATH = Path(os.getenv("CHARACTER_DUMP_PATH"))
-
-DEBATE_CONFIG_PATH = Path(os.getenv("DEBATE_CONFIG_PATH"))
-DEBATE_CONFIG = json.loads(DEBATE_CONFIG_PATH.read_text())
-
 
 class LlamaDebator(DebatorInterface):
-    def __init__(self, model_name: str, api_key: str):
+    def __init__(self, model_name: str, api_key: str, base_url: Optional[str] = None):
         self._model_name = model_name
         self._api_key = api_key
-
-    def debate(self, char_description: str, prompt: List[str]):
-        client = InferenceClient(
+        self._base_url = base_url
+        self._token_counter = TokenCounter(model_name)
+        self._token_budget = budget_from_config(MODEL_CONFIG, model_name)
+
+    def _client(self, timeout: Optional[float] = None) -> InferenceClient:
+        # A base_url (e.g. the local mock provider) replaces the hosted provider
+        if self._base_url:
+            return InferenceClient(base_url=self._base_url, api_key=self._api_key, timeout=timeout)
+        return InferenceClient(
             provider="novita",
             api_key=self._api_key,
+            timeout=timeout,
         )
 
+    def _complete(self, kind: str, messages: List[dict], phase: str, request: List[dict]):
+        """Call the provider; ``request`` is the ``canonical_request`` the recording is keyed on"""
+        profile = get_profile(phase)
+        client = self._client(profile.timeout)
+        model = profile.model or self._model_name
+
+        start = time.perf_counter()
+        completion = client.chat.completions.create(
+            model=model,
+            messages=messages,
+            max_tokens=profile.max_tokens,
+            temperature=profile.temperature,
+            stop=list(profile.stop) if profile.stop else None,
+        )
+        elapsed = time.perf_counter() - start
+
+        if RECORDER:
+            try:
+                response = completion.choices[0].message.content
+            except Exception as e:
+                # Left for the caller's own error handling
+                logger.warning("Not recording a malformed completion: %s", e)
+            else:
+                usage = getattr(completion, "usage", None)
+                RECORDER.record(
+                    backend="llama",
+                    kind=kind,
+                    model=model,
+                    messages=messages,
+                    response=response,
+                    elapsed_s=elapsed,
+                    prompt_tokens=getattr(usage, "prompt_tokens", None),
+                    completion_tokens=getattr(usage, "completion_tokens", None),
+                    request=request,
+                )
+
+        return completion
+
+    @traced(args=("phase",))
+    def debate(self, char_description: str, prompt: List[str], phase: str = "rebuttal"):
         if isinstance(prompt, str):
             prompt = [prompt]
 
-        prompt = "\n".join(prompt)
-
-        completion = client.chat.completions.create(
-            model=self._model_name,
-            messages=[
-                {"role": "user", "content": prompt},
-                {"role": "system", "content": char_description},
-            ],
+        # Drop the oldest turns if the prompt would overflow the context window
+        budget = replace(
+            self._token_budget,
+            max_tokens=get_profile(phase).max_tokens or self._token_budget.max_tokens,
         )
+        turns, prompt_tokens = budget.fit(self._token_counter, char_description, prompt)
+        trimmed_turns = len(prompt) - len(turns)
+
+        completion = self._complete("debate", [
+            {"role": "user", "content": "\n".join(turns)},
+            {"role": "system", "content": char_description},
+        ], phase, canonical_request(char_description, prompt))
 
         try:
-            return completion.choices[0].message.content
+            response = completion.choices[0].message.content
+            completion_tokens = self._token_counter.count(response)
+            TOKEN_USAGE.add("llama", prompt_tokens, completion_tokens, trimmed_turns)
+            logger.info(
+                "Token usage: prompt=%d completion=%d trimmed_turns=%d",
+                prompt_tokens, completion_tokens, trimmed_turns,
+            )
+            return response
         except Exception as e:
             logger.error("Unexpected response format: %s", e)
             return "[Error parsing model output]"
 
+    @staticmethod
+    @traced()
     def format_character_for_prompt(character: dict) -> str:
         """
         Format a character dictionary into a context string for prompting the Llama Model.
@@ -63,44 +126,36 @@ class LlamaDebator(DebatorInterface):
             - personality_description
             - extra_details
 
-        Returns a nicely formatted string.
-
-        TODO: MAKE THIS CONFIGURABLE
+        Returns the ``character_context`` template from debate_config.json,
+        rendered once per character.
         """
-        name = character.get("name", "Unknown Character")
-        debate_style = character.get("debate_style", "neutral")
-        personality = character.get("personality_description", "")
-        extra = character.get("extra_details", "")
-
-        prompt_context = (
-            f"You are {name}.\n"
-            f"Debate style: {debate_style}.\n"
-            f"Personality: {personality}\n"
+        return PROMPTS.current().render(
+            "character_context",
+            name=character.get("name", "Unknown Character"),
+            debate_style=character.get("debate_style", "neutral"),
+            personality_description=character.get("personality_description", ""),
+            extra_details=character.get("extra_details", ""),
         )
 
-        if extra:
-            prompt_context += f"Additional info: {extra}\n"
-
-        prompt_context += DEBATE_CONFIG.get("context_response_prompt")
-
-        return prompt_context
+    def distill_persona(self, persona: str) -> Optional[str]:
+        distillation_prompt = PROMPTS.current().render("persona_distillation_prompt")
+        try:
+            completion = self._complete("persona", [
+                {"role": "user", "content": persona},
+                {"role": "system", "content": distillation_prompt},
+            ], "character_creation", canonical_request(distillation_prompt, persona))
+            return accept_distilled(persona, completion.choices[0].message.content)
+        except Exception as e:
+            logger.warning("Persona distillation failed: %s", e)
+            return None
 
     def create_character_from_description(self, user_input: dict) -> json:
-        character_creation_prompt = DEBATE_CONFIG.get("interpreted_character_creation_prompt")
-        character_creation_prompt = "\n".join(character_creation_prompt)
-
-        client = InferenceClient(
-            provider="novita",
-            api_key=self._api_key,
-        )
+        character_creation_prompt = PROMPTS.current().render("interpreted_character_creation_prompt")
 
-        completion = client.chat.completions.create(
-            model=self._model_name,
-            messages=[
-                {"role": "user", "content": user_input},
-                {"role": "system", "content": character_creation_prompt},
-            ],
-        )
+        completion = self._complete("character", [
+            {"role": "user", "content": user_input},
+            {"role": "system", "content": character_creation_prompt},
+        ], "character_creation", canonical_request(character_creation_prompt, user_input))
 
         try:
             response_str = completion.choices[0].message.content
@@ -116,10 +171,13 @@ class LlamaDebator(DebatorInterface):
             hash_input = json.dumps(character_data, sort_keys=True).encode()
             hashed_id = hashlib.sha256(hash_input).hexdigest()[:12]
 
-            # Save the character data to a file
-            output_path = CHARACTER_DUMP_PATH / f"{hashed_id}.json"
-            with output_path.open("w") as f:
-                json.dump(character_data, f, indent=2)
+            # A compact persona for rebuttal rounds, distilled once here rather than per debate
+            compact_prompt = self.distill_persona(self.format_character_for_prompt(character_data))
+            if compact_prompt:
+                character_data["compact_prompt"] = compact_prompt
+
+            # Save the character data to the character store
+            CHARACTER_STORE.put(hashed_id, character_data)
 
             return character_data
         except json.JSONDecodeError as e:
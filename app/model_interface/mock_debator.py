@@ -0,0 +1,265 @@
+from app.model_interface.debator_interface import DebatorInterface
+from app.character_store import CHARACTER_STORE
+from app.utils.logging import setup_logging
+from app.profiling import traced
+from app.model_interface.generation_profiles import get_profile
+from app.model_interface.persona import accept_distilled
+from app.prompt_templates import PROMPTS
+
+import os
+import re
+import json
+import math
+import time
+import random
+import hashlib
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Union
+
+
+# Setup logging
+logger = setup_logging(__name__)
+
+# Phrases that identify a character creation request in the system prompt
+CHARACTER_CREATION_MARKERS = (
+    "character creation assistant",
+    "debate character prompt generator",
+)
+# Phrase that identifies a persona distillation request
+PERSONA_DISTILLATION_MARKER = "compress debate character prompts"
+# Phrase that identifies a judge request (batch_judge_prompt), and the header of each packed debate
+JUDGE_MARKER = "impartial debate judge"
+JUDGE_DEBATE_HEADER = re.compile(r"^### DEBATE (\d+)\s*$", re.MULTILINE)
+
+VOCABULARY = (
+    "argument evidence clearly people history progress risk future society "
+    "freedom responsibility science data opponent claim reason simply point "
+    "consider because therefore however indeed example policy balance cost "
+    "benefit trust innovation safety community principle logic experience"
+).split()
+
+
+class MockProviderError(RuntimeError):
+    """Raised when the mock engine simulates a provider failure"""
+
+
+@dataclass
+class MockCompletion:
+    text: str
+    prompt_tokens: int
+    completion_tokens: int
+    latency_s: float
+
+
+class MockCompletionEngine:
+    """Deterministic stand-in for an LLM provider.
+
+    The completion text is a pure function of the seed and the request
+    messages, so repeated runs produce identical transcripts. Latency is drawn
+    from a log-normal time-to-first-token distribution plus a decode time of
+    ``completion_tokens / tokens_per_second``, and requests fail with
+    probability ``error_rate``. A non-zero ``prefill_tokens_per_second`` adds
+    ``prompt_tokens / prefill_tokens_per_second``, so prompt size shows in latency.
+    """
+
+    def __init__(
+        self,
+        seed: int = 0,
+        latency_ms: float = 300.0,
+        latency_sigma: float = 0.4,
+        tokens_per_second: float = 50.0,
+        error_rate: float = 0.0,
+        mean_completion_tokens: int = 60,
+        prefill_tokens_per_second: float = 0.0,
+    ):
+        self.seed = seed
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self.mean_completion_tokens = mean_completion_tokens
+        self.prefill_tokens_per_second = prefill_tokens_per_second
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "MockCompletionEngine":
+        return cls(
+            seed=int(os.getenv("MOCK_SEED", "0")),
+            latency_ms=float(os.getenv("MOCK_LATENCY_MS", "300")),
+            latency_sigma=float(os.getenv("MOCK_LATENCY_SIGMA", "0.4")),
+            tokens_per_second=float(os.getenv("MOCK_TOKENS_PER_SECOND", "50")),
+            error_rate=float(os.getenv("MOCK_ERROR_RATE", "0")),
+            mean_completion_tokens=int(os.getenv("MOCK_COMPLETION_TOKENS", "60")),
+            prefill_tokens_per_second=float(os.getenv("MOCK_PREFILL_TOKENS_PER_SECOND", "0")),
+        )
+
+    def generate(self, messages: List[Dict[str, str]], max_tokens: Optional[int] = None) -> MockCompletion:
+        """Produce a completion without sleeping; callers apply ``latency_s``"""
+        with self._lock:
+            failed = self._rng.random() < self.error_rate
+            ttft_s = self.latency_ms / 1000 * math.exp(self._rng.gauss(0, self.latency_sigma))
+
+        if failed:
+            raise MockProviderError("Simulated provider error")
+
+        request_key = json.dumps([self.seed, messages], sort_keys=True).encode()
+        rng = random.Random(hashlib.sha256(request_key).hexdigest())
+
+        prompt_tokens = sum(len(m.get("content", "").split()) for m in messages)
+        if self.is_character_creation(messages):
+            text = self._character_json(rng, messages)
+        elif self.is_persona_distillation(messages):
+            text = self._compact_persona(rng, messages)
+        elif self.is_judge(messages):
+            text = self._verdicts(rng, messages)
+        else:
+            text = self._debate_text(rng, max_tokens)
+
+        completion_tokens = len(text.split())
+        latency_s = ttft_s + completion_tokens / self.tokens_per_second
+        if self.prefill_tokens_per_second:
+            latency_s += prompt_tokens / self.prefill_tokens_per_second
+        return MockCompletion(text, prompt_tokens, completion_tokens, latency_s)
+
+    def complete(
+        self,
+        messages: List[Dict[str, str]],
+        max_tokens: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ) -> MockCompletion:
+        """Produce a completion and block for its simulated latency, up to ``timeout``"""
+        completion = self.generate(messages, max_tokens=max_tokens)
+        if timeout is not None and completion.latency_s > timeout:
+            time.sleep(timeout)
+            raise MockProviderError("Simulated provider timeout")
+        time.sleep(completion.latency_s)
+        return completion
+
+    @staticmethod
+    def is_character_creation(messages: List[Dict[str, str]]) -> bool:
+        for message in messages:
+            if message.get("role") != "system":
+                continue
+            content = message.get("content", "").lower()
+            if any(marker in content for marker in CHARACTER_CREATION_MARKERS):
+                return True
+        return False
+
+    @staticmethod
+    def is_persona_distillation(messages: List[Dict[str, str]]) -> bool:
+        return any(
+            PERSONA_DISTILLATION_MARKER in message.get("content", "").lower()
+            for message in messages
+            if message.get("role") == "system"
+        )
+
+    @staticmethod
+    def is_judge(messages: List[Dict[str, str]]) -> bool:
+        return any(
+            JUDGE_MARKER in message.get("content", "").lower()
+            for message in messages
+            if message.get("role") == "system"
+        )
+
+    def _verdicts(self, rng: random.Random, messages: List[Dict[str, str]]) -> str:
+        """A JSON array with one verdict per ``### DEBATE <id>`` block, as batch_judge_prompt asks for"""
+        debates = "\n".join(m.get("content", "") for m in messages if m.get("role") == "user")
+        verdicts = []
+        for debate_id in JUDGE_DEBATE_HEADER.findall(debates):
+            score_a, score_b = rng.randint(1, 10), rng.randint(1, 10)
+            winner = "A" if score_a > score_b else "B" if score_b > score_a else "DRAW"
+            verdicts.append({"id": int(debate_id), "winner": winner, "score_a": score_a, "score_b": score_b})
+        return json.dumps(verdicts)
+
+    def _compact_persona(self, rng: random.Random, messages: List[Dict[str, str]]) -> str:
+        persona = next((m.get("content", "") for m in messages if m.get("role") == "user"), "")
+        first_sentence = persona.strip().split(".")[0][:80] or "You are a mock character"
+        return first_sentence + ". " + " ".join(rng.choice(VOCABULARY) for _ in range(20)) + "."
+
+    def _debate_text(self, rng: random.Random, max_tokens: Optional[int]) -> str:
+        length = max(5, int(rng.gauss(self.mean_completion_tokens, self.mean_completion_tokens / 4)))
+        if max_tokens:
+            length = min(length, max_tokens)
+        words = [rng.choice(VOCABULARY) for _ in range(length)]
+        return "Mock speaker: " + " ".join(words) + "."
+
+    def _character_json(self, rng: random.Random, messages: List[Dict[str, str]]) -> str:
+        user_input = next(
+            (m.get("content", "") for m in messages if m.get("role") == "user"), ""
+        )
+        name = user_input.strip()[:40] or "Mock Character"
+        return json.dumps({
+            "name": name,
+            "debate_style": " ".join(rng.choice(VOCABULARY) for _ in range(4)),
+            "personality_description": f"You are {name}. " + " ".join(rng.choice(VOCABULARY) for _ in range(20)),
+            "extra_details": " ".join(rng.choice(VOCABULARY) for _ in range(100)),
+        })
+
+
+class MockDebator(DebatorInterface):
+    """In-process debator backed by MockCompletionEngine, for benchmarks and offline runs"""
+
+    def __init__(self, engine: Optional[MockCompletionEngine] = None):
+        self.engine = engine or MockCompletionEngine.from_env()
+
+    @traced(args=("phase",))
+    def debate(self, char_description: str, prompt: Union[str, List[str]], phase: str = "rebuttal") -> str:
+        if isinstance(prompt, str):
+            prompt = [prompt]
+
+        profile = get_profile(phase)
+        completion = self.engine.complete([
+            {"role": "user", "content": "\n".join(prompt)},
+            {"role": "system", "content": char_description},
+        ], max_tokens=profile.max_tokens, timeout=profile.timeout)
+        return completion.text
+
+    @staticmethod
+    @traced()
+    def format_character_for_prompt(character: dict) -> str:
+        if isinstance(character, str):
+            return character
+        if "system_prompt" in character:
+            return character["system_prompt"]
+
+        return PROMPTS.current().render(
+            "character_context",
+            name=character.get("name", "Unknown Character"),
+            debate_style=character.get("debate_style", "neutral"),
+            personality_description=character.get("personality_description", ""),
+            extra_details=character.get("extra_details", ""),
+        )
+
+    def distill_persona(self, persona: str) -> Optional[str]:
+        try:
+            completion = self.engine.complete([
+                {"role": "user", "content": persona},
+                {"role": "system", "content": PERSONA_DISTILLATION_MARKER},
+            ])
+            return accept_distilled(persona, completion.text)
+        except MockProviderError as e:
+            logger.warning("Persona distillation failed: %s", e)
+            return None
+
+    def create_character_from_description(self, user_input: str) -> dict:
+        try:
+            completion = self.engine.complete([
+                {"role": "user", "content": user_input},
+                {"role": "system", "content": CHARACTER_CREATION_MARKERS[0]},
+            ])
+            character_data = json.loads(completion.text)
+
+            hash_input = json.dumps(character_data, sort_keys=True).encode()
+            hashed_id = hashlib.sha256(hash_input).hexdigest()[:12]
+
+            compact_prompt = self.distill_persona(self.format_character_for_prompt(character_data))
+            if compact_prompt:
+                character_data["compact_prompt"] = compact_prompt
+            CHARACTER_STORE.put(hashed_id, character_data)
+
+            return character_data
+        except MockProviderError as e:
+            logger.error("Mock provider error: %s", e)
+            return {"error": "An unexpected error occurred while creating the character"}
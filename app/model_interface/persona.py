@@ -0,0 +1,26 @@
+from typing import Optional
+from app.model_interface.token_accounting import estimate_tokens
+from app.utils.logging import setup_logging
+
+
+# Setup logging
+logger = setup_logging(__name__)
+
+# A distilled persona must come in under this fraction of the full prompt to be worth storing
+MAX_COMPACT_RATIO = 0.6
+
+
+def accept_distilled(persona: str, distilled: Optional[str]) -> Optional[str]:
+    """The distilled persona, or None if it is empty, an error, or barely shorter than the original"""
+    if not isinstance(distilled, str):
+        return None
+    distilled = distilled.strip().strip("`").strip()
+    if not distilled or distilled.startswith("[Error"):
+        return None
+
+    full_tokens, compact_tokens = estimate_tokens(persona), estimate_tokens(distilled)
+    if compact_tokens > full_tokens * MAX_COMPACT_RATIO:
+        logger.info("Discarding distilled persona: %d tokens vs %d for the full prompt",
+                    compact_tokens, full_tokens)
+        return None
+    return distilled
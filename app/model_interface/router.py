@@ -0,0 +1,233 @@
+from app.model_interface.debator_interface import DebatorInterface
+from app.model_interface.generation_profiles import get_profile, has_deadline_timeout
+from app.cancellation import DebateControl, current_control
+from app.utils.logging import setup_logging
+from app.profiling import traced
+
+import math
+import time
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+
+# Setup logging
+logger = setup_logging(__name__)
+
+
+@dataclass
+class FailoverPolicy:
+    """When a route is considered unhealthy and how long it stays demoted"""
+
+    p95_ms: float = 10000
+    max_error_rate: float = 0.25
+    window: int = 50
+    min_samples: int = 5
+    cooldown_s: float = 30
+
+    @classmethod
+    def from_config(cls, config: dict) -> "FailoverPolicy":
+        return cls(**{k: v for k, v in config.items() if k in cls.__dataclass_fields__})
+
+
+class RouteStats:
+    """Rolling latency and error statistics for one route.
+
+    A route that breaches its policy is demoted for ``cooldown_s``; after
+    that its window is cleared so the next call probes it again.
+    """
+
+    def __init__(self, policy: FailoverPolicy):
+        self.policy = policy
+        self._samples = deque(maxlen=policy.window)
+        self._demoted_until = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, latency_s: float, ok: bool) -> None:
+        with self._lock:
+            self._samples.append((latency_s, ok))
+            if self._breached() and not self._demoted_until:
+                self._demoted_until = time.monotonic() + self.policy.cooldown_s
+
+    def _p95_ms(self) -> Optional[float]:
+        latencies = sorted(latency for latency, ok in self._samples if ok)
+        if not latencies:
+            return None
+        return latencies[math.ceil(0.95 * len(latencies)) - 1] * 1000
+
+    def _error_rate(self) -> float:
+        if not self._samples:
+            return 0.0
+        return sum(1 for _, ok in self._samples if not ok) / len(self._samples)
+
+    def _breached(self) -> bool:
+        if len(self._samples) < self.policy.min_samples:
+            return False
+        p95 = self._p95_ms()
+        return self._error_rate() > self.policy.max_error_rate or (
+            p95 is not None and p95 > self.policy.p95_ms
+        )
+
+    def healthy(self) -> bool:
+        with self._lock:
+            if not self._demoted_until:
+                return True
+            if time.monotonic() < self._demoted_until:
+                return False
+            # Cooldown over: forget the bad window and let traffic probe the route
+            self._samples.clear()
+            self._demoted_until = 0.0
+            return True
+
+    def report(self) -> dict:
+        healthy = self.healthy()
+        with self._lock:
+            p95 = self._p95_ms()
+            return {
+                "healthy": healthy,
+                "samples": len(self._samples),
+                "p95_ms": round(p95, 1) if p95 is not None else None,
+                "error_rate": round(self._error_rate(), 3),
+            }
+
+
+# Shared by every router in the process, so all orchestrators see the same provider health
+ROUTE_STATS: Dict[str, RouteStats] = {}
+_ROUTE_STATS_LOCK = threading.Lock()
+
+
+def route_stats(name: str, policy: FailoverPolicy) -> RouteStats:
+    with _ROUTE_STATS_LOCK:
+        if name not in ROUTE_STATS:
+            ROUTE_STATS[name] = RouteStats(policy)
+        return ROUTE_STATS[name]
+
+
+def routing_report() -> Dict[str, dict]:
+    return {name: stats.report() for name, stats in ROUTE_STATS.items()}
+
+
+class RouterDebator(DebatorInterface):
+    """Dispatches each call to a backend/model chosen by phase and live health.
+
+    Every phase has an ordered list of routes. Healthy routes are tried in
+    that order and demoted ones only after them, so a provider whose p95 or
+    error rate spikes is skipped until its cooldown ends. A call that raises
+    or returns an ``[Error ...]`` response cascades to the next route, unless
+    its debate was cancelled or ran out of time: that failure is not recorded
+    against the route, and no further route is tried.
+    """
+
+    def __init__(
+        self,
+        routes: Dict[str, DebatorInterface],
+        phases: Dict[str, List[str]],
+        default: List[str],
+        policy: FailoverPolicy = None,
+    ):
+        unknown = {name for names in [default, *phases.values()] for name in names} - set(routes)
+        if unknown:
+            raise ValueError(f"Routing references unknown routes: {sorted(unknown)}")
+        if not default:
+            raise ValueError("Routing needs a non-empty default route list")
+
+        self._routes = routes
+        self._phases = phases
+        self._default = default
+        self._policy = policy or FailoverPolicy()
+        self._stats = {name: route_stats(name, self._policy) for name in routes}
+
+    @classmethod
+    def from_config(
+        cls, routing_config: dict, build: Callable[[str, Optional[str]], DebatorInterface]
+    ) -> "RouterDebator":
+        """Build a router from the ``routing`` section of model_config.json
+
+        Args:
+            routing_config: ``routes``, ``phases``, ``default`` and ``failover`` settings
+            build: Creates the debator for a ``(backend, model)`` pair
+        """
+        routes = {
+            name: build(route["backend"], route.get("model"))
+            for name, route in routing_config.get("routes", {}).items()
+        }
+        return cls(
+            routes=routes,
+            phases=routing_config.get("phases", {}),
+            default=routing_config.get("default") or list(routes)[:1],
+            policy=FailoverPolicy.from_config(routing_config.get("failover", {})),
+        )
+
+    def _candidates(self, phase: str) -> List[str]:
+        names = self._phases.get(phase) or self._default
+        healthy = [name for name in names if self._stats[name].healthy()]
+        return healthy + [name for name in names if name not in healthy]
+
+    def route_for(self, phase: str) -> DebatorInterface:
+        """The route a call in ``phase`` goes to first right now"""
+        return self._routes[self._candidates(phase)[0]]
+
+    @staticmethod
+    def _cut_short(timeout: Optional[float], elapsed: float, control: Optional[DebateControl]) -> bool:
+        """Whether a failed call was ended by its debate rather than by the route"""
+        if control is not None and control.stop_reason():
+            return True
+        return timeout is not None and elapsed >= timeout
+
+    def _dispatch(self, phase: str, call: Callable[[DebatorInterface], object], failed: Callable[[object], bool]):
+        control = current_control()
+        last_error, last_result = None, None
+        for name in self._candidates(phase):
+            # The deadline-capped timeout this route gets: what is left of the deadline now,
+            # so a failover cannot overshoot it (see generation_limits)
+            profile = get_profile(phase)
+            deadline_timeout = profile.timeout if has_deadline_timeout(phase, profile) else None
+
+            start = time.perf_counter()
+            try:
+                result = call(self._routes[name])
+            except Exception as e:
+                elapsed = time.perf_counter() - start
+                # A debate that ran out of time or was cancelled says nothing about the route's
+                # health, and leaves no time for another route
+                if self._cut_short(deadline_timeout, elapsed, control):
+                    raise
+                self._stats[name].record(elapsed, ok=False)
+                logger.warning("Route %s failed for %s: %s", name, phase, e)
+                last_error = e
+                continue
+
+            elapsed = time.perf_counter() - start
+            ok = not failed(result)
+            if not ok and self._cut_short(deadline_timeout, elapsed, control):
+                return result
+            self._stats[name].record(elapsed, ok=ok)
+            if ok:
+                return result
+            logger.warning("Route %s returned an error for %s, cascading", name, phase)
+            last_result = result
+
+        if last_result is not None:
+            return last_result
+        raise last_error
+
+    @traced(args=("phase",))
+    def debate(self, char_description: str, prompt: List[str], phase: str = "rebuttal") -> str:
+        return self._dispatch(
+            phase,
+            lambda route: route.debate(char_description, prompt, phase=phase),
+            lambda response: not isinstance(response, str) or response.startswith("[Error"),
+        )
+
+    @traced()
+    def format_character_for_prompt(self, character: dict) -> str:
+        # Contexts must be built the same way whichever route ends up serving them
+        return self._routes[self._default[0]].format_character_for_prompt(character)
+
+    def create_character_from_description(self, user_input: str) -> dict:
+        return self._dispatch(
+            "character_creation",
+            lambda route: route.create_character_from_description(user_input),
+            lambda character: not isinstance(character, dict) or "error" in character,
+        )
@@ -0,0 +1,163 @@
+from app.utils.logging import setup_logging
+
+import re
+import math
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+
+# Setup logging
+logger = setup_logging(__name__)
+
+# Chat formats add a few tokens per message for role markers
+MESSAGE_OVERHEAD_TOKENS = 4
+DEFAULT_CONTEXT_WINDOW = 8192
+
+WORD_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+
+def estimate_tokens(text: str) -> int:
+    """Fast tokenizer-free estimate: roughly one token per 4 characters of a word"""
+    return sum(max(1, math.ceil(len(piece) / 4)) for piece in WORD_PATTERN.findall(text))
+
+
+def _load_tokenizer(model_name: Optional[str]):
+    """Load a tokenizer from local files only; return None to fall back to the estimator"""
+    if not model_name:
+        return None
+
+    try:
+        from transformers import AutoTokenizer
+
+        tokenizer = AutoTokenizer.from_pretrained(model_name, local_files_only=True)
+        logger.info("Loaded local tokenizer for %s", model_name)
+        return lambda text: len(tokenizer.encode(text, add_special_tokens=False))
+    except Exception:
+        pass
+
+    try:
+        import tiktoken
+
+        encoding = tiktoken.encoding_for_model(model_name)
+        logger.info("Loaded tiktoken encoding for %s", model_name)
+        return lambda text: len(encoding.encode(text))
+    except Exception:
+        pass
+
+    logger.info("No local tokenizer for %s, using token estimator", model_name)
+    return None
+
+
+class TokenCounter:
+    """Counts tokens per text chunk, memoizing each chunk's count.
+
+    Character contexts and history turns never change once produced, so a
+    turn's prompt is counted as the sum of cached chunk counts and only the
+    newest turn is actually tokenized.
+    """
+
+    def __init__(self, model_name: Optional[str] = None, cache_size: int = 8192):
+        self.model_name = model_name
+        self._tokenize = _load_tokenizer(model_name) or estimate_tokens
+        self._cache: "OrderedDict[str, int]" = OrderedDict()
+        self._cache_size = cache_size
+        self._lock = threading.Lock()
+
+    def count(self, text: str) -> int:
+        with self._lock:
+            cached = self._cache.get(text)
+            if cached is not None:
+                self._cache.move_to_end(text)
+                return cached
+
+        tokens = self._tokenize(text)
+
+        with self._lock:
+            self._cache[text] = tokens
+            if len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return tokens
+
+    def count_prompt(self, system: str, turns: List[str]) -> int:
+        """Tokens for a system prompt plus conversation turns, including message overhead"""
+        total = self.count(system) + MESSAGE_OVERHEAD_TOKENS
+        for turn in turns:
+            total += self.count(turn) + MESSAGE_OVERHEAD_TOKENS
+        return total
+
+
+@dataclass
+class TokenBudget:
+    """Context window budget for one completion request"""
+
+    context_window: int = DEFAULT_CONTEXT_WINDOW
+    max_tokens: int = 500
+
+    @property
+    def prompt_limit(self) -> int:
+        return self.context_window - self.max_tokens
+
+    def fit(self, counter: TokenCounter, system: str, turns: List[str]) -> Tuple[List[str], int]:
+        """Drop the oldest turns until the prompt fits, always keeping the newest turn
+
+        Returns:
+            The turns that fit and their prompt token count
+        """
+        prompt_tokens = counter.count_prompt(system, turns)
+        start = 0
+        while prompt_tokens > self.prompt_limit and start < len(turns) - 1:
+            prompt_tokens -= counter.count(turns[start]) + MESSAGE_OVERHEAD_TOKENS
+            start += 1
+
+        if start:
+            logger.info("Trimmed %d oldest turns to fit %d prompt tokens", start, self.prompt_limit)
+        if prompt_tokens > self.prompt_limit:
+            logger.warning(
+                "Prompt of %d tokens exceeds budget of %d tokens", prompt_tokens, self.prompt_limit
+            )
+        return turns[start:], prompt_tokens
+
+
+@dataclass
+class UsageTotals:
+    calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    trimmed_turns: int = 0
+
+
+@dataclass
+class UsageTracker:
+    """Process-wide token totals per backend"""
+
+    totals: Dict[str, UsageTotals] = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def add(self, backend: str, prompt_tokens: int, completion_tokens: int, trimmed_turns: int = 0):
+        with self._lock:
+            totals = self.totals.setdefault(backend, UsageTotals())
+            totals.calls += 1
+            totals.prompt_tokens += prompt_tokens
+            totals.completion_tokens += completion_tokens
+            totals.trimmed_turns += trimmed_turns
+
+    def report(self) -> Dict[str, dict]:
+        with self._lock:
+            return {backend: vars(totals).copy() for backend, totals in self.totals.items()}
+
+
+TOKEN_USAGE = UsageTracker()
+
+
+def budget_from_config(model_config: dict, model_name: Optional[str]) -> TokenBudget:
+    """Build a TokenBudget from model_config.json, preferring model-specific values"""
+    agent_configs = model_config.get("agent_configs", {})
+    model_entry = model_config.get(model_name or "", {})
+    return TokenBudget(
+        context_window=model_entry.get(
+            "context_window", agent_configs.get("context_window", DEFAULT_CONTEXT_WINDOW)
+        ),
+        max_tokens=model_entry.get("max_tokens", agent_configs.get("max_tokens", 500)),
+    )
@@ -0,0 +1,120 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+from dotenv import load_dotenv
+from app.characters import get_character_description, rebuttal_context
+from app.model_interface.factory import create_debator
+from app.semantic_cache import cached_opening
+from app.prompt_templates import PROMPTS
+from app.utils.logging import setup_logging
+from app.transcript_export import export_debate, model_labels
+
+
+load_dotenv()
+DEBATOR = create_debator()
+
+MIN_PARTICIPANTS = 2
+MAX_PARTICIPANTS = 8
+
+# Setup logging
+logger = setup_logging(__name__)
+
+
+def start_panel_debate(
+    prompt: str, characters: List[str], debate_rounds_count: int = None, max_concurrency: Optional[int] = None
+) -> List[Dict]:
+    """
+    Run a debate between 2-8 characters.
+
+    Every statement in a round depends only on the transcript of earlier
+    rounds, so all participants of a round are generated concurrently and a
+    round costs roughly one LLM call of latency rather than one per speaker.
+
+    Args:
+        prompt: The debate topic
+        characters: Names/IDs of the participants, in speaking order
+        debate_rounds_count: Total rounds including opening and closing statements
+        max_concurrency: Maximum number of LLM calls in flight (default: one per participant)
+
+    Returns:
+        The transcript as a list of ``{"speaker", "round", "phase", "text"}`` turns
+    """
+    if not MIN_PARTICIPANTS <= len(characters) <= MAX_PARTICIPANTS:
+        raise ValueError(
+            f"Panel debates need {MIN_PARTICIPANTS}-{MAX_PARTICIPANTS} participants, got {len(characters)}"
+        )
+    if len(set(characters)) != len(characters):
+        raise ValueError("Panel participants must be unique")
+
+    prompts = PROMPTS.current()
+    if not debate_rounds_count:
+        debate_rounds_count = prompts.get("debate_rounds_count", 5)
+
+    descriptions = {name: get_character_description(name) for name in characters}
+    contexts = {
+        name: DEBATOR.format_character_for_prompt(description)
+        for name, description in descriptions.items()
+    }
+    rebuttal_contexts = {
+        name: rebuttal_context(descriptions[name], contexts[name], prompts) for name in characters
+    }
+
+    logger.info(f"Starting panel debate with {len(characters)} participants: {prompt}")
+
+    transcript: List[Dict] = []
+    with ThreadPoolExecutor(max_workers=max_concurrency or len(characters)) as pool:
+        opening_prompt = prompts.render("opening_statement_prompt", topic=prompt)
+        transcript += _run_round(
+            pool, characters, 0, "opening",
+            lambda name: cached_opening(
+                contexts[name], prompt,
+                lambda: DEBATOR.debate(contexts[name], opening_prompt, phase="opening"),
+                version=prompts.template_version("opening_statement_prompt"),
+            )[0],
+        )
+
+        rebuttal_prompt = prompts.render("rebutal_prompt")
+        for round_num in range(1, debate_rounds_count - 1):
+            shared = list(transcript)
+            transcript += _run_round(
+                pool, characters, round_num, "rebuttal",
+                lambda name: DEBATOR.debate(
+                    rebuttal_contexts[name], _participant_view(shared, name) + [rebuttal_prompt],
+                    phase="rebuttal",
+                ),
+            )
+
+        closing_prompt = prompts.render("closing_statement_prompt")
+        shared = list(transcript)
+        transcript += _run_round(
+            pool, characters, max(1, debate_rounds_count - 1), "closing",
+            lambda name: DEBATOR.debate(
+                contexts[name], _participant_view(shared, name) + [closing_prompt],
+                phase="closing",
+            ),
+        )
+
+    export_debate("panel", prompt, transcript, model_labels(DEBATOR))
+    logger.info("Panel debate completed successfully")
+    return transcript
+
+
+def _run_round(
+    pool: ThreadPoolExecutor,
+    characters: List[str],
+    round_num: int,
+    phase: str,
+    speak: Callable[[str], str],
+) -> List[Dict]:
+    responses = list(pool.map(speak, characters))
+    return [
+        {"speaker": name, "round": round_num, "phase": phase, "text": text}
+        for name, text in zip(characters, responses)
+    ]
+
+
+def _participant_view(transcript: List[Dict], name: str) -> List[str]:
+    """Render the shared transcript from one participant's point of view"""
+    return [
+        f"{'You' if turn['speaker'] == name else turn['speaker']}: {turn['text']}"
+        for turn in transcript
+    ]
@@ -0,0 +1,186 @@
+import os
+import sys
+import hmac
+import json
+import time
+import inspect
+import functools
+import threading
+from pathlib import Path
+from collections import Counter, deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Optional
+from dotenv import load_dotenv
+from app.utils.logging import setup_logging
+
+
+load_dotenv()
+
+# Setup logging
+logger = setup_logging(__name__)
+
+# The profiling endpoints only exist when a token is configured
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+ADMIN_TOKEN_HEADER = "X-Admin-Token"
+PROFILE_HEADER = "X-Profile"
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", "profiles"))
+TRACE_ENABLED = os.getenv("TRACE_ENABLED", "false").lower() in ("1", "true", "yes")
+# Oldest spans are dropped beyond this many
+TRACE_BUFFER_SIZE = int(os.getenv("TRACE_BUFFER_SIZE", "100000"))
+DEFAULT_SAMPLE_INTERVAL_S = 0.005
+
+
+def is_admin(token: Optional[str]) -> bool:
+    return bool(ADMIN_TOKEN) and token is not None and hmac.compare_digest(token, ADMIN_TOKEN)
+
+
+def output_path(prefix: str, suffix: str) -> Path:
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    return PROFILE_DIR / f"{prefix}-{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}{suffix}"
+
+
+class Tracer:
+    """Records spans as Chrome trace events (viewable in Perfetto or chrome://tracing).
+
+    Spans cost one attribute check while tracing is off, so the hot paths
+    stay instrumented permanently and tracing is switched on when needed.
+    """
+
+    def __init__(self, enabled: bool = False, buffer_size: int = TRACE_BUFFER_SIZE):
+        self.enabled = enabled
+        self._events = deque(maxlen=buffer_size)
+        self._thread_names: Dict[int, str] = {}
+        self._pid = os.getpid()
+
+    @contextmanager
+    def span(self, name: str, **args):
+        if not self.enabled:
+            yield
+            return
+
+        tid = threading.get_ident()
+        if tid not in self._thread_names:
+            self._thread_names[tid] = threading.current_thread().name
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self._events.append({
+                "name": name,
+                "ph": "X",
+                "ts": start // 1000,
+                "dur": (time.perf_counter_ns() - start) // 1000,
+                "pid": self._pid,
+                "tid": tid,
+                "args": args,
+            })
+
+    def __len__(self):
+        return len(self._events)
+
+    def export(self, path: Path, clear: bool = False) -> int:
+        """Write the recorded spans to ``path`` in Chrome trace event format"""
+        events = list(self._events)
+        metadata = [
+            {"name": "thread_name", "ph": "M", "pid": self._pid, "tid": tid, "args": {"name": name}}
+            for tid, name in list(self._thread_names.items())
+        ]
+        path.write_text(json.dumps({"traceEvents": metadata + events, "displayTimeUnit": "ms"}))
+        if clear:
+            self._events.clear()
+        logger.info(f"Exported {len(events)} trace events to {path}")
+        return len(events)
+
+
+TRACER = Tracer(enabled=TRACE_ENABLED)
+
+
+def traced(name: str = None, args: Iterable[str] = ()):
+    """Record each call of the decorated function as a span
+
+    Args:
+        name: Span name, defaults to the function's qualified name
+        args: Parameters whose values are attached to the span
+    """
+    args = tuple(args)
+
+    def decorator(fn: Callable) -> Callable:
+        span_name = name or fn.__qualname__
+        signature = inspect.signature(fn) if args else None
+
+        @functools.wraps(fn)
+        def wrapper(*call_args, **call_kwargs):
+            if not TRACER.enabled:
+                return fn(*call_args, **call_kwargs)
+            span_args = {}
+            if signature:
+                bound = signature.bind(*call_args, **call_kwargs)
+                bound.apply_defaults()
+                span_args = {arg: str(bound.arguments.get(arg)) for arg in args}
+            with TRACER.span(span_name, **span_args):
+                return fn(*call_args, **call_kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Samples the stacks of every thread from a background thread.
+
+    ``collapsed`` returns the samples in the collapsed-stack format read by
+    flamegraph.pl and speedscope: one ``thread;outer;...;inner count`` line
+    per distinct stack.
+    """
+
+    def __init__(self, interval_s: float = DEFAULT_SAMPLE_INTERVAL_S):
+        self.interval_s = interval_s
+        self.samples = 0
+        self._stacks = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _sample(self):
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        own = threading.get_ident()
+        for tid, frame in sys._current_frames().items():
+            if tid == own:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            stack.append(names.get(tid, str(tid)))
+            self._stacks[";".join(reversed(stack))] += 1
+        self.samples += 1
+
+    def _run(self):
+        while not self._stop.wait(self.interval_s):
+            self._sample()
+
+    def start(self) -> "SamplingProfiler":
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> "SamplingProfiler":
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        return self
+
+    def collapsed(self) -> str:
+        return "\n".join(f"{stack} {count}" for stack, count in self._stacks.most_common())
+
+
+def profile_window(seconds: float, interval_s: float = DEFAULT_SAMPLE_INTERVAL_S) -> SamplingProfiler:
+    """Sample the whole process for ``seconds``; blocks the calling thread"""
+    profiler = SamplingProfiler(interval_s).start()
+    time.sleep(seconds)
+    return profiler.stop()
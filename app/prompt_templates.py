@@ -0,0 +1,177 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from pathlib import Path
+from string import Template
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple, Union
+from dotenv import load_dotenv
+from app.utils.logging import setup_logging
+from app.profiling import TRACER
+
+
+load_dotenv()
+
+# Setup logging
+logger = setup_logging(__name__)
+
+DEBATE_CONFIG_PATH = Path(os.getenv("DEBATE_CONFIG_PATH"))
+# How often the config file is checked for changes; 0 disables hot reload
+PROMPT_RELOAD_INTERVAL_S = float(os.getenv("PROMPT_RELOAD_INTERVAL_S", "2"))
+
+# A template line starting with this marker is dropped when all its placeholders are empty
+OPTIONAL_LINE_MARKER = "?"
+
+
+def _version(source) -> str:
+    return hashlib.sha256(json.dumps(source, sort_keys=True).encode()).hexdigest()[:12]
+
+
+def _check_dollars(name: str, line: str, template: Template):
+    """Reject a ``$`` that starts no placeholder, which would only fail once the prompt is rendered"""
+    for match in template.pattern.finditer(template.template):
+        if match.group("invalid") is not None:
+            raise ValueError(
+                f"Prompt {name!r} has a '$' that is not a placeholder at column {match.start('invalid') + 1} "
+                f"of {line!r}; write '$$' for a literal dollar sign"
+            )
+
+
+def _identifiers(template: Template) -> List[str]:
+    return [
+        match.group("named") or match.group("braced")
+        for match in template.pattern.finditer(template.template)
+        if match.group("named") or match.group("braced")
+    ]
+
+
+class PromptTemplate:
+    """A prompt from debate_config.json, compiled once.
+
+    The source is a string or a list of lines joined with newlines. Lines use
+    ``$name`` placeholders (literal braces, as in JSON examples, need no
+    escaping; a literal ``$`` is written ``$$``). Lines prefixed with ``?`` are left out when every placeholder
+    in them renders empty.
+    """
+
+    def __init__(self, name: str, source: Union[str, List[str]]):
+        self.name = name
+        self.version = _version(source)
+        lines = source if isinstance(source, list) else [source]
+
+        self._lines: List[Tuple[bool, Template, List[str]]] = []
+        for line in lines:
+            optional = line.startswith(OPTIONAL_LINE_MARKER)
+            template = Template(line[len(OPTIONAL_LINE_MARKER):] if optional else line)
+            _check_dollars(name, line, template)
+            self._lines.append((optional, template, _identifiers(template)))
+
+        self.placeholders = frozenset(p for _, _, names in self._lines for p in names)
+
+    def render(self, values: Dict[str, str]) -> str:
+        rendered = []
+        for optional, template, names in self._lines:
+            if optional and not any(values.get(name) for name in names):
+                continue
+            rendered.append(template.substitute(values))
+        return "\n".join(rendered)
+
+
+class PromptSet:
+    """Immutable snapshot of debate_config.json: compiled prompts plus plain settings.
+
+    Debates take one snapshot when they start and use it throughout, so a
+    reload never mixes prompt versions within a debate.
+    """
+
+    def __init__(self, config: dict):
+        self.config = config
+        self.version = _version(config)
+        self.templates = {
+            name: PromptTemplate(name, value)
+            for name, value in config.items()
+            if isinstance(value, str) or (isinstance(value, list) and all(isinstance(v, str) for v in value))
+        }
+        # Prompts without placeholders can be referenced from other prompts
+        self._constants = {
+            name: template.render({})
+            for name, template in self.templates.items()
+            if not template.placeholders
+        }
+        self._render = lru_cache(maxsize=1024)(self._render_uncached)
+
+    def get(self, key: str, default=None):
+        """Raw config value, for settings such as debate_rounds_count"""
+        return self.config.get(key, default)
+
+    def template_version(self, name: str) -> str:
+        return self.templates[name].version
+
+    def render(self, template_name: str, /, **values) -> str:
+        """Render a prompt; renders are memoized per snapshot"""
+        return self._render(template_name, tuple(sorted(values.items())))
+
+    def _render_uncached(self, template_name: str, values: Tuple[Tuple[str, str], ...]) -> str:
+        if template_name not in self.templates:
+            raise KeyError(f"Unknown prompt template: {template_name}")
+        with TRACER.span("PromptSet.render", template=template_name):
+            return self.templates[template_name].render({**self._constants, **dict(values)})
+
+
+class PromptLibrary:
+    """Serves the current PromptSet, reloading it when the config file changes.
+
+    A reload compiles a new snapshot and swaps it in; debates already running
+    keep the snapshot they started with. A config that fails to parse or
+    compile is logged and the previous snapshot stays active.
+    """
+
+    def __init__(self, path: Path, reload_interval_s: float = PROMPT_RELOAD_INTERVAL_S):
+        self.path = Path(path)
+        self.reload_interval_s = reload_interval_s
+        self._lock = threading.Lock()
+        self._mtime = self.path.stat().st_mtime_ns
+        self._snapshot = PromptSet(json.loads(self.path.read_text()))
+        self._checked_at = time.monotonic()
+
+    def current(self) -> PromptSet:
+        if self.reload_interval_s > 0 and time.monotonic() - self._checked_at >= self.reload_interval_s:
+            self._maybe_reload()
+        return self._snapshot
+
+    def _maybe_reload(self):
+        with self._lock:
+            if time.monotonic() - self._checked_at < self.reload_interval_s:
+                return
+            self._checked_at = time.monotonic()
+            try:
+                mtime = self.path.stat().st_mtime_ns
+            except OSError as e:
+                logger.error("Cannot stat prompt config %s: %s", self.path, e)
+                return
+            if mtime == self._mtime:
+                return
+
+            # Remember the mtime even if this version is broken, so it is reported once
+            self._mtime = mtime
+            try:
+                snapshot = PromptSet(json.loads(self.path.read_text()))
+            except Exception as e:
+                logger.error("Keeping prompt version %s, reload of %s failed: %s",
+                             self._snapshot.version, self.path, e)
+                return
+
+            if snapshot.version != self._snapshot.version:
+                logger.info("Reloaded prompts from %s: version %s -> %s",
+                            self.path, self._snapshot.version, snapshot.version)
+                self._snapshot = snapshot
+
+
+PROMPTS = PromptLibrary(DEBATE_CONFIG_PATH)
+
+
+def current_prompts(prompts: Optional[PromptSet] = None) -> PromptSet:
+    """The given snapshot, or the library's current one"""
+    return prompts or PROMPTS.current()
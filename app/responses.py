@@ -0,0 +1,84 @@
+import os
+import gzip
+import json
+from typing import Dict, Optional
+from fastapi import Request
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the standard library encoder is the fallback
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; without it only gzip is offered
+    brotli = None
+
+
+# Bodies smaller than this are sent uncompressed: the saving would not pay for the CPU
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 4
+
+
+def dumps(content) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def _accepted_encodings(accept_encoding: str) -> Dict[str, float]:
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name.strip().lower()] = quality
+    return accepted
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Pick brotli or gzip from an Accept-Encoding header, preferring brotli on a tie"""
+    accepted = _accepted_encodings(accept_encoding or "")
+    candidates = [name for name in ("br", "gzip") if name != "br" or brotli is not None]
+    ranked = [
+        (accepted.get(name, accepted.get("*", 0.0)), -i, name)
+        for i, name in enumerate(candidates)
+    ]
+    quality, _, name = max(ranked, default=(0.0, 0, None))
+    return name if quality > 0 else None
+
+
+def encoded_response(
+    request: Request, body: bytes, media_type: str, status_code: int = 200, headers: Dict[str, str] = None
+) -> Response:
+    """Response compressed with the best encoding the client accepts, when large enough to benefit"""
+    headers = dict(headers or {})
+    headers["Vary"] = "Accept-Encoding"
+    encoding = None
+    if len(body) >= COMPRESS_MIN_BYTES:
+        encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+
+    if encoding == "br":
+        body = brotli.compress(body, quality=BROTLI_QUALITY)
+    elif encoding == "gzip":
+        body = gzip.compress(body, compresslevel=GZIP_LEVEL)
+    if encoding:
+        headers["Content-Encoding"] = encoding
+
+    return Response(body, status_code=status_code, media_type=media_type, headers=headers)
+
+
+def json_response(request: Request, content, status_code: int = 200, headers: Dict[str, str] = None) -> Response:
+    """Serialize ``content`` with the fast encoder and compress it if worthwhile"""
+    return encoded_response(request, dumps(content), "application/json", status_code, headers)
+
+
+def text_response(request: Request, text: str, status_code: int = 200, headers: Dict[str, str] = None) -> Response:
+    return encoded_response(request, text.encode(), "text/plain; charset=utf-8", status_code, headers)
@@ -0,0 +1,275 @@
+import os
+import re
+import json
+import time
+import zlib
+import atexit
+import hashlib
+import threading
+from pathlib import Path
+from collections import deque
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+from app.utils.logging import setup_logging
+
+
+load_dotenv()
+
+# Setup logging
+logger = setup_logging(__name__)
+
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "false").lower() == "true"
+SEMANTIC_CACHE_PATH = os.getenv("SEMANTIC_CACHE_PATH")
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.9"))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "256"))
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+
+HASHED_EMBEDDING_DIM = 512
+WORD_PATTERN = re.compile(r"\w+")
+NEGATION_PATTERN = re.compile(r"\b(?:not|no|never|nor|neither|none|without|cannot|\w+n't)\b")
+
+
+def normalize_topic(topic: str) -> str:
+    return " ".join(WORD_PATTERN.findall(topic.lower()))
+
+
+def negation_count(topic: str) -> int:
+    """Embeddings barely move when a motion is negated, so negations must match exactly"""
+    return len(NEGATION_PATTERN.findall(topic.lower().replace("’", "'")))
+
+
+class HashedNgramEmbedder:
+    """Dependency-free fallback: hashed word and character-trigram features
+
+    These measure spelling, not meaning, so the cache only serves exact
+    repeats of a topic from them.
+    """
+
+    dim = HASHED_EMBEDDING_DIM
+    semantic = False
+
+    def __call__(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for word in WORD_PATTERN.findall(text.lower()):
+            vector[zlib.crc32(word.encode()) % self.dim] += 1.0
+            padded = f" {word} "
+            for i in range(len(padded) - 2):
+                vector[zlib.crc32(padded[i:i + 3].encode()) % self.dim] += 0.5
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
+class SentenceTransformerEmbedder:
+    """Small local CPU embedding model via sentence-transformers"""
+
+    semantic = True
+
+    def __init__(self, model_name: str):
+        from sentence_transformers import SentenceTransformer
+
+        self._model = SentenceTransformer(model_name, device="cpu")
+        self.dim = self._model.get_sentence_embedding_dimension()
+
+    def __call__(self, text: str) -> np.ndarray:
+        return self._model.encode(text, normalize_embeddings=True).astype(np.float32)
+
+
+def load_embedder():
+    try:
+        embedder = SentenceTransformerEmbedder(EMBEDDING_MODEL)
+        logger.info("Loaded embedding model %s", EMBEDDING_MODEL)
+        return embedder
+    except Exception as e:
+        logger.info("Embedding model unavailable (%s), using hashed n-gram embeddings", e)
+        return HashedNgramEmbedder()
+
+
+class _Partition:
+    """Cached openings of one character: a normalized embedding matrix plus texts"""
+
+    def __init__(self, dim: int):
+        self.vectors = np.zeros((0, dim), dtype=np.float32)
+        self.topics: List[str] = []
+        self.openings: List[str] = []
+        self.last_used: List[float] = []
+
+    def best_match(self, query: np.ndarray) -> Tuple[int, float]:
+        if not self.openings:
+            return -1, 0.0
+        scores = self.vectors @ query
+        index = int(np.argmax(scores))
+        return index, float(scores[index])
+
+    def add(self, vector: np.ndarray, topic: str, opening: str, max_entries: int):
+        if len(self.openings) >= max_entries:
+            self._evict(int(np.argmin(self.last_used)))
+        self.vectors = np.vstack([self.vectors, vector[None, :]])
+        self.topics.append(topic)
+        self.openings.append(opening)
+        self.last_used.append(time.time())
+
+    def _evict(self, index: int):
+        self.vectors = np.delete(self.vectors, index, axis=0)
+        del self.topics[index]
+        del self.openings[index]
+        del self.last_used[index]
+
+
+class OpeningCache:
+    """Semantic cache of opening statements keyed by character and topic.
+
+    Opening statements depend only on the character and the topic, so a new
+    topic whose embedding is within ``threshold`` cosine similarity of a
+    cached topic for the same character reuses that opening instead of
+    calling the model, provided both topics negate the same number of times.
+    Without a semantic embedding model only exact repeats of a topic hit.
+    Each character keeps at most ``max_entries`` openings, evicting the least
+    recently used.
+    """
+
+    def __init__(
+        self,
+        embedder=None,
+        threshold: float = SEMANTIC_CACHE_THRESHOLD,
+        max_entries: int = SEMANTIC_CACHE_MAX_ENTRIES,
+        path: Optional[Path] = None,
+    ):
+        self._embedder = embedder
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.path = Path(path) if path else None
+        self._partitions: Dict[str, _Partition] = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._lookup_ms = deque(maxlen=1000)
+        self._embed = lru_cache(maxsize=1024)(self._embed_uncached)
+
+        if self.path and self.path.exists():
+            self.load()
+
+    @property
+    def embedder(self):
+        if self._embedder is None:
+            self._embedder = load_embedder()
+        return self._embedder
+
+    def _embed_uncached(self, text: str) -> np.ndarray:
+        return self.embedder(text)
+
+    @staticmethod
+    def _character_key(character_context: str, version: str = "") -> str:
+        return hashlib.sha256(f"{version}\0{character_context}".encode()).hexdigest()[:16]
+
+    def get_or_create(
+        self, character_context: str, topic: str, generate: Callable[[], str], version: str = ""
+    ) -> Tuple[str, bool]:
+        """Return the cached opening for a similar topic, or generate and cache one
+
+        Args:
+            version: Opening prompt template version; openings from other versions never match
+
+        Returns:
+            The opening statement and whether it was a cache hit
+        """
+        start = time.perf_counter()
+        key = self._character_key(character_context, version)
+        query = self._embed(topic.strip())
+
+        with self._lock:
+            partition = self._partitions.get(key)
+            if partition is not None and partition.vectors.shape[1] != query.shape[0]:
+                # Embedded by a different model (e.g. loaded from disk); start over
+                del self._partitions[key]
+                partition = None
+            if partition is not None:
+                index, score = partition.best_match(query)
+                if index >= 0 and self._matches(partition.topics[index], topic, score):
+                    partition.last_used[index] = time.time()
+                    self._hits += 1
+                    self._lookup_ms.append((time.perf_counter() - start) * 1000)
+                    logger.info("Opening cache hit (similarity %.3f) for topic: %s", score, topic)
+                    return partition.openings[index], True
+
+            self._misses += 1
+            self._lookup_ms.append((time.perf_counter() - start) * 1000)
+
+        opening = generate()
+
+        # Never cache provider errors
+        if opening and not opening.startswith("[Error"):
+            with self._lock:
+                partition = self._partitions.setdefault(key, _Partition(query.shape[0]))
+                partition.add(query, topic, opening, self.max_entries)
+
+        return opening, False
+
+    def _matches(self, cached_topic: str, topic: str, score: float) -> bool:
+        if normalize_topic(cached_topic) == normalize_topic(topic):
+            return True
+        if not getattr(self.embedder, "semantic", False):
+            return False
+        return score >= self.threshold and negation_count(cached_topic) == negation_count(topic)
+
+    def report(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            latencies = sorted(self._lookup_ms)
+            return {
+                "enabled": SEMANTIC_CACHE_ENABLED,
+                "semantic": getattr(self._embedder, "semantic", None),
+                "characters": len(self._partitions),
+                "entries": sum(len(p.openings) for p in self._partitions.values()),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "lookup_p50_ms": round(latencies[len(latencies) // 2], 3) if latencies else 0.0,
+                "lookup_p95_ms": round(latencies[int(len(latencies) * 0.95)], 3) if latencies else 0.0,
+            }
+
+    def save(self, path: Optional[Path] = None):
+        path = Path(path or self.path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            arrays = {f"vectors_{key}": p.vectors for key, p in self._partitions.items()}
+            metadata = {
+                key: {"topics": p.topics, "openings": p.openings, "last_used": p.last_used}
+                for key, p in self._partitions.items()
+            }
+        tmp_path = path.with_suffix(".tmp.npz")
+        np.savez_compressed(tmp_path, metadata=np.array(json.dumps(metadata)), **arrays)
+        os.replace(tmp_path, path)
+        logger.info("Saved opening cache to %s", path)
+
+    def load(self, path: Optional[Path] = None):
+        path = Path(path or self.path)
+        with np.load(path) as data:
+            metadata = json.loads(str(data["metadata"]))
+            with self._lock:
+                for key, entry in metadata.items():
+                    vectors = data[f"vectors_{key}"]
+                    partition = _Partition(vectors.shape[1])
+                    partition.vectors = vectors
+                    partition.topics = entry["topics"]
+                    partition.openings = entry["openings"]
+                    partition.last_used = entry["last_used"]
+                    self._partitions[key] = partition
+        logger.info("Loaded opening cache from %s", path)
+
+
+OPENING_CACHE = OpeningCache(path=SEMANTIC_CACHE_PATH)
+
+if SEMANTIC_CACHE_PATH:
+    atexit.register(OPENING_CACHE.save)
+
+
+def cached_opening(
+    character_context: str, topic: str, generate: Callable[[], str], version: str = ""
+) -> Tuple[str, bool]:
+    """Opening statement through the semantic cache when it is enabled"""
+    if not SEMANTIC_CACHE_ENABLED:
+        return generate(), False
+    return OPENING_CACHE.get_or_create(character_context, topic, generate, version)
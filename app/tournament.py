@@ -0,0 +1,140 @@
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+import app.debate as debate
+from app.characters import get_character_description, rebuttal_context
+from app.judging import judge_transcripts
+from app.prompt_templates import PROMPTS
+from app.utils.logging import setup_logging
+from app.transcript import build_turns
+from app.transcript_export import export_debate, model_labels
+
+
+# Setup logging
+logger = setup_logging(__name__)
+
+DEFAULT_MAX_CONCURRENCY = 4
+
+
+def run_tournament(
+    characters: List[str],
+    topics: List[str],
+    debate_rounds_count: int = None,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+) -> Dict:
+    """
+    Run a round-robin tournament: every pair of characters debates every topic,
+    with the first speaker of each pairing alternating from topic to topic.
+
+    Opening statements depend only on the character and topic, so each
+    (character, topic) opening is generated once and shared by all of that
+    character's pairings: N openings per topic instead of N * (N - 1). The
+    remaining turns of every pairing run on a pool of ``max_concurrency``
+    workers.
+
+    Args:
+        characters: Names/IDs of the competing characters
+        topics: Debate topics
+        debate_rounds_count: Rounds per debate, including opening and closing
+        max_concurrency: Maximum number of LLM calls in flight
+
+    Returns:
+        Standings table, per-debate results and the number of opening calls made
+    """
+    if len(characters) < 2:
+        raise ValueError("A tournament needs at least two characters")
+    if len(set(characters)) != len(characters):
+        raise ValueError("Tournament characters must be unique")
+    if not topics:
+        raise ValueError("A tournament needs at least one topic")
+
+    prompts = PROMPTS.current()
+    if not debate_rounds_count:
+        debate_rounds_count = prompts.get("debate_rounds_count", 5)
+
+    descriptions = {name: get_character_description(name) for name in characters}
+    contexts = {
+        name: debate.LLAMA_DEBATOR.format_character_for_prompt(description)
+        for name, description in descriptions.items()
+    }
+    rebuttal_contexts = {
+        name: rebuttal_context(descriptions[name], contexts[name], prompts) for name in characters
+    }
+    pairings = list(itertools.combinations(characters, 2))
+    # Alternate who speaks first from topic to topic, so no character always opens
+    schedule = [
+        (topic, a, b) if i % 2 == 0 else (topic, b, a)
+        for i, topic in enumerate(topics)
+        for a, b in pairings
+    ]
+
+    logger.info(
+        f"Starting tournament: {len(characters)} characters, {len(topics)} topics, "
+        f"{len(schedule)} debates"
+    )
+
+    with ThreadPoolExecutor(max_workers=max_concurrency) as pool:
+        opening_futures = {
+            (name, topic): pool.submit(debate.make_opening_statement, contexts[name], topic, prompts)
+            for topic in topics
+            for name in characters
+        }
+        openings = {key: future.result() for key, future in opening_futures.items()}
+
+        debate_futures = {
+            (a, b, topic): pool.submit(
+                debate.continue_debate_from_openings, contexts[a], contexts[b],
+                [openings[(a, topic)], openings[(b, topic)]], debate_rounds_count,
+                prompts=prompts, rebuttal_contexts=(rebuttal_contexts[a], rebuttal_contexts[b]),
+            )
+            for topic, a, b in schedule
+        }
+        results = [
+            {"topic": topic, "char_a": a, "char_b": b, "debate": future.result()}
+            for (a, b, topic), future in debate_futures.items()
+        ]
+
+    # Judge all debates together so they can be packed into fewer requests
+    verdicts = judge_transcripts([r["debate"] for r in results], max_concurrency=max_concurrency)
+    for result, verdict in zip(results, verdicts):
+        result["winner"] = verdict.get("winner")
+        result["verdict"] = verdict
+        export_debate(
+            "tournament", result["topic"], build_turns(result["debate"], (result["char_a"], result["char_b"])),
+            model_labels(debate.LLAMA_DEBATOR),
+        )
+
+    logger.info("Tournament completed successfully")
+    return {
+        "standings": build_standings(characters, results),
+        "results": results,
+        "opening_calls": len(opening_futures),
+    }
+
+
+def build_standings(characters: List[str], results: List[Dict]) -> List[Dict]:
+    """Wins score 1 point and draws 0.5; sorted by points, then wins"""
+    table = {
+        name: {"character": name, "played": 0, "wins": 0, "losses": 0, "draws": 0, "points": 0.0}
+        for name in characters
+    }
+
+    for result in results:
+        a, b = table[result["char_a"]], table[result["char_b"]]
+        a["played"] += 1
+        b["played"] += 1
+        if result["winner"] == "A":
+            winner, loser = a, b
+        elif result["winner"] == "B":
+            winner, loser = b, a
+        else:
+            a["draws"] += 1
+            b["draws"] += 1
+            a["points"] += 0.5
+            b["points"] += 0.5
+            continue
+        winner["wins"] += 1
+        winner["points"] += 1
+        loser["losses"] += 1
+
+    return sorted(table.values(), key=lambda row: (-row["points"], -row["wins"], row["character"]))
@@ -0,0 +1,111 @@
+import os
+import time
+from typing import Callable, Dict, List, Optional, Tuple, TypeVar
+from dotenv import load_dotenv
+from app.model_interface.token_accounting import TokenCounter
+
+
+load_dotenv()
+
+# Completion tokens are counted with the served model's local tokenizer when there is one
+TURN_TOKEN_COUNTER = TokenCounter(os.getenv("MODEL_ID"))
+
+SECTION_RULE = "=" * 80
+
+T = TypeVar("T")
+
+
+class TurnClock:
+    """Phase, start offset and duration of each turn, in the order turns join the history"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.timings: List[Tuple[str, float, float]] = []
+
+    def time(self, phase: str, generate: Callable[[], T]) -> T:
+        start = time.perf_counter()
+        result = generate()
+        end = time.perf_counter()
+        self.timings.append((phase, (start - self.started) * 1000, (end - start) * 1000))
+        return result
+
+    @property
+    def elapsed_ms(self) -> float:
+        return round((time.perf_counter() - self.started) * 1000, 1)
+
+
+def timed(clock: Optional[TurnClock], phase: str, generate: Callable[[], T]) -> T:
+    """Run ``generate`` on ``clock`` when there is one"""
+    if clock is None:
+        return generate()
+    return clock.time(phase, generate)
+
+
+def turn_phase(index: int, turn_count: int, finished: bool) -> str:
+    """Two-speaker debates: two openings, rebuttal rounds, and two closings once finished"""
+    if index < 2:
+        return "opening"
+    if finished and index >= turn_count - 2:
+        return "closing"
+    return "rebuttal"
+
+
+def build_turns(
+    history: List[str],
+    speakers: Tuple[str, str],
+    finished: bool = True,
+    clock: Optional[TurnClock] = None,
+) -> List[Dict]:
+    """Structure a two-speaker history as ``{"speaker", "round", "phase", "text", ...}`` turns
+
+    Args:
+        history: Turn texts, alternating between the speakers
+        speakers: Names of the first and second speaker
+        finished: Whether the last two turns are closing statements
+        clock: Phases and timings of the turns, if they were recorded
+    """
+    timings = clock.timings if clock else []
+    turns = []
+    for i, text in enumerate(history):
+        phase = timings[i][0] if i < len(timings) else turn_phase(i, len(history), finished)
+        turn = {
+            "speaker": speakers[i % 2],
+            "round": i // 2,
+            "phase": phase,
+            "text": text,
+            "tokens": TURN_TOKEN_COUNTER.count(text),
+        }
+        if i < len(timings):
+            turn["started_ms"] = round(timings[i][1], 1)
+            turn["latency_ms"] = round(timings[i][2], 1)
+        turns.append(turn)
+    return turns
+
+
+def format_transcript(turns: List[Dict], header: List[str] = ()) -> str:
+    """Plain-text view of structured turns, grouped into opening, rebuttal and closing sections"""
+    lines = list(header) + [SECTION_RULE, ""] if header else []
+    openings = [turn for turn in turns if turn["phase"] == "opening"]
+    rebuttals = [turn for turn in turns if turn["phase"] == "rebuttal"]
+    closings = [turn for turn in turns if turn["phase"] == "closing"]
+
+    if openings:
+        lines.append("OPENING STATEMENTS:")
+        lines += [f"\n{turn['speaker']}: {turn['text']}" for turn in openings]
+        lines.append("\n" + SECTION_RULE + "\n")
+
+    if rebuttals:
+        lines.append("DEBATE ROUNDS:")
+        current_round = None
+        for turn in rebuttals:
+            if turn["round"] != current_round:
+                current_round = turn["round"]
+                lines.append(f"\nRound {current_round}:")
+            lines.append(f"{turn['speaker']}: {turn['text']}")
+        lines.append("\n" + SECTION_RULE + "\n")
+
+    if closings:
+        lines.append("CLOSING STATEMENTS:")
+        lines += [f"\n{turn['speaker']}: {turn['text']}" for turn in closings]
+
+    return "\n".join(lines)
@@ -0,0 +1,350 @@
+import os
+import json
+import time
+import uuid
+import queue
+import atexit
+import threading
+from pathlib import Path
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+from dotenv import load_dotenv
+from app.model_interface.generation_profiles import GENERATION_PROFILES, PHASES
+from app.transcript import TURN_TOKEN_COUNTER
+from app.utils.logging import setup_logging
+
+try:
+    import pyarrow as pa
+except ImportError:  # pyarrow is optional; without it transcripts are exported as JSON lines
+    pa = None
+
+
+load_dotenv()
+
+# Setup logging
+logger = setup_logging(__name__)
+
+FORMATS = ("parquet", "arrow", "jsonl")
+EXTENSIONS = {"parquet": ".parquet", "arrow": ".arrow", "jsonl": ".jsonl"}
+
+# A file is written per partition once this many turns are buffered, or after the interval
+EXPORT_FLUSH_ROWS = int(os.getenv("TRANSCRIPT_EXPORT_FLUSH_ROWS", "5000"))
+EXPORT_FLUSH_INTERVAL_S = float(os.getenv("TRANSCRIPT_EXPORT_FLUSH_INTERVAL_S", "30"))
+# Turns beyond this many waiting to be written are dropped rather than slowing debates down
+EXPORT_MAX_PENDING_ROWS = int(os.getenv("TRANSCRIPT_EXPORT_MAX_PENDING_ROWS", "100000"))
+
+COLUMNS = (
+    ("debate_id", "string"),
+    ("created_at", "timestamp"),
+    ("orchestrator", "string"),
+    ("topic", "string"),
+    ("turn_index", "int32"),
+    ("speaker", "string"),
+    ("round", "int32"),
+    ("phase", "string"),
+    ("text", "string"),
+    ("model", "string"),
+    ("tokens", "int32"),
+    ("started_ms", "float64"),
+    ("latency_ms", "float64"),
+    ("stopped", "string"),
+)
+
+
+def arrow_schema():
+    types = {
+        "string": pa.string(),
+        "int32": pa.int32(),
+        "float64": pa.float64(),
+        "timestamp": pa.timestamp("ms", tz="UTC"),
+    }
+    return pa.schema([(name, types[kind]) for name, kind in COLUMNS])
+
+
+def resolve_format(requested: Optional[str]) -> str:
+    fmt = (requested or "parquet").lower()
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown transcript export format: {fmt}")
+    if fmt != "jsonl" and pa is None:
+        logger.warning("pyarrow is not installed, exporting transcripts as jsonl instead of %s", fmt)
+        return "jsonl"
+    return fmt
+
+
+def debate_rows(
+    orchestrator: str,
+    topic: str,
+    turns: List[Dict],
+    model: Union[str, Dict[str, str], None] = None,
+    stopped: Optional[str] = None,
+) -> List[Dict]:
+    """One row per turn; ``model`` is one label or one per phase (see ``model_labels``),
+    and a phase's generation profile model overrides it"""
+    labels = model if isinstance(model, dict) else {}
+    debate_id = uuid.uuid4().hex
+    created_at = datetime.now(timezone.utc)
+    return [
+        {
+            "debate_id": debate_id,
+            "created_at": created_at,
+            "orchestrator": orchestrator,
+            "topic": topic,
+            "turn_index": i,
+            "speaker": turn["speaker"],
+            "round": turn["round"],
+            "phase": turn["phase"],
+            "text": turn["text"],
+            "model": (
+                getattr(GENERATION_PROFILES.get(turn["phase"]), "model", None)
+                or (labels.get(turn["phase"]) if labels else model)
+            ),
+            "tokens": turn["tokens"] if "tokens" in turn else TURN_TOKEN_COUNTER.count(turn["text"]),
+            "started_ms": turn.get("started_ms"),
+            "latency_ms": turn.get("latency_ms"),
+            "stopped": stopped,
+        }
+        for i, turn in enumerate(turns)
+    ]
+
+
+class TranscriptExporter:
+    """Buffers debate turns and writes them from a background thread.
+
+    Turns are grouped into hive-style ``date=YYYY-MM-DD`` partitions, and
+    each flush writes one new file per partition (Parquet, Arrow IPC or JSON
+    lines). Files are written under a temporary name and renamed when
+    complete, so readers never see a partial file. Debates only pay for
+    putting their rows on a queue; when the writer falls behind by more
+    than ``max_pending_rows``, new debates are dropped and counted.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        fmt: str = "parquet",
+        flush_rows: int = EXPORT_FLUSH_ROWS,
+        flush_interval_s: float = EXPORT_FLUSH_INTERVAL_S,
+        max_pending_rows: int = EXPORT_MAX_PENDING_ROWS,
+    ):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.format = resolve_format(fmt)
+        self.flush_rows = flush_rows
+        self.flush_interval_s = flush_interval_s
+        self.max_pending_rows = max_pending_rows
+        self.dropped_rows = 0
+        self.written_rows = 0
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="transcript-exporter", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, rows: List[Dict]) -> bool:
+        """Queue rows for writing; False if they were dropped"""
+        if not rows or self._closed:
+            return False
+        with self._pending_lock:
+            if self._pending + len(rows) > self.max_pending_rows:
+                self.dropped_rows += len(rows)
+                logger.warning("Transcript export is behind, dropped %d turns", len(rows))
+                return False
+            self._pending += len(rows)
+        self._queue.put(rows)
+        return True
+
+    def flush(self, timeout: Optional[float] = None):
+        """Write everything submitted so far and wait for it"""
+        if self._closed:
+            # close() already wrote everything, and no writer is left to answer
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait(timeout)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join(timeout=30)
+
+    def _run(self):
+        buffer: List[Dict] = []
+        deadline = time.monotonic() + self.flush_interval_s
+        while True:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                item = threading.Event()
+
+            if isinstance(item, list):
+                buffer.extend(item)
+                if len(buffer) < self.flush_rows:
+                    continue
+
+            # A full buffer, the interval, an explicit flush or shutdown: write what we have
+            self._write_buffer(buffer)
+            buffer = []
+            deadline = time.monotonic() + self.flush_interval_s
+            if isinstance(item, threading.Event):
+                item.set()
+            elif item is None:
+                return
+
+    def _write_buffer(self, rows: List[Dict]):
+        if not rows:
+            return
+        partitions: Dict[str, List[Dict]] = {}
+        for row in rows:
+            partitions.setdefault(row["created_at"].strftime("%Y-%m-%d"), []).append(row)
+
+        for date, partition_rows in partitions.items():
+            try:
+                self._write_partition(date, partition_rows)
+                self.written_rows += len(partition_rows)
+            except Exception as e:
+                logger.error("Failed to export %d transcript turns: %s", len(partition_rows), e)
+        with self._pending_lock:
+            self._pending -= len(rows)
+
+    def _write_partition(self, date: str, rows: List[Dict]):
+        directory = self.root / f"date={date}"
+        directory.mkdir(parents=True, exist_ok=True)
+        name = f"part-{int(time.time() * 1000)}-{uuid.uuid4().hex[:8]}{EXTENSIONS[self.format]}"
+        path = directory / name
+        tmp = directory / f".{name}.tmp"
+
+        if self.format == "jsonl":
+            with open(tmp, "w", encoding="utf-8") as f:
+                for row in rows:
+                    f.write(json.dumps({**row, "created_at": row["created_at"].isoformat()}) + "\n")
+        else:
+            table = pa.Table.from_pylist(rows, schema=arrow_schema())
+            if self.format == "parquet":
+                import pyarrow.parquet as pq
+
+                pq.write_table(table, tmp, compression="zstd")
+            else:
+                with pa.OSFile(str(tmp), "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+
+        os.replace(tmp, path)
+        logger.info("Exported %d transcript turns to %s", len(rows), path)
+
+
+def _create_exporter() -> Optional[TranscriptExporter]:
+    path = os.getenv("TRANSCRIPT_EXPORT_PATH")
+    if not path:
+        return None
+    exporter = TranscriptExporter(Path(path), os.getenv("TRANSCRIPT_EXPORT_FORMAT", "parquet"))
+    logger.info("Exporting debate transcripts to %s as %s", path, exporter.format)
+    return exporter
+
+
+# Opt-in: only set when TRANSCRIPT_EXPORT_PATH is configured
+EXPORTER = _create_exporter()
+
+
+def export_debate(
+    orchestrator: str,
+    topic: str,
+    turns: List[Dict],
+    model: Union[str, Dict[str, str], None] = None,
+    stopped: Optional[str] = None,
+) -> bool:
+    """Queue a finished debate's turns for export; a no-op unless exporting is enabled"""
+    if EXPORTER is None:
+        return False
+    return EXPORTER.submit(debate_rows(orchestrator, topic, turns, model, stopped))
+
+
+def model_label(debator, phase: Optional[str] = None) -> str:
+    """The model a debator serves, for the export's model column
+
+    A router is resolved to the route it sends ``phase`` to, not reported as itself.
+    """
+    if phase is not None and hasattr(debator, "route_for"):
+        debator = debator.route_for(phase)
+    return getattr(debator, "_model_name", None) or type(debator).__name__
+
+
+def model_labels(debator) -> Dict[str, str]:
+    """``model_label`` for every phase, for ``export_debate``"""
+    return {phase: model_label(debator, phase) for phase in PHASES}
+
+
+# Reader API, for notebooks. Nothing is loaded until it is iterated or scanned.
+
+def _partition_files(root: Path, dates: Optional[Iterable[str]] = None) -> List[Path]:
+    wanted = set(dates) if dates else None
+    files = []
+    for directory in sorted(Path(root).glob("date=*")):
+        if wanted is None or directory.name.split("=", 1)[1] in wanted:
+            files += sorted(p for p in directory.iterdir() if p.suffix in EXTENSIONS.values())
+    return files
+
+
+def open_transcripts(root: Optional[Path] = None):
+    """A pyarrow Dataset over the exported Parquet and Arrow files
+
+    Filters and column selections are pushed down to the files, and Arrow
+    IPC files are memory-mapped, so only what a query touches is read:
+
+        dataset = open_transcripts()
+        table = dataset.to_table(columns=["phase", "latency_ms"], filter=ds.field("date") == "2026-10-18")
+    """
+    import pyarrow.dataset as ds
+    from pyarrow import fs
+
+    root = Path(root or os.getenv("TRANSCRIPT_EXPORT_PATH"))
+    partition_schema = pa.schema([("date", pa.string())])
+    partitioning = ds.partitioning(partition_schema, flavor="hive")
+    # An explicit schema replaces the inferred one, so it must include the partition column
+    schema = pa.unify_schemas([arrow_schema(), partition_schema])
+    filesystem = fs.LocalFileSystem(use_mmap=True)
+
+    datasets = []
+    for fmt, file_format in (("parquet", "parquet"), ("arrow", "ipc")):
+        files = [str(p) for p in _partition_files(root) if p.suffix == EXTENSIONS[fmt]]
+        if files:
+            datasets.append(ds.dataset(
+                files, schema=schema, format=file_format, filesystem=filesystem,
+                partitioning=partitioning, partition_base_dir=str(root),
+            ))
+    if not datasets:
+        raise FileNotFoundError(f"No Parquet or Arrow transcripts under {root}")
+    return datasets[0] if len(datasets) == 1 else ds.dataset(datasets)
+
+
+def iter_turns(
+    root: Optional[Path] = None,
+    dates: Optional[Iterable[str]] = None,
+    columns: Optional[List[str]] = None,
+    batch_size: int = 10000,
+) -> Iterator[Dict]:
+    """Stream exported turns as dicts, one file and one batch at a time, in any export format"""
+    root = Path(root or os.getenv("TRANSCRIPT_EXPORT_PATH"))
+    for path in _partition_files(root, dates):
+        if path.suffix == EXTENSIONS["jsonl"]:
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    row = json.loads(line)
+                    yield {name: row.get(name) for name in columns} if columns else row
+            continue
+
+        if path.suffix == EXTENSIONS["parquet"]:
+            import pyarrow.parquet as pq
+
+            batches = pq.ParquetFile(path).iter_batches(batch_size=batch_size, columns=columns)
+            for batch in batches:
+                yield from batch.to_pylist()
+        else:
+            with pa.memory_map(str(path)) as source:
+                reader = pa.ipc.open_file(source)
+                for i in range(reader.num_record_batches):
+                    batch = reader.get_batch(i)
+                    yield from (batch.select(columns) if columns else batch).to_pylist()
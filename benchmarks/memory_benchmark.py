@@ -0,0 +1,112 @@
+"""Conversation memory benchmark for LangChainDebator.
+
+Replays long debates through an agent's memory the way the orchestrators do
+(the full history is passed on every turn) and compares the compact,
+interned memory with storing every formatted prompt as its own message:
+
+    python -m benchmarks.memory_benchmark --rounds 10 25 50 100
+"""
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, List
+
+from benchmarks.run_benchmarks import ROOT, RESULTS_DIR, _configure_environment
+
+
+class FormattedMessageMemory:
+    """Baseline: one message per exchange holding the whole formatted history"""
+
+    def __init__(self):
+        self.messages = []
+
+    def add_user_turns(self, turns: List[str], offset: int = 0):
+        from app.model_interface.langchain_debator import format_conversation
+
+        self.messages.append(format_conversation(turns, offset))
+
+    def add_ai_message(self, message: str):
+        self.messages.append(message)
+
+    def stored_chars(self) -> int:
+        return sum(len(m) for m in self.messages)
+
+
+def debate_turns(rounds: int) -> List[str]:
+    from app.model_interface.mock_debator import MockCompletionEngine
+
+    engine = MockCompletionEngine.from_env()
+    return [
+        engine.generate([{"role": "user", "content": f"turn {i}"}], max_tokens=96).text
+        for i in range(rounds * 2)
+    ]
+
+
+def run_memory(memory, turns: List[str]) -> Dict:
+    """Feed one speaker's side of a debate into ``memory``"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    for i in range(1, len(turns), 2):
+        memory.add_user_turns(turns[:i])
+        memory.add_ai_message(turns[i])
+    elapsed = time.perf_counter() - start
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "entries": len(memory.messages),
+        "stored_chars": memory.stored_chars(),
+        "retained_kib": round(retained / 1024, 1),
+        "peak_kib": round(peak / 1024, 1),
+        "write_ms": round(elapsed * 1000, 2),
+    }
+
+
+def run(rounds_list: List[int]) -> Dict:
+    from app.model_interface.langchain_debator import CompactMemory
+
+    results = {}
+    for rounds in rounds_list:
+        turns = debate_turns(rounds)
+        compact = CompactMemory()
+        results[rounds] = {
+            "formatted": run_memory(FormattedMessageMemory(), turns),
+            "compact": run_memory(compact, turns),
+        }
+
+        start = time.perf_counter()
+        compact.messages
+        results[rounds]["compact"]["materialize_ms"] = round((time.perf_counter() - start) * 1000, 2)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, nargs="+", default=[10, 25, 50, 100])
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args(argv)
+
+    _configure_environment()
+    sys.path.insert(0, str(ROOT))
+
+    results = run(args.rounds)
+    for rounds, row in results.items():
+        formatted, compact = row["formatted"], row["compact"]
+        print(
+            f"{rounds:>4} rounds  formatted {formatted['stored_chars']:>9} chars "
+            f"{formatted['retained_kib']:>8} KiB  |  compact {compact['stored_chars']:>7} chars "
+            f"{compact['retained_kib']:>7} KiB, materialize {compact['materialize_ms']} ms"
+        )
+
+    output = args.output or RESULTS_DIR / f"memory-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({"rounds": results}, indent=2))
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
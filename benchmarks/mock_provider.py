@@ -0,0 +1,100 @@
+"""Local OpenAI-compatible stand-in for the LLM providers.
+
+Serves ``/v1/chat/completions`` with deterministic text from
+``MockCompletionEngine``, so both ``LlamaDebator`` (``HF_BASE_URL``) and
+``LangChainDebator`` (``OPENAI_BASE_URL``) can run against it unchanged:
+
+    MOCK_LATENCY_MS=300 MOCK_ERROR_RATE=0.01 \\
+        uvicorn benchmarks.mock_provider:app --port 9000
+
+    HF_BASE_URL=http://localhost:9000 OPENAI_BASE_URL=http://localhost:9000/v1 \\
+        uvicorn app.main:app --port 8000
+
+Set ``CASSETTE_REPLAY_PATH`` to serve recorded provider traffic (see
+``app/model_interface/cassette.py``) with its original timing instead.
+"""
+import os
+import time
+import uuid
+import asyncio
+from typing import Dict, List, Optional
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from pathlib import Path
+from app.model_interface.mock_debator import (
+    MockCompletion,
+    MockCompletionEngine,
+    MockProviderError,
+)
+from app.model_interface.cassette import CassettePlayer
+
+
+app = FastAPI()
+ENGINE = MockCompletionEngine.from_env()
+PLAYER = (
+    CassettePlayer.from_path(
+        Path(os.getenv("CASSETTE_REPLAY_PATH")),
+        time_scale=float(os.getenv("CASSETTE_TIME_SCALE", "1.0")),
+    )
+    if os.getenv("CASSETTE_REPLAY_PATH")
+    else None
+)
+
+
+def _replay(messages: List[Dict]) -> MockCompletion:
+    if MockCompletionEngine.is_persona_distillation(messages):
+        kind = "persona"
+    elif MockCompletionEngine.is_character_creation(messages):
+        kind = "character"
+    else:
+        kind = "debate"
+    entry = PLAYER.lookup(kind, messages)
+    return MockCompletion(
+        text=entry["response"],
+        prompt_tokens=entry.get("prompt_tokens") or 0,
+        completion_tokens=entry.get("completion_tokens") or 0,
+        latency_s=PLAYER.delay(entry),
+    )
+
+
+class ChatCompletionRequest(BaseModel):
+    model: Optional[str] = None
+    messages: List[Dict]
+    max_tokens: Optional[int] = None
+
+
+@app.post("/v1/chat/completions")
+@app.post("/chat/completions")
+async def chat_completions(request: ChatCompletionRequest):
+    messages = [
+        {"role": m.get("role", "user"), "content": m.get("content") or ""}
+        for m in request.messages
+    ]
+
+    try:
+        if PLAYER:
+            completion = _replay(messages)
+        else:
+            completion = ENGINE.generate(messages, max_tokens=request.max_tokens)
+    except MockProviderError as e:
+        return JSONResponse(status_code=503, content={"error": {"message": str(e)}})
+
+    await asyncio.sleep(completion.latency_s)
+
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": request.model or "mock",
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": completion.text},
+            "finish_reason": "stop",
+        }],
+        "usage": {
+            "prompt_tokens": completion.prompt_tokens,
+            "completion_tokens": completion.completion_tokens,
+            "total_tokens": completion.prompt_tokens + completion.completion_tokens,
+        },
+    }
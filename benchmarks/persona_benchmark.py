@@ -0,0 +1,170 @@
+"""Full vs. distilled persona benchmark.
+
+Creates characters through the configured backend (``mock`` by default),
+which stores a distilled ``compact_prompt`` next to each full prompt, then
+runs the same debates with full personas throughout and with compact
+personas in rebuttal rounds, and reports prompt tokens and latency per
+debate:
+
+    python -m benchmarks.persona_benchmark --rounds 5 --debates 4
+
+The mock provider adds ``prompt_tokens / MOCK_PREFILL_TOKENS_PER_SECOND``
+to each call's latency (1000 here unless set), so prompt size shows in the
+timings without a real provider.
+"""
+import os
+import sys
+import json
+import time
+import tempfile
+import argparse
+import threading
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, List
+
+from benchmarks.run_benchmarks import ROOT, RESULTS_DIR, TOPICS, _configure_environment, percentile
+
+CHARACTER_DESCRIPTIONS = [
+    "Abraham Lincoln",
+    "Marie Curie",
+    "A grumpy pirate captain who hates technology",
+    "An overly optimistic startup founder",
+]
+
+
+class MeteredDebator:
+    """Wraps a debator, counting prompt tokens and latency of each ``debate`` call by phase"""
+
+    def __init__(self, debator, counter):
+        self._debator = debator
+        self._counter = counter
+        self._lock = threading.Lock()
+        self.calls: List[Dict] = []
+
+    def __getattr__(self, name):
+        return getattr(self._debator, name)
+
+    def debate(self, char_description, prompt, phase: str = "rebuttal"):
+        turns = [prompt] if isinstance(prompt, str) else prompt
+        prompt_tokens = self._counter.count(char_description) + sum(self._counter.count(t) for t in turns)
+        start = time.perf_counter()
+        response = self._debator.debate(char_description, prompt, phase=phase)
+        with self._lock:
+            self.calls.append({
+                "phase": phase,
+                "prompt_tokens": prompt_tokens,
+                "system_tokens": self._counter.count(char_description),
+                "latency_s": time.perf_counter() - start,
+            })
+        return response
+
+    def drain(self) -> List[Dict]:
+        with self._lock:
+            calls, self.calls = self.calls, []
+        return calls
+
+
+def create_characters(debator, descriptions: List[str]) -> List[str]:
+    from app.character_store import CHARACTER_STORE
+
+    names = []
+    for description in descriptions:
+        before = set(CHARACTER_STORE.ids())
+        character = debator.create_character_from_description(description)
+        if "error" in character:
+            print(f"Skipping {description!r}: {character['error']}")
+            continue
+        created = set(CHARACTER_STORE.ids()) - before
+        names += sorted(created)
+    return names
+
+
+def run_mode(metered: MeteredDebator, pairings, rounds: int, compact: bool) -> List[Dict]:
+    import app.debate as debate
+
+    debates = []
+    for i, (a, b) in enumerate(pairings):
+        start = time.perf_counter()
+        debate.run_debate(TOPICS[i % len(TOPICS)], a, b, rounds, compact_personas=compact)
+        wall = time.perf_counter() - start
+        calls = metered.drain()
+        rebuttals = [c for c in calls if c["phase"] == "rebuttal"]
+        debates.append({
+            "prompt_tokens": sum(c["prompt_tokens"] for c in calls),
+            "rebuttal_system_tokens": sum(c["system_tokens"] for c in rebuttals),
+            "rebuttal_latency_s": sum(c["latency_s"] for c in rebuttals),
+            "latency_s": wall,
+        })
+    return debates
+
+
+def summarize(debates: List[Dict]) -> Dict:
+    def mean(key):
+        return round(sum(d[key] for d in debates) / len(debates), 3) if debates else 0.0
+
+    return {
+        "debates": len(debates),
+        "prompt_tokens_per_debate": mean("prompt_tokens"),
+        "rebuttal_system_tokens_per_debate": mean("rebuttal_system_tokens"),
+        "rebuttal_latency_s_per_debate": mean("rebuttal_latency_s"),
+        "latency_s_per_debate": mean("latency_s"),
+        "latency_p95_s": round(percentile([d["latency_s"] for d in debates], 95), 3),
+    }
+
+
+def run(rounds: int, debates_count: int) -> Dict:
+    from app.model_interface.factory import create_debator
+    from app.model_interface.token_accounting import TokenCounter
+    import app.debate as debate
+
+    debator = create_debator()
+    names = create_characters(debator, CHARACTER_DESCRIPTIONS)
+    if len(names) < 2:
+        raise SystemExit("Need at least two created characters to compare personas")
+
+    pairings = [(names[i % len(names)], names[(i + 1) % len(names)]) for i in range(debates_count)]
+    metered = MeteredDebator(debator, TokenCounter(os.getenv("MODEL_ID")))
+    debate.LLAMA_DEBATOR = metered
+
+    return {
+        "characters": names,
+        "full": summarize(run_mode(metered, pairings, rounds, compact=False)),
+        "compact": summarize(run_mode(metered, pairings, rounds, compact=True)),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=5, help="debate_rounds_count per debate")
+    parser.add_argument("--debates", type=int, default=4, help="Debates per persona mode")
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args(argv)
+
+    _configure_environment()
+    # Keep benchmark characters out of the real store, and openings out of the cache
+    os.environ.setdefault("CHARACTER_STORE_PATH", str(Path(tempfile.mkdtemp()) / "characters.db"))
+    os.environ.setdefault("SEMANTIC_CACHE_ENABLED", "false")
+    os.environ.setdefault("MOCK_PREFILL_TOKENS_PER_SECOND", "1000")
+    sys.path.insert(0, str(ROOT))
+
+    results = run(args.rounds, args.debates)
+    full, compact = results["full"], results["compact"]
+    for mode, row in (("full", full), ("compact", compact)):
+        print(
+            f"{mode:>8}: {row['prompt_tokens_per_debate']:>9} prompt tokens/debate "
+            f"({row['rebuttal_system_tokens_per_debate']} in rebuttal system prompts), "
+            f"{row['latency_s_per_debate']}s/debate, p95 {row['latency_p95_s']}s"
+        )
+    if full["prompt_tokens_per_debate"]:
+        saved = 1 - compact["prompt_tokens_per_debate"] / full["prompt_tokens_per_debate"]
+        print(f"Distilled personas save {saved:.1%} of prompt tokens per debate")
+
+    output = args.output or RESULTS_DIR / f"personas-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({"rounds": args.rounds, **results}, indent=2))
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
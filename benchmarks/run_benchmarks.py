@@ -0,0 +1,221 @@
+"""End-to-end benchmark suite.
+
+Drives the HTTP endpoints of a running service and both debate orchestrators
+(in-process, against the ``DEBATOR_BACKEND`` selected backend, ``mock`` by
+default) at several concurrency levels, and
+reports throughput and p50/p95/p99 latency. Results are written to
+``benchmarks/results/`` and can be compared against an earlier run:
+
+    python -m benchmarks.run_benchmarks --suite orchestrators --concurrency 1 4 16
+    python -m benchmarks.run_benchmarks --suite endpoints --base-url http://localhost:8000 \\
+        --compare benchmarks/results/baseline.json
+"""
+import os
+import sys
+import json
+import math
+import time
+import argparse
+import platform
+from pathlib import Path
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+
+
+ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+TOPICS = [
+    "Should AI be regulated?",
+    "Is social media good for democracy?",
+    "Should homework be banned?",
+    "Is space exploration worth the cost?",
+]
+CHARACTER_A = "Dr. Doofenshmirtz"
+CHARACTER_B = "Phineas Flynn"
+
+
+def _configure_environment():
+    os.environ.setdefault("DEBATOR_BACKEND", "mock")
+    os.environ.setdefault("OPENAI_API_KEY", "mock")
+    os.environ.setdefault("MODEL_CONFIG_PATH", str(ROOT / "configs" / "model_config.json"))
+    os.environ.setdefault("DEBATE_CONFIG_PATH", str(ROOT / "configs" / "debate_config.json"))
+    os.environ.setdefault("CHARACTER_DUMP_PATH", str(ROOT / "characters"))
+    os.environ.setdefault("LOG_PATH", str(ROOT / "logs" / "benchmark.log"))
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def _timed(fn: Callable[[int], object], i: int):
+    start = time.perf_counter()
+    try:
+        fn(i)
+        return time.perf_counter() - start, None
+    except Exception as e:
+        return time.perf_counter() - start, repr(e)
+
+
+def run_scenario(fn: Callable[[int], object], concurrency: int, requests_count: int) -> Dict:
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda i: _timed(fn, i), range(requests_count)))
+    wall = time.perf_counter() - start
+
+    latencies = [latency for latency, error in results if error is None]
+    errors = [error for _, error in results if error is not None]
+
+    return {
+        "concurrency": concurrency,
+        "requests": requests_count,
+        "errors": len(errors),
+        "sample_error": errors[0] if errors else None,
+        "wall_s": round(wall, 4),
+        "throughput_rps": round(len(latencies) / wall, 4) if wall else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+def endpoint_scenarios(base_url: str, rounds: int) -> Dict[str, Callable[[int], object]]:
+    import requests
+
+    def list_characters(i):
+        requests.get(f"{base_url}/characters/", params={"limit": 100}, timeout=60).raise_for_status()
+
+    def run_debate(i):
+        requests.post(
+            f"{base_url}/debate/",
+            data={
+                "prompt": TOPICS[i % len(TOPICS)],
+                "char_a": CHARACTER_A,
+                "char_b": CHARACTER_B,
+                "debate_rounds_count": rounds,
+            },
+            timeout=600,
+        ).raise_for_status()
+
+    def create_character(i):
+        requests.post(
+            f"{base_url}/characterCreate/",
+            data={"user_input": f"Benchmark character {i}"},
+            timeout=120,
+        ).raise_for_status()
+
+    return {
+        "endpoint:characters": list_characters,
+        "endpoint:debate": run_debate,
+        "endpoint:characterCreate": create_character,
+    }
+
+
+def orchestrator_scenarios(rounds: int) -> Dict[str, Callable[[int], object]]:
+    from app.model_interface.factory import create_debator
+    import app.debate as debate
+
+    debator = create_debator()
+    debate.LLAMA_DEBATOR = debator
+
+    def run_debate(i):
+        debate.start_turn_based_debate(TOPICS[i % len(TOPICS)], CHARACTER_A, CHARACTER_B, rounds)
+
+    def run_langgraph(i):
+        import app.debate_langgraph_langchain as langgraph_debate
+
+        langgraph_debate.DEBATOR = debator
+        langgraph_debate.start_turn_based_debate(
+            TOPICS[i % len(TOPICS)], CHARACTER_A, CHARACTER_B, rounds, use_memory=False
+        )
+
+    return {
+        "orchestrator:debate": run_debate,
+        "orchestrator:langgraph": run_langgraph,
+    }
+
+
+def compare(current: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Return a description of every regression beyond ``tolerance``"""
+    regressions = []
+    for scenario, runs in current["scenarios"].items():
+        baseline_runs = {r["concurrency"]: r for r in baseline.get("scenarios", {}).get(scenario, [])}
+        for run in runs:
+            base = baseline_runs.get(run["concurrency"])
+            if not base:
+                continue
+            label = f"{scenario} @ c={run['concurrency']}"
+            if base["p95_ms"] and run["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+                regressions.append(f"{label}: p95 {base['p95_ms']}ms -> {run['p95_ms']}ms")
+            if base["throughput_rps"] and run["throughput_rps"] < base["throughput_rps"] * (1 - tolerance):
+                regressions.append(
+                    f"{label}: throughput {base['throughput_rps']} -> {run['throughput_rps']} rps"
+                )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the Eirene benchmark suite")
+    parser.add_argument("--suite", choices=["endpoints", "orchestrators", "all"], default="orchestrators")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=32, help="Requests per concurrency level")
+    parser.add_argument("--rounds", type=int, default=3, help="debate_rounds_count per debate")
+    parser.add_argument("--scenario", action="append", help="Only run scenarios with this name")
+    parser.add_argument("--output", type=Path, help="Where to write the results JSON")
+    parser.add_argument("--compare", type=Path, help="Baseline results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Allowed relative regression")
+    args = parser.parse_args()
+
+    _configure_environment()
+
+    scenarios = {}
+    if args.suite in ("endpoints", "all"):
+        scenarios.update(endpoint_scenarios(args.base_url, args.rounds))
+    if args.suite in ("orchestrators", "all"):
+        scenarios.update(orchestrator_scenarios(args.rounds))
+    if args.scenario:
+        scenarios = {name: fn for name, fn in scenarios.items() if name in args.scenario}
+
+    results = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "args": {k: str(v) for k, v in vars(args).items()},
+        "mock": {k: v for k, v in os.environ.items() if k.startswith("MOCK_")},
+        "scenarios": {},
+    }
+
+    for name, fn in scenarios.items():
+        results["scenarios"][name] = []
+        for concurrency in args.concurrency:
+            run = run_scenario(fn, concurrency, args.requests)
+            results["scenarios"][name].append(run)
+            print(
+                f"{name:28s} c={concurrency:<3d} {run['throughput_rps']:>8.2f} rps  "
+                f"p50={run['p50_ms']:>9.1f}ms p95={run['p95_ms']:>9.1f}ms "
+                f"p99={run['p99_ms']:>9.1f}ms errors={run['errors']}"
+            )
+
+    output = args.output or RESULTS_DIR / f"{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+    print(f"Results written to {output}")
+
+    if args.compare:
+        regressions = compare(results, json.loads(args.compare.read_text()), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
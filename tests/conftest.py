@@ -0,0 +1,18 @@
+import os
+import tempfile
+from pathlib import Path
+
+# The app reads its configuration at import time, so point it at the repo's
+# configs, a scratch directory and the mock backend before any test imports it
+ROOT = Path(__file__).resolve().parent.parent
+SCRATCH = Path(tempfile.mkdtemp(prefix="eirene-tests-"))
+
+os.environ.setdefault("MODEL_CONFIG_PATH", str(ROOT / "configs" / "model_config.json"))
+os.environ.setdefault("DEBATE_CONFIG_PATH", str(ROOT / "configs" / "debate_config.json"))
+os.environ.setdefault("CHARACTER_DUMP_PATH", str(SCRATCH / "characters"))
+os.environ.setdefault("LOG_PATH", str(SCRATCH / "app.log"))
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ.setdefault("DEBATOR_BACKEND", "mock")
+os.environ.setdefault("MOCK_LATENCY_MS", "0")
+os.environ.setdefault("MOCK_TOKENS_PER_SECOND", "1000000")
+os.environ.setdefault("SEMANTIC_CACHE_ENABLED", "false")
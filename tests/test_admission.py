@@ -0,0 +1,45 @@
+import asyncio
+
+from app.admission import AdmissionController, PriorityClass
+
+
+def _controller():
+    return AdmissionController(8, [
+        PriorityClass("interactive", 0, max_queue=4),
+        PriorityClass("batch", 1, max_concurrency=6, max_queue=4),
+    ])
+
+
+def test_fan_out_is_capped_by_the_class_and_leaves_interactive_capacity():
+    controller = _controller()
+
+    async def scenario():
+        async with controller.admit("batch", slots=200) as workers:
+            assert workers == 6
+            assert controller.report()["inflight"] == 6
+            # Interactive requests still start at once
+            async with controller.admit("interactive") as one, controller.admit("interactive"):
+                assert one == 1
+                assert controller.report()["inflight"] == 8
+        assert controller.report()["inflight"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_fan_out_waits_for_enough_free_slots():
+    controller = _controller()
+    order = []
+
+    async def batch(name, slots, hold_s):
+        async with controller.admit("batch", slots=slots):
+            order.append(name)
+            await asyncio.sleep(hold_s)
+
+    async def scenario():
+        first = asyncio.ensure_future(batch("four", 4, 0.05))
+        await asyncio.sleep(0)
+        # Needs 4 of the 2 left under the batch cap: waits for the first to finish
+        await asyncio.gather(first, batch("another four", 4, 0), batch("one", 1, 0))
+
+    asyncio.run(scenario())
+    assert order == ["four", "another four", "one"]
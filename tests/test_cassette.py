@@ -0,0 +1,164 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.model_interface.cassette import (
+    CassettePlayer,
+    CassetteRecorder,
+    ReplayDebator,
+    canonical_request,
+    load_cassette,
+)
+from app.character_store import CHARACTER_STORE
+from app.prompt_templates import PROMPTS
+
+
+def _completion(content):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))], usage=None)
+
+
+class FakeClient:
+    """Stands in for InferenceClient, answering with a response derived from the request"""
+
+    def __init__(self):
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, model, messages, **kwargs):
+        return _completion("reply to " + messages[0]["content"][-20:])
+
+
+def test_recorded_llama_calls_replay_by_request(tmp_path, monkeypatch):
+    pytest.importorskip("huggingface_hub")
+    from app.model_interface import llama_debator
+
+    path = tmp_path / "session.jsonl.gz"
+    monkeypatch.setattr(llama_debator, "RECORDER", CassetteRecorder(path))
+    debator = llama_debator.LlamaDebator("test-model", api_key="hf_secret")
+    monkeypatch.setattr(debator, "_client", lambda timeout=None: FakeClient())
+
+    first = debator.debate("You are Ada.", ["Topic one", "Opponent says X"], phase="rebuttal")
+    second = debator.debate("You are Ada.", ["Topic two"], phase="opening")
+
+    replay = ReplayDebator(CassettePlayer.from_path(path, time_scale=0))
+    # Out of order, so a round-robin fallback would hand back the wrong response
+    assert replay.debate("You are Ada.", "Topic two", phase="opening") == second
+    assert replay.debate("You are Ada.", ["Topic one", "Opponent says X"]) == first
+
+
+def test_replay_matches_canonical_requests(tmp_path):
+    path = tmp_path / "session.jsonl.gz"
+    recorder = CassetteRecorder(path)
+    creation_prompt = PROMPTS.current().render("interpreted_character_creation_prompt")
+    recordings = [
+        ("debate", "You are Ada.", ["Topic one"], "Ada on topic one"),
+        ("debate", "You are Ada.", ["Topic two"], "Ada on topic two"),
+        ("character", creation_prompt, "A pirate", '{"name": "Pirate"}'),
+        ("character", creation_prompt, "A poet", '{"name": "Poet"}'),
+    ]
+    for kind, system, prompt, response in recordings:
+        # Provider messages differ per backend; only the canonical request is shared
+        recorder.record("langchain", kind, "test-model", [{"role": "user", "content": "wire form"}],
+                        response, 0.0, request=canonical_request(system, prompt))
+
+    assert all(entry["request_key"] for entry in load_cassette(path))
+    replay = ReplayDebator(CassettePlayer.from_path(path, time_scale=0))
+    assert replay.debate("You are Ada.", "Topic two") == "Ada on topic two"
+    assert replay.debate("You are Ada.", ["Topic one"]) == "Ada on topic one"
+    assert replay.create_character_from_description("A poet")["name"] == "Poet"
+    assert replay.create_character_from_description("A pirate")["name"] == "Pirate"
+
+
+def test_malformed_completion_is_not_recorded(tmp_path, monkeypatch):
+    pytest.importorskip("huggingface_hub")
+    from app.model_interface import llama_debator
+
+    path = tmp_path / "session.jsonl.gz"
+    monkeypatch.setattr(llama_debator, "RECORDER", CassetteRecorder(path))
+    debator = llama_debator.LlamaDebator("test-model", api_key=None)
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(
+        create=lambda **kwargs: SimpleNamespace(choices=[], usage=None)
+    )))
+    monkeypatch.setattr(debator, "_client", lambda timeout=None: client)
+
+    assert debator.debate("You are Ada.", "Topic") == "[Error parsing model output]"
+    assert not path.exists()
+
+
+def test_persona_distillations_record_and_replay_as_their_own_kind(tmp_path, monkeypatch):
+    pytest.importorskip("huggingface_hub")
+    from app.model_interface import llama_debator
+
+    path = tmp_path / "session.jsonl.gz"
+    monkeypatch.setattr(llama_debator, "RECORDER", CassetteRecorder(path))
+    debator = llama_debator.LlamaDebator("test-model", api_key=None)
+    persona = "You are Ada, a mathematician. " * 40
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(
+        create=lambda messages, **kwargs: _completion("You are Ada, terse and exact.")
+    )))
+    monkeypatch.setattr(debator, "_client", lambda timeout=None: client)
+
+    assert debator.distill_persona(persona) == "You are Ada, terse and exact."
+    assert [entry["kind"] for entry in load_cassette(path)] == ["persona"]
+
+    replay = ReplayDebator(CassettePlayer.from_path(path, time_scale=0))
+    assert replay.distill_persona(persona) == "You are Ada, terse and exact."
+
+
+def test_replay_without_persona_recordings_does_not_distill(tmp_path):
+    path = tmp_path / "session.jsonl.gz"
+    creation_prompt = PROMPTS.current().render("interpreted_character_creation_prompt")
+    CassetteRecorder(path).record("llama", "character", "test-model", [], '{"name": "Poet"}', 0.0,
+                                  request=canonical_request(creation_prompt, "A poet"))
+
+    replay = ReplayDebator(CassettePlayer.from_path(path, time_scale=0))
+    assert replay.distill_persona("You are a poet. " * 40) is None
+    character = replay.create_character_from_description("A poet")
+    assert character == {"name": "Poet", "character_id": character["character_id"]}
+
+
+def test_replayed_characters_are_stored_for_debates(tmp_path):
+    path = tmp_path / "session.jsonl.gz"
+    creation_prompt = PROMPTS.current().render("interpreted_character_creation_prompt")
+    CassetteRecorder(path).record("llama", "character", "test-model", [], '{"name": "Sailor"}', 0.0,
+                                  request=canonical_request(creation_prompt, "A sailor"))
+
+    replay = ReplayDebator(CassettePlayer.from_path(path, time_scale=0))
+    character = replay.create_character_from_description("A sailor")
+
+    assert len(character["character_id"]) == 12
+    assert CHARACTER_STORE.get(character["character_id"]) == character
+
+
+def test_langchain_distillation_is_recorded(tmp_path, monkeypatch):
+    pytest.importorskip("langchain_openai")
+    from app.model_interface import langchain_debator
+
+    path = tmp_path / "session.jsonl.gz"
+    monkeypatch.setattr(langchain_debator, "RECORDER", CassetteRecorder(path))
+    debator = langchain_debator.LangChainDebator("gpt-4", api_key="sk-test")
+    llm = SimpleNamespace(invoke=lambda messages: SimpleNamespace(content="You are Ada.", usage_metadata=None))
+    monkeypatch.setattr(debator, "_llm_for_phase", lambda phase: llm)
+
+    persona = "You are Ada, a mathematician. " * 40
+    assert debator.distill_persona(persona) == "You are Ada."
+
+    replay = ReplayDebator(CassettePlayer.from_path(path, time_scale=0))
+    assert [entry["kind"] for entry in load_cassette(path)] == ["persona"]
+    assert replay.distill_persona(persona) == "You are Ada."
+
+
+def test_langchain_debates_record_token_counts(tmp_path, monkeypatch):
+    pytest.importorskip("langchain_openai")
+    from app.model_interface import langchain_debator
+
+    path = tmp_path / "session.jsonl.gz"
+    monkeypatch.setattr(langchain_debator, "RECORDER", CassetteRecorder(path))
+    debator = langchain_debator.LangChainDebator("gpt-4", api_key="sk-test")
+    chain = SimpleNamespace(invoke=lambda inputs: "A measured reply.")
+    monkeypatch.setattr(debator, "_chain_for_phase", lambda agent, phase: chain)
+
+    assert debator.debate("You are Ada.", ["Bob objects."]) == "A measured reply."
+
+    (entry,) = load_cassette(path)
+    assert entry["prompt_tokens"] > 0
+    assert entry["completion_tokens"] > 0
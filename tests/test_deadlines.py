@@ -0,0 +1,41 @@
+import time
+
+import pytest
+
+from app.cancellation import DebateControl
+
+
+def test_deadline_timeouts_do_not_grow_the_langchain_caches(monkeypatch):
+    pytest.importorskip("langchain_openai")
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    from app.model_interface.langchain_debator import LangChainDebator
+
+    debator = LangChainDebator("gpt-4", api_key="sk-test")
+    agent = debator.initialize_agent("You are Ada.")
+    control = DebateControl(deadline_s=60)
+
+    for _ in range(20):
+        chain = control.run("rebuttal", 10, lambda: debator._chain_for_phase(agent, "rebuttal"))
+        time.sleep(0.001)
+
+    assert 0 < chain.steps[1].kwargs["timeout"] < 60
+
+    assert len(debator._phase_llms) == 1
+    assert agent["phase_chains"] == {}
+
+    # Without a deadline the chain is cached as before
+    debator._chain_for_phase(agent, "rebuttal")
+    assert len(agent["phase_chains"]) == 1
+
+
+def test_seconds_per_token_counts_generated_tokens():
+    control = DebateControl(deadline_s=60)
+
+    def short_turn():
+        time.sleep(0.05)
+        return "Short answer."  # ended early, far below max_tokens
+
+    control.run("rebuttal", 10, short_turn)
+
+    # 3 tokens in ~50ms, not max_tokens tokens
+    assert control._s_per_token > 0.01
@@ -0,0 +1,83 @@
+import pytest
+
+from app.judging import Judge, VerdictCache, transcript_text
+from app.model_interface.generation_profiles import GENERATION_PROFILES
+from app.model_interface.mock_debator import MockCompletionEngine, MockDebator
+
+
+class RecordingDebator(MockDebator):
+    def __init__(self):
+        super().__init__(MockCompletionEngine(latency_ms=0, tokens_per_second=1e6))
+        self.requests = []
+
+    def debate(self, char_description, prompt, phase="rebuttal"):
+        self.requests.append(prompt)
+        return super().debate(char_description, prompt, phase=phase)
+
+
+def test_turns_render_like_history_lists():
+    history = ["I open.", "I disagree.", "I close.", "So do I."]
+    turns = [
+        {"speaker": "Ada", "round": i // 2, "phase": "rebuttal", "text": text, "tokens": 3}
+        for i, text in enumerate(history)
+    ]
+    for i, turn in enumerate(turns):
+        turn["speaker"] = "Ada" if i % 2 == 0 else "Bob"
+
+    assert transcript_text(turns) == transcript_text(history)
+    assert transcript_text(turns).splitlines()[1] == "Debater B: I disagree."
+
+
+def test_panels_of_more_than_two_cannot_be_judged():
+    turns = [{"speaker": name, "text": "Hello"} for name in ("Ada", "Bob", "Cy")]
+    with pytest.raises(ValueError):
+        transcript_text(turns)
+
+
+def test_packed_debates_are_sent_as_one_turn():
+    debator = RecordingDebator()
+    judge = Judge(debator, cache=VerdictCache())
+    transcripts = [["I open.", f"I disagree {i}."] for i in range(3)]
+
+    verdicts = judge.judge_many(transcripts)
+
+    (request,) = debator.requests
+    assert isinstance(request, str)
+    assert [line for line in request.splitlines() if line.startswith("###")] == [
+        "### DEBATE 0", "### DEBATE 1", "### DEBATE 2",
+    ]
+    assert all(verdict["winner"] in ("A", "B", None) and "error" not in verdict for verdict in verdicts)
+
+
+def test_packing_is_sized_for_the_judge_profile():
+    judge = Judge(RecordingDebator(), cache=VerdictCache())
+    assert judge._budget.max_tokens == GENERATION_PROFILES["judge"].max_tokens
+
+
+def test_judge_endpoint_accepts_debate_output():
+    pytest.importorskip("fastapi")
+    pytest.importorskip("multipart")
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    client = TestClient(app)
+    debate = client.post("/debate/", data={
+        "prompt": "Is tea better than coffee?",
+        "char_a": "Phineas Flynn",
+        "char_b": "Perry the Platypus",
+        "debate_rounds_count": 2,
+    }).json()["debate"]
+    panel = client.post("/panelDebate/", data={
+        "prompt": "Is tea better than coffee?",
+        "characters": ["Phineas Flynn", "Perry the Platypus"],
+        "debate_rounds_count": 2,
+    }).json()["debate"]
+
+    response = client.post("/judge/", json={"transcripts": [debate, panel, ["A says", "B says"]]})
+    assert response.status_code == 200
+    verdicts = response.json()["verdicts"]
+    assert len(verdicts) == 3
+    assert all("error" not in verdict for verdict in verdicts)
+
+    three = panel + [{"speaker": "Ferb", "text": "..."}]
+    assert client.post("/judge/", json={"transcripts": [three]}).status_code == 400
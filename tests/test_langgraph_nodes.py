@@ -0,0 +1,101 @@
+import os
+import time
+
+import pytest
+
+pytest.importorskip("langgraph")
+pytest.importorskip("langchain_openai")
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+
+from langchain_core.messages import HumanMessage  # noqa: E402
+
+import app.debate_langgraph_langchain as graph  # noqa: E402
+from app.cancellation import DebateControl  # noqa: E402
+
+
+class FakeChain:
+    def __init__(self):
+        self.inputs = []
+
+    def invoke(self, inputs):
+        self.inputs.append(inputs)
+        return "A fresh rebuttal"
+
+
+@pytest.fixture
+def chain(monkeypatch):
+    chain = FakeChain()
+    monkeypatch.setattr(graph.DEBATOR, "_chain_for_phase", lambda agent, phase: chain)
+    return chain
+
+
+def _state(use_memory):
+    context = "You are Ada."
+    agent = graph.DEBATOR.initialize_agent(context)
+    history = [HumanMessage(content="Ada opens."), HumanMessage(content="Bob objects.")]
+    return {
+        "prompt": "Should AI be regulated?",
+        "character_a": "Ada",
+        "character_b": "Bob",
+        "a_context": context,
+        "a_rebuttal_context": context,
+        "a_agent": agent,
+        "a_rebuttal_agent": agent,
+        "history": history,
+        "current_round": 1,
+        "max_rounds": 3,
+        "debate_phase": "debate",
+        "use_memory": use_memory,
+        "early_stop": False,
+        "rounds_saved": 0,
+        "prompts": graph.PROMPTS.current(),
+        "control": None,
+        "stopped": None,
+    }
+
+
+@pytest.mark.parametrize("use_memory", [True, False])
+def test_rebuttal_with_message_history(chain, use_memory):
+    state = graph.character_a_debate(_state(use_memory))
+
+    assert state["history"][-1] == "A fresh rebuttal"
+    assert "Bob objects." in chain.inputs[-1]["input"]
+
+
+@pytest.mark.parametrize("use_memory", [True, False])
+def test_closing_with_message_history(chain, use_memory):
+    state = graph.character_a_closing(_state(use_memory))
+
+    assert state["history"][-1] == "A fresh rebuttal"
+
+
+class TimingOutChain:
+    """Answers the first call, then blocks past the debate's deadline and times out"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def invoke(self, inputs):
+        self.calls += 1
+        if self.calls == 1:
+            return "Ada opens."
+        time.sleep(0.3)
+        raise TimeoutError("Request timed out")
+
+
+def test_deadline_exceeded_stops_the_debate(monkeypatch):
+    chain = TimingOutChain()
+    monkeypatch.setattr(graph.DEBATOR, "_chain_for_phase", lambda agent, phase: chain)
+    monkeypatch.setattr(graph, "get_character_description", lambda name: {"system_prompt": f"You are {name}."})
+
+    result = graph.start_turn_based_debate(
+        "Should AI be regulated?", "deadline-a", "deadline-b",
+        debate_rounds_count=3, control=DebateControl(deadline_s=0.2),
+    )
+
+    assert "Stopped Early: deadline exceeded" in result
+    assert "Ada opens." in result
+    assert "[Error" not in result
+    # The closing node never ran, but the cached agents' memory is still cleared
+    assert graph.DEBATOR.get_agent_history("deadline-a") == []
+    assert graph.DEBATOR.get_agent_history("deadline-b") == []
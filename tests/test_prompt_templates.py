@@ -0,0 +1,23 @@
+import pytest
+
+from app.prompt_templates import PromptSet, PromptTemplate
+
+
+def test_literal_dollar_signs_are_escaped():
+    template = PromptTemplate("bet", ["Bet $$5 on $side.", "?Odds: $odds"])
+
+    assert template.placeholders == {"side", "odds"}
+    assert template.render({"side": "Ada"}) == "Bet $5 on Ada."
+
+
+def test_a_stray_dollar_sign_fails_at_compile_time():
+    with pytest.raises(ValueError, match=r"Prompt 'pitch' .* write '\$\$'"):
+        PromptTemplate("pitch", ["You are $name.", "Your time is worth $5 a minute."])
+
+
+def test_a_stray_dollar_sign_in_a_constant_prompt_names_the_prompt():
+    with pytest.raises(ValueError, match="closing_statement_prompt"):
+        PromptSet({"closing_statement_prompt": "Close in under $3 words.", "debate_rounds_count": 3})
+
+    prompts = PromptSet({"closing_statement_prompt": "Close as if it cost $$3 a word."})
+    assert prompts.render("closing_statement_prompt") == "Close as if it cost $3 a word."
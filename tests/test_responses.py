@@ -0,0 +1,98 @@
+import gzip
+import json
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+import app.responses as responses  # noqa: E402
+from app.responses import COMPRESS_MIN_BYTES, encoded_response, negotiate_encoding  # noqa: E402
+
+
+class FakeRequest:
+    def __init__(self, accept_encoding=None):
+        self.headers = {"accept-encoding": accept_encoding} if accept_encoding else {}
+
+
+@pytest.fixture
+def with_brotli(monkeypatch):
+    monkeypatch.setattr(responses, "brotli", object())
+
+
+@pytest.fixture
+def without_brotli(monkeypatch):
+    monkeypatch.setattr(responses, "brotli", None)
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, None),
+    ("", None),
+    ("identity", None),
+    ("gzip", "gzip"),
+    ("gzip;q=0", None),
+    ("br, gzip", "br"),
+    ("br;q=0.5, gzip", "gzip"),
+    ("br;q=0, gzip;q=0.1", "gzip"),
+    ("*", "br"),
+    ("br;q=0, *", "gzip"),
+    ("*;q=0", None),
+    ("gzip;q=oops, br", "br"),
+])
+def test_negotiation_with_brotli(with_brotli, header, expected):
+    assert negotiate_encoding(header) == expected
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("br", None),
+    ("br, gzip", "gzip"),
+    ("*", "gzip"),
+])
+def test_negotiation_without_brotli(without_brotli, header, expected):
+    assert negotiate_encoding(header) == expected
+
+
+def test_small_bodies_are_sent_uncompressed():
+    body = b"x" * (COMPRESS_MIN_BYTES - 1)
+    response = encoded_response(FakeRequest("gzip"), body, "text/plain")
+
+    assert response.body == body
+    assert "content-encoding" not in response.headers
+    assert response.headers["vary"] == "Accept-Encoding"
+
+
+def test_large_bodies_are_compressed(without_brotli):
+    body = b"x" * COMPRESS_MIN_BYTES
+    response = encoded_response(FakeRequest("br, gzip"), body, "text/plain")
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert gzip.decompress(response.body) == body
+    assert encoded_response(FakeRequest(), body, "text/plain").body == body
+
+
+def test_debate_views():
+    pytest.importorskip("multipart")
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    client = TestClient(app)
+    form = {
+        "prompt": "Is tea better than coffee?",
+        "char_a": "Phineas Flynn",
+        "char_b": "Perry the Platypus",
+        "debate_rounds_count": 2,
+    }
+
+    response = client.post("/debate/", data=form, headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-type"] == "application/json"
+    assert response.headers["content-encoding"] == "gzip"
+    body = response.json()
+    assert body["participants"] == ["Phineas Flynn", "Perry the Platypus"]
+    assert [turn["speaker"] for turn in body["debate"][:2]] == ["Phineas Flynn", "Perry the Platypus"]
+    assert {"speaker", "round", "phase", "text", "tokens"} <= set(body["debate"][0])
+
+    text = client.post("/debate/?view=text", data=form, headers={"Accept-Encoding": "identity"})
+    assert text.headers["content-type"] == "text/plain; charset=utf-8"
+    assert "content-encoding" not in text.headers
+    assert "OPENING STATEMENTS:" in text.text
+    with pytest.raises(json.JSONDecodeError):
+        json.loads(text.text)
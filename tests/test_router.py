@@ -0,0 +1,133 @@
+import time
+
+import pytest
+
+import app.model_interface.router as router
+from app.cancellation import DebateCancelled, DebateControl
+from app.model_interface.debator_interface import DebatorInterface
+from app.model_interface.generation_profiles import get_profile
+from app.model_interface.router import FailoverPolicy, RouteStats, RouterDebator
+
+POLICY = FailoverPolicy(p95_ms=100, max_error_rate=0.25, window=10, min_samples=4, cooldown_s=0.05)
+
+
+class FakeRoute(DebatorInterface):
+    def __init__(self, name, calls, fail=None, sleep_s=0.0):
+        self.name = name
+        self.calls = calls
+        self.fail = fail
+        self.sleep_s = sleep_s
+
+    @staticmethod
+    def format_character_for_prompt(character):
+        return character
+
+    def debate(self, char_description, prompt, phase="rebuttal"):
+        self.calls.append((self.name, get_profile(phase).timeout))
+        time.sleep(self.sleep_s)
+        if self.fail == "raise":
+            raise TimeoutError(f"{self.name} timed out")
+        if self.fail == "error":
+            return f"[Error generating response: {self.name}]"
+        return f"{self.name} answers"
+
+    def create_character_from_description(self, user_input):
+        return {"character_id": self.name}
+
+
+@pytest.fixture(autouse=True)
+def route_stats(monkeypatch):
+    stats = {}
+    monkeypatch.setattr(router, "ROUTE_STATS", stats)
+    return stats
+
+
+def _router(calls, **routes):
+    return RouterDebator(
+        routes={name: FakeRoute(name, calls, **kwargs) for name, kwargs in routes.items()},
+        phases={"rebuttal": list(routes)},
+        default=list(routes),
+        policy=POLICY,
+    )
+
+
+def test_route_is_demoted_on_error_rate():
+    stats = RouteStats(POLICY)
+    for ok in (True, True, True, False):
+        stats.record(0.01, ok)
+    assert stats.healthy()  # 1 in 4 is not above the 25% limit
+
+    stats.record(0.01, False)
+    assert not stats.healthy()
+
+
+def test_route_is_demoted_on_p95_latency():
+    stats = RouteStats(POLICY)
+    for _ in range(3):
+        stats.record(0.01, True)
+    assert stats.healthy()  # below min_samples
+
+    stats.record(0.5, True)
+    assert not stats.healthy()
+    assert stats.report()["p95_ms"] == 500.0
+
+
+def test_cooldown_clears_the_window():
+    stats = RouteStats(POLICY)
+    for _ in range(4):
+        stats.record(0.01, False)
+    assert not stats.healthy()
+
+    time.sleep(POLICY.cooldown_s)
+    assert stats.healthy()
+    assert stats.report()["samples"] == 0
+
+
+def test_cascade_tries_routes_in_order_and_demoted_ones_last(route_stats):
+    calls = []
+    debator = _router(calls, first={"fail": "error"}, second={"fail": "raise"}, third={})
+
+    assert debator.debate("You are Ada.", ["Bob objects."]) == "third answers"
+    assert [name for name, _ in calls] == ["first", "second", "third"]
+    assert route_stats["first"].report()["error_rate"] == 1.0
+    assert route_stats["third"].report()["error_rate"] == 0.0
+
+    for _ in range(4):
+        route_stats["first"].record(0.01, False)
+    calls.clear()
+    debator.debate("You are Ada.", ["Bob objects."])
+    assert [name for name, _ in calls] == ["second", "third"]
+
+
+def test_only_error_responses_are_returned_when_every_route_fails():
+    calls = []
+    debator = _router(calls, first={"fail": "raise"}, second={"fail": "error"})
+    assert debator.debate("You are Ada.", ["Bob objects."]) == "[Error generating response: second]"
+
+    debator = _router(calls, first={"fail": "raise"})
+    with pytest.raises(TimeoutError):
+        debator.debate("You are Ada.", ["Bob objects."])
+
+
+def test_deadline_failures_are_not_held_against_the_route(route_stats):
+    calls = []
+    debator = _router(calls, first={"fail": "raise", "sleep_s": 0.1}, second={})
+    control = DebateControl(deadline_s=0.05)
+
+    with pytest.raises(DebateCancelled):
+        control.run("rebuttal", 1, lambda: debator.debate("You are Ada.", ["Bob objects."]))
+
+    # No cascade past the deadline, and no sample against the route
+    assert [name for name, _ in calls] == ["first"]
+    assert route_stats["first"].report()["samples"] == 0
+
+
+def test_failover_gets_what_is_left_of_the_deadline():
+    calls = []
+    debator = _router(calls, first={"fail": "raise", "sleep_s": 0.1}, second={})
+    control = DebateControl(deadline_s=1)
+
+    assert control.run("rebuttal", 1, lambda: debator.debate("You are Ada.", ["Bob objects."])) == "second answers"
+
+    (_, first_timeout), (_, second_timeout) = calls
+    assert second_timeout <= first_timeout - 0.1
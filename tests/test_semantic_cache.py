@@ -0,0 +1,45 @@
+import numpy as np
+
+from app.semantic_cache import HashedNgramEmbedder, OpeningCache, negation_count
+
+
+class KeywordEmbedder:
+    """A 'semantic' embedder that only sees whether a topic is about AI regulation"""
+
+    semantic = True
+    dim = 2
+
+    def __call__(self, text):
+        text = text.lower()
+        about_ai = "ai" in text.split() or "artificial intelligence" in text
+        return np.array([1.0, 0.0] if about_ai and "regulat" in text else [0.0, 1.0], dtype=np.float32)
+
+
+def test_hashed_embeddings_only_serve_exact_repeats():
+    cache = OpeningCache(embedder=HashedNgramEmbedder())
+    topic = "Should governments strictly regulate artificial intelligence research?"
+    cache.get_or_create("ctx", topic, lambda: "For regulation")
+
+    opening, hit = cache.get_or_create(
+        "ctx", "Should governments not strictly regulate artificial intelligence research?",
+        lambda: "Against regulation",
+    )
+    assert (opening, hit) == ("Against regulation", False)
+
+    assert cache.get_or_create("ctx", topic.upper() + "  ", lambda: "unused") == ("For regulation", True)
+
+
+def test_semantic_hits_require_matching_negations():
+    cache = OpeningCache(embedder=KeywordEmbedder(), threshold=0.9)
+    cache.get_or_create("ctx", "Should AI be regulated?", lambda: "For regulation")
+
+    assert cache.get_or_create("ctx", "Should artificial intelligence be regulated", lambda: "x") == (
+        "For regulation", True
+    )
+    assert cache.get_or_create("ctx", "Shouldn't AI be regulated?", lambda: "Against") == ("Against", False)
+
+
+def test_negation_count():
+    assert negation_count("Should AI be regulated?") == 0
+    assert negation_count("AI should not and cannot be regulated") == 2
+    assert negation_count("Shouldn’t AI be regulated?") == 1
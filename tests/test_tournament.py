@@ -0,0 +1,22 @@
+import pytest
+
+from app.tournament import run_tournament
+
+CHARACTERS = ["Phineas Flynn", "Perry the Platypus", "Ferb Fletcher"]
+
+
+def test_duplicate_characters_are_rejected():
+    with pytest.raises(ValueError, match="unique"):
+        run_tournament(["Phineas Flynn", "Perry the Platypus", "Phineas Flynn"], ["Tea or coffee?"], 2)
+
+
+def test_first_speaker_alternates_across_topics():
+    topics = ["Tea or coffee?", "Cats or dogs?"]
+    tournament = run_tournament(CHARACTERS, topics, 2)
+
+    first_speakers = {
+        topic: {(r["char_a"], r["char_b"]) for r in tournament["results"] if r["topic"] == topic}
+        for topic in topics
+    }
+    assert first_speakers[topics[1]] == {(b, a) for a, b in first_speakers[topics[0]]}
+    assert all(row["played"] == 4 for row in tournament["standings"])
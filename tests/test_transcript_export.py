@@ -0,0 +1,81 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from app.transcript_export import TranscriptExporter, debate_rows, iter_turns, model_labels, open_transcripts
+
+TURNS = [
+    {"speaker": "Ada", "round": 0, "phase": "opening", "text": "I open.", "tokens": 3,
+     "started_ms": 0.0, "latency_ms": 12.5},
+    {"speaker": "Bob", "round": 0, "phase": "opening", "text": "I object.", "tokens": 3,
+     "started_ms": 12.5, "latency_ms": 10.0},
+]
+
+
+def _export(root, fmt):
+    exporter = TranscriptExporter(root, fmt, flush_interval_s=60)
+    assert exporter.format == fmt
+    exporter.submit(debate_rows("debate", "Tea or coffee?", TURNS, model="test-model"))
+    exporter.close()
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d")
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "arrow"])
+def test_columnar_export_reads_back_with_its_partition(tmp_path, fmt):
+    pytest.importorskip("pyarrow")
+    import pyarrow.dataset as ds
+
+    date = _export(tmp_path, fmt)
+    (partition,) = tmp_path.iterdir()
+    assert partition.name == f"date={date}"
+
+    table = open_transcripts(tmp_path).to_table(
+        columns=["speaker", "text", "latency_ms", "date"], filter=ds.field("date") == date
+    )
+    assert table.to_pylist() == [
+        {"speaker": "Ada", "text": "I open.", "latency_ms": 12.5, "date": date},
+        {"speaker": "Bob", "text": "I object.", "latency_ms": 10.0, "date": date},
+    ]
+
+    rows = list(iter_turns(tmp_path, dates=[date], columns=["speaker", "model", "turn_index"]))
+    assert rows == [
+        {"speaker": "Ada", "model": "test-model", "turn_index": 0},
+        {"speaker": "Bob", "model": "test-model", "turn_index": 1},
+    ]
+
+
+def test_jsonl_export_reads_back(tmp_path):
+    date = _export(tmp_path, "jsonl")
+
+    rows = list(iter_turns(tmp_path, dates=[date]))
+    assert [row["text"] for row in rows] == ["I open.", "I object."]
+    assert rows[0]["topic"] == "Tea or coffee?"
+    assert list(iter_turns(tmp_path, dates=["1999-01-01"])) == []
+
+
+def test_flush_after_close_returns(tmp_path):
+    exporter = TranscriptExporter(tmp_path, "jsonl", flush_interval_s=60)
+    exporter.close()
+
+    exporter.flush()  # would block forever waiting on the stopped writer
+    assert not exporter._thread.is_alive()
+
+
+def test_routed_turns_are_labelled_with_the_route_model():
+    from app.model_interface.mock_debator import MockDebator
+    from app.model_interface.router import RouterDebator
+
+    class Route(MockDebator):
+        def __init__(self, model_name):
+            super().__init__()
+            self._model_name = model_name
+
+    router = RouterDebator(
+        routes={"small": Route("small-model"), "large": Route("large-model")},
+        phases={"opening": ["large", "small"], "rebuttal": ["small", "large"]},
+        default=["small"],
+    )
+    turns = TURNS + [{**TURNS[0], "phase": "rebuttal", "round": 1}]
+
+    rows = debate_rows("debate", "Tea or coffee?", turns, model=model_labels(router))
+    assert [row["model"] for row in rows] == ["large-model", "large-model", "small-model"]